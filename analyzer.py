@@ -0,0 +1,464 @@
+"""
+豆瓣Top250电影数据分析
+"""
+
+import logging
+import os
+
+import pandas as pd
+
+import charts
+import config
+from metrics import metrics
+from storage import is_columnar, load_table
+
+logger = logging.getLogger(__name__)
+
+
+class DataAnalyzer:
+    """数据分析类
+    
+    图表、报告和导出共用的统计结果通过 aggregate(name) 读取：每个聚合在第一次使用时计算并缓存，
+    之后直接复用；给 df 赋新值或调用 invalidate() 时清空缓存。
+    """
+    
+    # 聚合注册表：名称 -> 计算方法
+    AGGREGATES = {
+        'year_counts': '_year_counts',
+        'rating_counts': '_rating_counts',
+        'rating_summary': '_rating_summary',
+        'decade_rating': '_decade_rating',
+        'type_counts': '_type_counts',
+        'country_counts': '_country_counts',
+        'director_counts': '_director_counts',
+        'quote_frequencies': '_quote_frequencies',
+    }
+    
+    def __init__(self, data, save_entities=True):
+        """
+        初始化数据分析器
+        
+        Args:
+            data: DataFrame或电影数据文件路径（支持xlsx、csv、parquet、feather）
+            save_entities: 预处理后是否把新见到的名称写回实体索引文件，只读的调用方（如HTTP接口）设为False
+        """
+        if isinstance(data, str):
+            # 尝试不同的方式加载数据
+            try:
+                if data.endswith('.xlsx'):
+                    data = pd.read_excel(data)
+                elif data.endswith('.csv'):
+                    data = pd.read_csv(data)
+                elif is_columnar(data):
+                    data = load_table(data)
+                else:
+                    logger.error(f"不支持的文件格式: {data}")
+                    raise ValueError(f"不支持的文件格式: {data}")
+            except Exception as e:
+                logger.error(f"加载数据文件出错: {e}")
+                raise
+        
+        self._aggregates = {}
+        self.save_entities = save_entities
+        self.df = data
+    
+    @property
+    def df(self):
+        """分析的电影数据"""
+        return self._df
+    
+    @df.setter
+    def df(self, data):
+        """替换数据：重新预处理并清空已缓存的聚合"""
+        # 检查数据是否为空
+        if data.empty:
+            logger.error("数据为空，无法进行分析")
+            raise ValueError("数据为空，无法进行分析")
+        
+        self._df = data
+        # 数据预处理
+        self._preprocess()
+        self.invalidate()
+    
+    def invalidate(self, *names):
+        """清空缓存的聚合，不指定名称时全部清空；原地修改 df 后需要调用"""
+        if names:
+            for name in names:
+                self._aggregates.pop(name, None)
+        else:
+            self._aggregates.clear()
+    
+    def aggregate(self, name):
+        """按名称读取聚合结果，第一次使用时计算并缓存
+        
+        Args:
+            name: AGGREGATES 中注册的名称
+            
+        Returns:
+            聚合结果，调用方不应原地修改
+        """
+        if name in self._aggregates:
+            metrics.increment('aggregate_cache', result='hit')
+            return self._aggregates[name]
+        if name not in self.AGGREGATES:
+            raise KeyError(f"未注册的聚合: {name}")
+        metrics.increment('aggregate_cache', result='miss')
+        value = getattr(self, self.AGGREGATES[name])()
+        self._aggregates[name] = value
+        return value
+    
+    @metrics.timed('analyze', step='preprocess')
+    def _preprocess(self):
+        """预处理数据"""
+        try:
+            # 检查必要的列是否存在
+            required_columns = ['rating', 'rating_count', 'year', 'type']
+            for col in required_columns:
+                if col not in self.df.columns:
+                    logger.error(f"缺少必要的列: {col}")
+                    raise ValueError(f"缺少必要的列: {col}")
+            
+            # 处理缺失值
+            self.df['quote'] = self.df['quote'].fillna('')
+            
+            # 数值列：爬虫产出的DataFrame已经是数值类型，只有从旧版Excel/CSV读入的字符串列才需要转换
+            self._ensure_numeric('rating', float)
+            self._ensure_numeric('rating_count', int)
+            self._ensure_numeric('year', int)
+            
+            # 电影唯一标识：优先使用豆瓣条目ID，旧数据没有时使用排名
+            if 'subject_id' in self.df.columns:
+                movie_id = self.df['subject_id'].astype('string').fillna('')
+                if 'rank' in self.df.columns:
+                    movie_id = movie_id.mask(movie_id == '', self.df['rank'].astype('string'))
+            elif 'rank' in self.df.columns:
+                movie_id = self.df['rank'].astype('string')
+            else:
+                movie_id = pd.Series(self.df.index, index=self.df.index).astype('string')
+            self.df['movie_id'] = movie_id
+            
+            # 多值列拆分为长表（movie_id -> 值），各分析方法直接在长表上分组统计
+            # 页面上多个类型/国家以空格分隔，旧数据中也可能以'/'分隔；导演名本身含空格，只按'/'分隔
+            # 导演和国家/地区的不同写法（截断、只有中文名或外文名、别称）归并为同一个规范名称
+            resolver = self.entity_resolver = self._entity_resolver()
+            self.types_long = self._explode('type', r'[/\s]+')
+            self.countries_long = self._explode('country', r'[/\s]+', resolver, 'country')
+            self.directors_long = self._explode('director', r'/', resolver, 'director')
+            if resolver is not None and self.save_entities:
+                try:
+                    resolver.save()
+                except OSError as e:
+                    logger.error(f"保存实体索引失败: {e}")
+            
+        except Exception as e:
+            logger.error(f"数据预处理出错: {e}")
+            raise
+    
+    def _ensure_numeric(self, column, dtype):
+        """把列转换为数值类型，无法解析的值记为0；已是数值类型时不做转换"""
+        if not pd.api.types.is_numeric_dtype(self.df[column]):
+            self.df[column] = pd.to_numeric(self.df[column], errors='coerce').fillna(0).astype(dtype)
+    
+    @staticmethod
+    def _entity_resolver():
+        """加载持久化的实体索引，关闭实体归并时返回None"""
+        if not config.RESOLVE_ENTITIES:
+            return None
+        from entities import EntityResolver
+        
+        return EntityResolver()
+    
+    def _explode(self, column, separator, resolver=None, kind=None):
+        """把多值列拆分为 movie_id -> 值 的长表
+        
+        Args:
+            column: 列名
+            separator: 分隔符正则表达式
+            resolver: entities.EntityResolver，把各取值映射为规范名称，为None时保留原始写法
+            kind: resolver 中的实体类别
+            
+        Returns:
+            包含 movie_id 和 column 两列的DataFrame，值为category类型，已去除空值和"未知"
+        """
+        if column not in self.df.columns:
+            return pd.DataFrame({'movie_id': pd.Series(dtype='string'), column: pd.Series(dtype='category')})
+        
+        values = self.df[column].astype('string').fillna('')
+        long = pd.DataFrame({
+            'movie_id': self.df['movie_id'],
+            column: values.str.split(separator, regex=True),
+        }).explode(column)
+        
+        long[column] = long[column].str.strip()
+        long = long[long[column].notna() & (long[column] != '') & (long[column] != '未知')]
+        if resolver is not None:
+            # 每个不同的写法只解析一次
+            canonical = {value: resolver.resolve(kind, value) for value in long[column].unique()}
+            long[column] = long[column].map(canonical)
+            long = long[long[column] != ''].drop_duplicates(['movie_id', column])
+        long[column] = long[column].astype('category')
+        return long.reset_index(drop=True)
+    
+    @staticmethod
+    def _count(long, column):
+        """统计长表中各取值出现的次数，按次数降序"""
+        counts = long.groupby(column, observed=True).size()
+        return counts.sort_values(ascending=False, kind='stable').rename('count')
+    
+    @property
+    def all_types(self):
+        """所有电影类型（每部电影的每个类型各一项）"""
+        return self.types_long['type'].astype(str).tolist()
+    
+    def _year_counts(self):
+        """有效年份的电影数量，按年份排序"""
+        valid_years = self.df[self.df['year'] > 1900]['year']
+        return valid_years.value_counts().sort_index()
+    
+    def _rating_counts(self):
+        """各评分的电影数量，按评分排序"""
+        return self.df['rating'].value_counts().sort_index()
+    
+    def _rating_summary(self):
+        """评分的描述统计"""
+        return self.df['rating'].describe()
+    
+    def _type_counts(self):
+        return self._count(self.types_long, 'type')
+    
+    def _country_counts(self):
+        return self._count(self.countries_long, 'country')
+    
+    def _director_counts(self):
+        return self._count(self.directors_long, 'director')
+    
+    def _decade_rating(self):
+        """各年代平均评分"""
+        valid_df = self.df[(self.df['year'] > 1900) & (self.df['rating'] > 0)]
+        decade = (valid_df['year'] // 10) * 10
+        return valid_df['rating'].groupby(decade.rename('decade')).mean()
+    
+    @metrics.timed('analyze', step='tokenize')
+    def _quote_frequencies(self):
+        """简评词频，只对新增或变化的简评重新分词"""
+        from tokenizer import QuoteTokenizer
+        
+        return QuoteTokenizer().term_frequencies(self.df['movie_id'], self.df['quote'])
+    
+    def _render(self, func, data, output_file, **params):
+        """渲染单个图表，输入数据和参数与上次相同且图片已存在时跳过"""
+        name = os.path.splitext(os.path.basename(output_file))[0]
+        charts.render_cached(charts.ChartJob(name, func, data, output_file, params))
+    
+    def year_distribution(self, output_file="output/images/year_distribution.png"):
+        """分析电影年份分布"""
+        try:
+            year_counts = self.aggregate('year_counts')
+            if year_counts.empty:
+                logger.error("没有有效的年份数据")
+                return pd.Series()
+            
+            self._render(charts.plot_year_distribution, year_counts, output_file)
+            return year_counts
+        except Exception as e:
+            logger.error(f"生成年份分布图出错: {e}")
+            return pd.Series()
+    
+    def rating_distribution(self, output_file="output/images/rating_distribution.png"):
+        """分析电影评分分布"""
+        try:
+            self._render(charts.plot_rating_distribution, self.df['rating'], output_file)
+            return self.aggregate('rating_summary')
+        except Exception as e:
+            logger.error(f"生成评分分布图出错: {e}")
+            return None
+    
+    def country_distribution(self, top_n=10, output_file="output/images/country_distribution.png"):
+        """分析电影国家/地区分布"""
+        try:
+            if self.countries_long.empty:
+                logger.error("没有有效的国家/地区数据")
+                return pd.Series()
+            
+            # 统计各国家/地区电影数量
+            country_counts = self.aggregate('country_counts')
+            
+            # 调整top_n，确保不超过实际数据量
+            top_n = min(top_n, len(country_counts))
+            
+            self._render(charts.plot_country_distribution, country_counts, output_file, top_n=top_n)
+            return country_counts
+        except Exception as e:
+            logger.error(f"生成国家分布图出错: {e}")
+            return pd.Series()
+    
+    def type_distribution(self, output_file="output/images/type_distribution.png"):
+        """分析电影类型分布"""
+        try:
+            if self.types_long.empty:
+                logger.error("没有有效的电影类型数据")
+                return pd.Series()
+            
+            # 统计各类型电影数量
+            type_counts = self.aggregate('type_counts')
+            
+            self._render(charts.plot_type_distribution, type_counts, output_file)
+            return type_counts
+        except Exception as e:
+            logger.error(f"生成类型分布图出错: {e}")
+            return pd.Series()
+    
+    def rating_by_year(self, output_file="output/images/rating_by_year.png"):
+        """分析不同年代电影评分情况"""
+        try:
+            decade_rating = self.aggregate('decade_rating')
+            if decade_rating.empty:
+                logger.error("没有有效的年份和评分数据")
+                return pd.Series()
+            
+            self._render(charts.plot_rating_by_year, decade_rating, output_file)
+            return decade_rating
+        except Exception as e:
+            logger.error(f"生成年代评分图出错: {e}")
+            return pd.Series()
+    
+    def director_ranking(self, top_n=10, output_file="output/images/director_ranking.png"):
+        """分析导演作品数量排名"""
+        try:
+            if self.directors_long.empty:
+                logger.error("没有有效的导演数据")
+                return pd.Series()
+            
+            # 统计各导演作品数量，获取前N名
+            director_counts = self.aggregate('director_counts')
+            top_n = min(top_n, len(director_counts))
+            top_directors = director_counts[:top_n]
+            
+            self._render(charts.plot_director_ranking, top_directors, output_file, top_n=top_n)
+            return top_directors
+        except Exception as e:
+            logger.error(f"生成导演排名图出错: {e}")
+            return pd.Series()
+    
+    def generate_wordcloud(self, output_file="output/images/quote_wordcloud.png"):
+        """生成电影简评词云"""
+        try:
+            frequencies = self.aggregate('quote_frequencies')
+            if not frequencies:
+                logger.error("没有有效的简评数据")
+                return False
+            
+            self._render(charts.plot_wordcloud, frequencies, output_file)
+            return True
+        except Exception as e:
+            logger.error(f"生成词云出错: {e}")
+            return False
+    
+    def chart_jobs(self, image_dir="output/images", top_n=10):
+        """计算所有图表需要的聚合数据，生成渲染任务列表
+        
+        聚合在当前进程完成，渲染任务只携带聚合后的小数据，可交给进程池执行。
+        没有有效数据的图表会被跳过。
+        """
+        jobs = []
+        
+        def add(name, func, data, **params):
+            jobs.append(charts.ChartJob(name, func, data, os.path.join(image_dir, f"{name}.png"), params))
+        
+        year_counts = self.aggregate('year_counts')
+        if not year_counts.empty:
+            add('year_distribution', charts.plot_year_distribution, year_counts)
+        
+        add('rating_distribution', charts.plot_rating_distribution, self.df['rating'])
+        
+        if not self.countries_long.empty:
+            country_counts = self.aggregate('country_counts')
+            add('country_distribution', charts.plot_country_distribution, country_counts,
+                top_n=min(top_n, len(country_counts)))
+        
+        if not self.types_long.empty:
+            add('type_distribution', charts.plot_type_distribution, self.aggregate('type_counts'))
+        
+        decade_rating = self.aggregate('decade_rating')
+        if not decade_rating.empty:
+            add('rating_by_year', charts.plot_rating_by_year, decade_rating)
+        
+        if not self.directors_long.empty:
+            director_counts = self.aggregate('director_counts')
+            n = min(top_n, len(director_counts))
+            add('director_ranking', charts.plot_director_ranking, director_counts[:n], top_n=n)
+        
+        frequencies = self.aggregate('quote_frequencies')
+        if frequencies:
+            add('quote_wordcloud', charts.plot_wordcloud, frequencies)
+        
+        return jobs
+    
+    def render_charts(self, image_dir="output/images", max_workers=None, on_event=None):
+        """在进程池中并行生成所有图表
+        
+        Args:
+            image_dir: 图片输出目录
+            max_workers: 进程数，默认取 config.CHART_WORKERS
+            on_event: 进度事件回调，每个图表完成时收到 type 为 chart_rendered 的事件
+            
+        Returns:
+            每个图表的渲染耗时列表
+        """
+        max_workers = config.CHART_WORKERS if max_workers is None else max_workers
+        on_result = None
+        if on_event is not None:
+            on_result = lambda timing: on_event(dict(type='chart_rendered', **timing))
+        timings = charts.render_jobs(self.chart_jobs(image_dir), max_workers=max_workers, on_result=on_result)
+        logger.info("图表渲染耗时:\n" + charts.format_timings(timings))
+        return timings
+    
+    @metrics.timed('analyze', step='report')
+    def generate_report(self):
+        """生成数据分析报告"""
+        try:
+            report = {}
+            
+            # 基本统计信息（与评分分布图共用描述统计）
+            rating_summary = self.aggregate('rating_summary')
+            report['movie_count'] = len(self.df)
+            report['avg_rating'] = rating_summary['mean']
+            report['min_rating'] = rating_summary['min']
+            report['max_rating'] = rating_summary['max']
+            
+            # 年份分布
+            year_counts = self.aggregate('year_counts')
+            if not year_counts.empty:
+                valid_years = self.df['year'].where(self.df['year'] > 1900)
+                oldest_idx = valid_years.idxmin()
+                newest_idx = valid_years.idxmax()
+                
+                report['oldest_movie'] = {
+                    'title': self.df.loc[oldest_idx, 'title'],
+                    'year': self.df.loc[oldest_idx, 'year']
+                }
+                
+                report['newest_movie'] = {
+                    'title': self.df.loc[newest_idx, 'title'],
+                    'year': self.df.loc[newest_idx, 'year']
+                }
+                
+                report['most_common_year'] = year_counts.idxmax()
+            else:
+                report['oldest_movie'] = {'title': '未知', 'year': '未知'}
+                report['newest_movie'] = {'title': '未知', 'year': '未知'}
+                report['most_common_year'] = '未知'
+            
+            # 评分分布
+            report['rating_counts'] = self.aggregate('rating_counts')
+            
+            # 其他分析
+            report['type_counts'] = self.aggregate('type_counts') if not self.types_long.empty else pd.Series()
+            
+            return report
+        except Exception as e:
+            logger.error(f"生成分析报告出错: {e}")
+            return {
+                'movie_count': len(self.df),
+                'error': str(e)
+            }
@@ -0,0 +1,368 @@
+"""
+只读HTTP接口：把最新的数据集加载到内存索引中，提供JSON查询和预渲染的图表
+
+用法:
+    python run.py serve [--host 127.0.0.1] [--port 8080] [--data 数据文件]
+
+接口:
+    GET /                         数据集概况（来源文件、加载时间、电影数）
+    GET /api/movies               电影列表，可按 year、type、country、director、min_rating 过滤，
+                                  limit/offset 分页
+    GET /api/movies/<排名>         按排名查询
+    GET /api/subjects/<条目ID>     按豆瓣条目ID查询
+    GET /api/stats                分析报告与各项统计
+    GET /api/years | /api/types | /api/countries | /api/directors    各取值的电影数
+    GET /charts                   可用图表列表
+    GET /charts/<名称>.png         图表图片
+
+所有响应都带 ETag，请求带 If-None-Match 且内容未变时返回304。
+数据文件被新一次爬取替换后（按修改时间和大小判断），下一个请求时自动重新加载；
+加载在新的索引上完成后才替换，加载期间的请求仍由旧索引响应。
+"""
+
+import hashlib
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 50
+
+
+def default_sources():
+    """默认的数据文件，按顺序使用第一个存在的"""
+    return [config.DATA_FILE, 'output/movies.xlsx', 'output/movies.csv']
+
+
+def _json_default(value):
+    # numpy标量
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _etag(data):
+    return '"' + hashlib.sha1(data).hexdigest()[:20] + '"'
+
+
+def _non_negative(params, name, default):
+    """查询参数中的非负整数，不合法时抛出ValueError（响应400）"""
+    value = int(params.get(name, default))
+    if value < 0:
+        raise ValueError(f"{name} 不能为负数")
+    return value
+
+
+def _counts(series):
+    return [{'name': str(name), 'count': int(count)} for name, count in series.items()]
+
+
+class MovieIndex:
+    """一个数据集的内存索引：按排名、条目ID、年份、类型、国家/地区和导演查找电影"""
+
+    def __init__(self, source):
+        """
+        Args:
+            source: 数据文件路径（parquet/feather/xlsx/csv）
+        """
+        from analyzer import DataAnalyzer
+
+        # 只读：新见到的名称只在内存中归并，不写回实体索引文件
+        analyzer = DataAnalyzer(source, save_entities=False)
+        df = analyzer.df
+        self.source = source
+        self.loaded_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.resolver = analyzer.entity_resolver
+
+        columns = [column for column in df.columns if column != 'movie_id']
+        records = df[columns].astype(object).where(df[columns].notna(), None).to_dict('records')
+        # 电影以行号标识，各索引保存行号
+        self.movies = records
+        self.by_rank = {}
+        self.by_subject = {}
+        self.by_year = {}
+        for row, movie in enumerate(records):
+            if movie.get('rank'):
+                self.by_rank[int(movie['rank'])] = row
+            if movie.get('subject_id'):
+                self.by_subject[str(movie['subject_id'])] = row
+            if movie.get('year'):
+                self.by_year.setdefault(int(movie['year']), []).append(row)
+
+        row_of = {movie_id: row for row, movie_id in enumerate(df['movie_id'])}
+        self.by_type = self._group(analyzer.types_long, 'type', row_of)
+        self.by_country = self._group(analyzer.countries_long, 'country', row_of)
+        self.by_director = self._group(analyzer.directors_long, 'director', row_of)
+        # 导演名等取值不区分大小写查找
+        self._folded = {
+            name: {key.casefold(): key for key in index}
+            for name, index in (('type', self.by_type), ('country', self.by_country), ('director', self.by_director))
+        }
+
+        report = analyzer.generate_report()
+        self.stats = {
+            'movie_count': int(report.get('movie_count', len(records))),
+            'avg_rating': report.get('avg_rating'),
+            'min_rating': report.get('min_rating'),
+            'max_rating': report.get('max_rating'),
+            'oldest_movie': report.get('oldest_movie'),
+            'newest_movie': report.get('newest_movie'),
+            'most_common_year': report.get('most_common_year'),
+            'rating_counts': {str(k): int(v) for k, v in report.get('rating_counts', {}).items()},
+            'decade_rating': {str(k): round(float(v), 3) for k, v in analyzer.aggregate('decade_rating').items()},
+        }
+        self.counts = {
+            'years': _counts(analyzer.aggregate('year_counts')),
+            'types': _counts(analyzer.aggregate('type_counts')),
+            'countries': _counts(analyzer.aggregate('country_counts')),
+            'directors': _counts(analyzer.aggregate('director_counts')),
+        }
+
+    @staticmethod
+    def _group(long, column, row_of):
+        groups = {}
+        for movie_id, value in zip(long['movie_id'], long[column].astype(str)):
+            groups.setdefault(value, []).append(row_of[movie_id])
+        return groups
+
+    def _lookup(self, kind, index, value):
+        """取值对应的行号列表：先精确匹配，再不区分大小写，导演和国家/地区再按实体索引归并"""
+        if value in index:
+            return index[value]
+        key = self._folded[kind].get(value.casefold())
+        if key is None and self.resolver is not None and kind in ('director', 'country'):
+            key = self.resolver.lookup(kind, value)
+        return index.get(key, []) if key is not None else []
+
+    def query(self, year=None, type=None, country=None, director=None, min_rating=None):
+        """按条件过滤，返回按排名排序的电影列表"""
+        candidates = None
+        filters = [
+            (year, lambda v: self.by_year.get(int(v), [])),
+            (type, lambda v: self._lookup('type', self.by_type, v)),
+            (country, lambda v: self._lookup('country', self.by_country, v)),
+            (director, lambda v: self._lookup('director', self.by_director, v)),
+        ]
+        for value, find in filters:
+            if value is None:
+                continue
+            rows = set(find(value))
+            candidates = rows if candidates is None else candidates & rows
+        rows = range(len(self.movies)) if candidates is None else candidates
+        movies = [self.movies[row] for row in rows]
+        if min_rating is not None:
+            movies = [movie for movie in movies if (movie.get('rating') or 0) >= min_rating]
+        return sorted(movies, key=lambda movie: movie.get('rank') or 0)
+
+
+class DatasetStore:
+    """持有当前的 MovieIndex，数据文件变化时重新加载"""
+
+    def __init__(self, sources=None, image_dir=None, reload_interval=None):
+        """
+        Args:
+            sources: 候选数据文件列表，默认见 default_sources
+            image_dir: 图表目录，默认为 output/images
+            reload_interval: 两次检查数据文件是否变化的最小间隔（秒），默认取 config.API_RELOAD_INTERVAL
+        """
+        self.sources = sources or default_sources()
+        self.image_dir = image_dir or 'output/images'
+        self.reload_interval = config.API_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self.index = None
+        self.version = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        # 图表文件 -> (修改时间, 大小, ETag, 内容)
+        self._charts = {}
+        self.refresh(force=True)
+
+    def _current_source(self):
+        for source in self.sources:
+            if os.path.exists(source):
+                stat = os.stat(source)
+                return source, f"{source}:{stat.st_mtime_ns}:{stat.st_size}"
+        return None, None
+
+    def refresh(self, force=False):
+        """数据文件变化时重新加载，返回是否加载了新数据"""
+        now = time.monotonic()
+        if not force and now - self._checked < self.reload_interval:
+            return False
+        # 同一时刻只有一个线程检查和加载，其他请求继续使用旧索引
+        if not self._lock.acquire(blocking=force):
+            return False
+        try:
+            self._checked = now
+            source, version = self._current_source()
+            if version is None or version == self.version:
+                return False
+            start = time.perf_counter()
+            try:
+                index = MovieIndex(source)
+            except Exception as e:
+                logger.error(f"加载数据文件 {source} 出错，继续使用已加载的数据: {e}")
+                return False
+            self.index, self.version = index, version
+            logger.info(f"已加载 {source}: {len(index.movies)}部电影，耗时{time.perf_counter() - start:.2f}秒")
+            return True
+        finally:
+            self._lock.release()
+
+    def chart_names(self):
+        if not os.path.isdir(self.image_dir):
+            return []
+        return sorted(name for name in os.listdir(self.image_dir) if name.endswith('.png'))
+
+    def chart(self, name):
+        """返回 (内容, ETag)，图表不存在时返回None；文件未变化时直接使用内存中的副本"""
+        if name not in self.chart_names():
+            return None
+        path = os.path.join(self.image_dir, name)
+        stat = os.stat(path)
+        cached = self._charts.get(name)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            with open(path, 'rb') as f:
+                data = f.read()
+            cached = (stat.st_mtime_ns, stat.st_size, _etag(data), data)
+            self._charts[name] = cached
+        return cached[3], cached[2]
+
+
+class ApiServer(http.server.ThreadingHTTPServer):
+    """只读HTTP接口服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, store, host=None, port=None):
+        super().__init__((host or config.API_HOST, config.API_PORT if port is None else port), ApiHandler)
+        self.store = store
+
+
+class ApiHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, body, content_type, etag=None, cache_control='no-cache'):
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', cache_control)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False, default=_json_default).encode('utf-8')
+        # 查询结果只取决于数据集和请求本身，ETag由数据集版本和响应内容共同决定；
+        # 还没有加载数据时（如只请求图表列表）版本为空
+        version = self.server.store.version or ''
+        etag = _etag(version.encode('utf-8') + body) if status == 200 else None
+        self._send(status, body, 'application/json; charset=utf-8', etag)
+
+    def _error(self, status, message):
+        self._json({'error': message}, status)
+
+    def do_GET(self):
+        store = self.server.store
+        store.refresh()
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            if parts[:1] == ['charts']:
+                self._charts(store, parts[1:])
+                return
+            index = store.index
+            if index is None:
+                self._error(503, "没有可用的数据文件: " + ", ".join(store.sources))
+                return
+            self._api(index, parts, params)
+        except ValueError as e:
+            self._error(400, f"参数错误: {e}")
+        except Exception as e:
+            logger.error(f"处理请求 {self.path} 出错: {e}")
+            self._error(500, "服务器内部错误")
+
+    do_HEAD = do_GET
+
+    def _api(self, index, parts, params):
+        if not parts:
+            self._json({
+                'source': index.source,
+                'loaded_at': index.loaded_at,
+                'movie_count': len(index.movies),
+                'endpoints': ['/api/movies', '/api/stats', '/api/years', '/api/types',
+                              '/api/countries', '/api/directors', '/charts'],
+            })
+        elif parts == ['api', 'movies']:
+            movies = index.query(
+                year=params.get('year'),
+                type=params.get('type'),
+                country=params.get('country'),
+                director=params.get('director'),
+                min_rating=float(params['min_rating']) if 'min_rating' in params else None,
+            )
+            offset = _non_negative(params, 'offset', 0)
+            limit = _non_negative(params, 'limit', DEFAULT_LIMIT)
+            self._json({'total': len(movies), 'offset': offset, 'movies': movies[offset:offset + limit]})
+        elif parts[:2] == ['api', 'movies'] and len(parts) == 3:
+            row = index.by_rank.get(int(parts[2]))
+            self._json(index.movies[row]) if row is not None else self._error(404, f"没有排名为{parts[2]}的电影")
+        elif parts[:2] == ['api', 'subjects'] and len(parts) == 3:
+            row = index.by_subject.get(parts[2])
+            self._json(index.movies[row]) if row is not None else self._error(404, f"没有条目ID为{parts[2]}的电影")
+        elif parts == ['api', 'stats']:
+            self._json(index.stats)
+        elif len(parts) == 2 and parts[0] == 'api' and parts[1] in index.counts:
+            self._json(index.counts[parts[1]])
+        else:
+            self._error(404, f"未知的接口: {self.path}")
+
+    def _charts(self, store, parts):
+        if not parts:
+            self._json([{'name': name, 'url': f"/charts/{name}"} for name in store.chart_names()])
+            return
+        chart = store.chart(parts[0]) if len(parts) == 1 else None
+        if chart is None:
+            self._error(404, f"图表不存在: {'/'.join(parts)}")
+            return
+        data, etag = chart
+        self._send(200, data, 'image/png', etag, cache_control='public, max-age=60')
+
+    def _method_not_allowed(self):
+        self._error(405, "只读接口，只支持GET")
+
+    do_POST = do_PUT = do_DELETE = do_PATCH = _method_not_allowed
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(host=None, port=None, data=None):
+    """启动只读接口服务，直到 Ctrl+C"""
+    store = DatasetStore([data] if data else None)
+    server = ApiServer(store, host, port)
+    host, port = server.server_address[:2]
+    logger.info(f"只读接口已启动: http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
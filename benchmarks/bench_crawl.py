@@ -0,0 +1,175 @@
+"""
+端到端爬取基准：对本地豆瓣替身服务器运行 crawl()、crawl_concurrent()、save_to_excel 和完整的 main()
+
+用法:
+    python benchmarks/bench_crawl.py [--latency 0.05] [--error-rate 0.02] [--throttle-rate 0.02]
+                                     [--antibot-rate 0.02] [--pages 目录] [--real-sleep] [--skip-main]
+
+服务器见 benchmarks/fake_douban.py。页面间隔、重试退避和节流等待通过爬虫的 sleep 参数
+替换为只记录不等待的函数，因此结果反映的是请求、解析和写文件本身的耗时；
+--real-sleep 时使用真实等待。每个场景输出页数/秒、请求延迟p50/p99、跳过的等待时间
+和 metrics 记录的各阶段耗时。任一场景没有取得全部250部电影时以退出码1结束。
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_douban import FakeDoubanServer, load_pages  # noqa: E402
+from metrics import metrics  # noqa: E402
+
+EXPECTED_MOVIES = 250
+
+
+class SkippedSleep:
+    """注入爬虫的等待函数：只累计请求的等待秒数，立即返回"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __call__(self, seconds):
+        with self.lock:
+            self.calls += 1
+            self.seconds += seconds
+        return False
+
+
+@contextmanager
+def record_latency():
+    """收集期间所有HTTP响应的耗时（含重试），用于计算延迟分位数"""
+    from http_client import HttpSession
+
+    samples = []
+    original = HttpSession._record_response
+
+    def recording(self, response, seconds):
+        samples.append(seconds)
+        original(self, response, seconds)
+
+    HttpSession._record_response = recording
+    try:
+        yield samples
+    finally:
+        HttpSession._record_response = original
+
+
+def percentile(samples, q):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1]
+
+
+def report(name, wall, pages, movies, samples, sleeper, server_stats):
+    print(f"\n=== {name} ===")
+    print(f"用时 {wall:.2f}s，{pages}页，{pages / wall if wall else 0:.1f}页/秒，{movies}部电影")
+    print(f"请求 {len(samples)}次，延迟 p50 {percentile(samples, 50) * 1000:.0f}ms，"
+          f"p99 {percentile(samples, 99) * 1000:.0f}ms")
+    if sleeper is not None:
+        print(f"跳过的等待 {sleeper.calls}次，共{sleeper.seconds:.1f}s")
+    print("服务器响应: " + ", ".join(f"{k}={v}" for k, v in sorted(server_stats.items())))
+    print(metrics.format_stages())
+
+
+def run_scenario(name, server, func, sleeper):
+    """运行一个场景，返回取得的电影数"""
+    metrics.reset()
+    server.stats.clear()
+    with record_latency() as samples:
+        start = time.perf_counter()
+        result = func()
+        wall = time.perf_counter() - start
+    pages = server.stats['ok']
+    report(name, wall, pages, result, samples, sleeper, dict(server.stats))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端爬取基准")
+    parser.add_argument('--pages', help="保存的列表页HTML目录，默认由 output/movies.csv 生成")
+    parser.add_argument('--latency', type=float, default=0.05, help="服务器平均响应延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-status', type=int, default=429, choices=(403, 429))
+    parser.add_argument('--antibot-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=4, help="并发爬取的线程数")
+    parser.add_argument('--real-sleep', action='store_true', help="使用真实等待，而不是只记录等待时间")
+    parser.add_argument('--skip-main', action='store_true', help="不运行完整的 main() 流程（分析和出图）")
+    args = parser.parse_args()
+
+    server = FakeDoubanServer(
+        pages=load_pages(args.pages) if args.pages else None,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        throttle_status=args.throttle_status,
+        antibot_rate=args.antibot_rate,
+        seed=args.seed,
+    ).start()
+
+    # 所有输出（缓存、断点、数据文件、日志）写到临时目录，不影响仓库中的数据
+    workdir = tempfile.mkdtemp(prefix='bench_crawl_')
+    os.chdir(workdir)
+    import run
+    from lists import TOP250, register_list
+
+    logging.getLogger().setLevel(logging.WARNING)
+    register_list(TOP250._replace(url_template=server.url + '/top250?start={start}&filter='))
+
+    def sleeper():
+        return None if args.real_sleep else SkippedSleep()
+
+    results = {}
+    sleep = sleeper()
+    crawler = run.DoubanMovieCrawler(use_cache=False, sleep=sleep)
+    results['crawl'] = run_scenario("crawl() 顺序爬取", server, lambda: len(crawler.crawl()), sleep)
+
+    excel_file = os.path.join(workdir, 'output', 'bench.xlsx')
+    results['save_to_excel'] = run_scenario(
+        "save_to_excel", server, lambda: len(crawler.movies) if crawler.save_to_excel(excel_file) else 0, None)
+
+    sleep = sleeper()
+    concurrent = run.DoubanMovieCrawler(use_cache=False, sleep=sleep)
+    results['crawl_concurrent'] = run_scenario(
+        f"crawl_concurrent() {args.workers}线程", server,
+        lambda: len(concurrent.crawl_concurrent(max_workers=args.workers)), sleep)
+
+    if not args.skip_main:
+        os.chdir(tempfile.mkdtemp(prefix='bench_main_', dir=workdir))
+        sleep = sleeper()
+        finished = {}
+
+        def full_pipeline():
+            # main() 在任一图表失败时也返回False，这里以爬取并保存的电影数为准，图表结果单独输出
+            ok = run.main(sleep=sleep, on_event=lambda e: finished.update(e) if e['type'] == 'crawl_finished' else None)
+            print(f"main() 返回 {ok}")
+            return finished.get('count', 0)
+
+        results['main'] = run_scenario("main() 完整流程", server, full_pipeline, sleep)
+
+    server.stop()
+    failures = [name for name, count in results.items() if count < EXPECTED_MOVIES]
+    print(f"\n输出目录: {workdir}")
+    if failures:
+        print("未取得全部电影的场景: " + ", ".join(failures))
+        return 1
+    print("全部场景完成")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
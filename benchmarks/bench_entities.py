@@ -0,0 +1,91 @@
+"""
+实体索引检查：名称表增长时单次解析的耗时，以及截断/中外文名变体的归并结果
+
+用法:
+    python benchmarks/bench_entities.py [--sizes 1000 10000 50000] [--queries 2000]
+
+为每个规模生成随机的"中文名 外文名"导演名表，分别解析三类变体：
+截断的写法（"某某 Firstname Las..."）、只有中文名、只有外文名。
+输出每次解析的平均耗时，检查变体是否都归并到了原来的实体；
+最大规模的单次耗时超过最小规模的5倍，或有变体未归并时以退出码1结束。
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import EntityIndex  # noqa: E402
+
+CJK_CHARS = "阿艾安奥巴贝本比波布达德迪杜尔法菲弗冈格哈汉赫基吉杰卡凯科克库拉莱兰劳勒雷里利林卢鲁罗马麦曼梅米莫穆纳尼诺帕佩皮普齐乔萨塞森什斯索塔特托瓦威维沃西希谢辛亚伊尤扎泽"
+LATIN = "abcdefghijklmnopqrstuvwxyz"
+
+
+def random_name(rng):
+    cjk = ''.join(rng.choice(CJK_CHARS) for _ in range(rng.randint(2, 4))) + '·' + \
+        ''.join(rng.choice(CJK_CHARS) for _ in range(rng.randint(2, 5)))
+    first = ''.join(rng.choice(LATIN) for _ in range(rng.randint(4, 8))).title()
+    last = ''.join(rng.choice(LATIN) for _ in range(rng.randint(5, 10))).title()
+    return f"{cjk} {first} {last}"
+
+
+def variants(name):
+    cjk, first, last = name.split(' ')
+    return {
+        'truncated': f"{cjk} {first} {last[:3]}...",
+        'cjk_only': cjk,
+        'latin_only': f"{first} {last}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="实体索引检查")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    failures = []
+    per_query = {}
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        names = list(dict.fromkeys(random_name(rng) for _ in range(size)))
+        index = EntityIndex('director')
+        start = time.perf_counter()
+        for name in names:
+            index.resolve(name)
+        build = time.perf_counter() - start
+
+        sample = rng.sample(names, min(args.queries, len(names)))
+        timings = {}
+        wrong = 0
+        for kind in ('truncated', 'cjk_only', 'latin_only'):
+            start = time.perf_counter()
+            for name in sample:
+                if index.resolve(variants(name)[kind]) != name:
+                    wrong += 1
+            timings[kind] = (time.perf_counter() - start) / len(sample)
+        per_query[size] = max(timings.values())
+
+        print(f"{len(names):>7}个名称: 建索引 {build:.2f}s，单次解析 " +
+              "，".join(f"{kind} {seconds * 1e6:.0f}us" for kind, seconds in timings.items()) +
+              f"，未归并 {wrong}/{len(sample) * 3}")
+        if wrong:
+            failures.append(f"{len(names)}个名称时有{wrong}个变体未归并")
+
+    smallest, largest = per_query[min(per_query)], per_query[max(per_query)]
+    if largest > smallest * 5:
+        failures.append(f"单次解析耗时随名称表增长过快: {smallest * 1e6:.0f}us -> {largest * 1e6:.0f}us")
+
+    if failures:
+        print("\n检查未通过:\n  " + "\n  ".join(failures))
+        return 1
+    print("\n全部检查通过")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+自适应节流检查：对超过阈值速率就返回429的本地服务器运行 AimdPacer
+
+用法:
+    python benchmarks/bench_pacing.py [--threshold 4] [--duration 20] [--increase 0.2]
+
+本地服务器是 fake_douban.FakeDoubanServer，rate_limit 设为 threshold，超过时返回429。
+先从较低的初始速率运行一次，检查节流器能否逼近阈值且429比例较低；
+再用保存的状态文件运行第二次，检查是否从上次学到的速率开始。
+任一检查不通过时以退出码1结束。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_douban import FakeDoubanServer  # noqa: E402
+from http_client import HttpSession, RetryPolicy  # noqa: E402
+from throttle import AimdPacer  # noqa: E402
+
+
+def run(url, pacer, duration):
+    """按 pacer 的节奏请求 duration 秒
+
+    Returns:
+        [(相对时间, 状态码), ...]
+    """
+    # 关闭重试：429由节流器处理，这里只观察每次请求的结果
+    session = HttpSession(retry_policy=RetryPolicy(max_retries=0), on_response=pacer.record)
+    results = []
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        pacer.acquire()
+        response = session.get(url)
+        results.append((time.monotonic() - start, response.status_code))
+    session.close()
+    return results
+
+
+def summarize(results, duration):
+    """后半段的成功吞吐量和整体429比例"""
+    half = duration / 2
+    late_ok = sum(1 for t, status in results if t >= half and status == 200)
+    throttled = sum(1 for _, status in results if status == 429)
+    return late_ok / half, throttled / max(1, len(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自适应节流检查")
+    parser.add_argument('--threshold', type=float, default=4.0, help="服务器允许的速率（次/秒）")
+    parser.add_argument('--duration', type=float, default=20.0, help="每次运行的秒数")
+    parser.add_argument('--initial-rate', type=float, default=0.5)
+    parser.add_argument('--increase', type=float, default=0.2, help="每次正常响应增加的速率")
+    args = parser.parse_args()
+
+    server = FakeDoubanServer(rate_limit=args.threshold).start()
+    url = f"{server.url}/top250?start=0&filter="
+    state_file = os.path.join(tempfile.mkdtemp(), 'pacing.json')
+    options = dict(max_rate=args.threshold * 3, increase=args.increase)
+
+    failures = []
+    pacer = AimdPacer(rate=args.initial_rate, state_file=state_file, **options)
+    results = run(url, pacer, args.duration)
+    pacer.save()
+    throughput, throttled = summarize(results, args.duration)
+    print(f"第一次运行: {len(results)}个请求，后半段成功吞吐 {throughput:.2f}次/秒，"
+          f"429比例 {throttled:.1%}，结束时速率 {pacer.rate:.2f}次/秒")
+    if throughput < args.threshold * 0.4:
+        failures.append(f"吞吐量过低: {throughput:.2f} < {args.threshold * 0.4:.2f}")
+    if throttled > 0.2:
+        failures.append(f"429比例过高: {throttled:.1%}")
+
+    resumed = AimdPacer.load(state_file, rate=args.initial_rate, **options)
+    print(f"第二次运行从 {resumed.rate:.2f}次/秒 开始（上次被限流时为 {pacer.ceiling or 0:.2f}次/秒）")
+    if resumed.rate <= args.initial_rate:
+        failures.append("未从保存的状态恢复速率")
+    results = run(url, resumed, args.duration / 2)
+    throughput, throttled = summarize(results, args.duration / 2)
+    print(f"第二次运行: 后半段成功吞吐 {throughput:.2f}次/秒，429比例 {throttled:.1%}")
+
+    server.stop()
+    if failures:
+        print("\n检查未通过:\n  " + "\n  ".join(failures))
+        return 1
+    print("\n全部检查通过")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
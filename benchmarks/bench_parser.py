@@ -0,0 +1,80 @@
+"""
+列表页解析性能对比：lxml快速路径 vs BeautifulSoup回退路径
+
+用法:
+    python benchmarks/bench_parser.py [保存的HTML目录] [--repeat N]
+
+默认读取 config.CACHE_DIR 中缓存的列表页。对每个页面分别统计
+两条路径的平均解析耗时和 tracemalloc 记录的内存分配峰值。
+注意lxml的文档树由libxml2在C层分配，不计入tracemalloc。
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from movie_parser import parse_listing_fast, parse_listing_soup  # noqa: E402
+
+PARSERS = [("lxml", parse_listing_fast), ("soup", parse_listing_soup)]
+
+
+def load_pages(directory):
+    """读取目录下的所有HTML页面"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def measure(parser, html, repeat):
+    """返回 (平均耗时秒数, 分配峰值字节数, 解析出的电影数)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        movies = parser(html, 1)
+    elapsed = (time.perf_counter() - start) / repeat
+    
+    tracemalloc.start()
+    parser(html, 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(movies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表页解析性能对比")
+    parser.add_argument('directory', nargs='?', default=config.CACHE_DIR, help="保存的列表页HTML目录")
+    parser.add_argument('--repeat', type=int, default=20, help="每个页面的重复解析次数")
+    args = parser.parse_args()
+    
+    pages = load_pages(args.directory)
+    if not pages:
+        print(f"目录中没有HTML页面: {args.directory}")
+        return 1
+    
+    totals = {name: [0.0, 0] for name, _ in PARSERS}
+    print(f"{'页面':<48}{'解析器':<8}{'耗时(ms)':>10}{'分配峰值(KB)':>14}{'电影数':>8}")
+    for filename, html in pages:
+        for name, func in PARSERS:
+            elapsed, peak, count = measure(func, html, args.repeat)
+            totals[name][0] += elapsed
+            totals[name][1] = max(totals[name][1], peak)
+            print(f"{filename:<48}{name:<8}{elapsed * 1000:>10.2f}{peak / 1024:>14.1f}{count:>8}")
+    
+    print()
+    for name, (elapsed, peak) in totals.items():
+        print(f"{name:<8} 平均每页 {elapsed / len(pages) * 1000:.2f} ms，最大分配峰值 {peak / 1024:.1f} KB")
+    lxml_time, soup_time = totals['lxml'][0], totals['soup'][0]
+    if lxml_time > 0:
+        print(f"加速比: {soup_time / lxml_time:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
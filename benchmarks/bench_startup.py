@@ -0,0 +1,87 @@
+"""
+冷启动耗时检查
+
+用法:
+    python benchmarks/bench_startup.py [--repeat N] [--max-ms 毫秒] [--top N]
+
+对每个入口分别启动新的解释器，用 python -X importtime 统计导入耗时，
+输出累计导入时间和最慢的几个模块，便于发现有人在顶层重新引入了重型依赖。
+指定 --max-ms 时，任一入口超过阈值即以非零状态退出。
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (名称, 执行的代码)
+TARGETS = [
+    ("import run", "import run"),
+    ("run crawl路径", "import run, movie_parser, http_client, http_cache"),
+    ("run analyze路径", "import run, analyzer"),
+]
+
+# 这些模块不应在 import run 时被加载
+HEAVY_MODULES = ("pandas", "matplotlib", "seaborn", "wordcloud", "jieba", "bs4", "tqdm", "requests", "lxml")
+
+
+def import_times(code):
+    """在新进程中执行代码，返回 [(模块名, 自身耗时us, 累计耗时us, 是否为顶层导入), ...]"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # 嵌套导入的模块名带有额外缩进
+        top_level = not name[1:].startswith(' ')
+        entries.append((name.strip(), int(self_us), int(cumulative_us), top_level))
+    return entries
+
+
+def loaded_heavy_modules(code):
+    """返回执行代码后已加载的重型模块"""
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    output = result.stdout.strip().splitlines()
+    return [m for m in output[-1].split(',') if m] if output else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动耗时检查")
+    parser.add_argument('--repeat', type=int, default=5, help="每个入口的测量次数，取最小值")
+    parser.add_argument('--max-ms', type=float, help="累计导入时间上限（毫秒）")
+    parser.add_argument('--top', type=int, default=8, help="列出最慢的模块数")
+    args = parser.parse_args()
+    
+    failed = False
+    for name, code in TARGETS:
+        runs = [import_times(code) for _ in range(args.repeat)]
+        totals = [sum(entry[2] for entry in entries if entry[3]) for entries in runs]
+        best = min(range(len(runs)), key=lambda i: totals[i])
+        total_ms = totals[best] / 1000
+        
+        print(f"\n[{name}] 累计导入耗时 {total_ms:.1f} ms（{args.repeat}次取最小）")
+        for mod, self_us, cumulative_us, _ in sorted(runs[best], key=lambda e: e[1], reverse=True)[:args.top]:
+            print(f"  {mod:<40}自身 {self_us / 1000:>7.1f} ms  累计 {cumulative_us / 1000:>7.1f} ms")
+        
+        if args.max_ms is not None and total_ms > args.max_ms:
+            print(f"  超过上限 {args.max_ms} ms")
+            failed = True
+    
+    heavy = loaded_heavy_modules("import run")
+    if heavy:
+        print(f"\nimport run 时加载了重型模块: {', '.join(heavy)}")
+        failed = True
+    else:
+        print("\nimport run 未加载任何重型模块")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
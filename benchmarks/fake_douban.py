@@ -0,0 +1,297 @@
+"""
+本地豆瓣替身服务器：提供Top250列表页，可配置延迟、错误率、403/429限流和反爬空页面
+
+用法:
+    python benchmarks/fake_douban.py [--port 8000] [--pages 目录] [--latency 0.1] [--error-rate 0.05] ...
+
+列表页来源:
+    --pages 指定目录时，按文件名顺序把目录下的 *.html 作为第1、2、3...页原样返回（例如保存下来的真实页面）；
+    否则由仓库中记录的 output/movies.csv 按豆瓣列表页的结构生成，缺失的评分、人数、国家等字段按排名补全，
+    保证爬虫的解析质量检查能够通过。
+
+在代码中使用:
+    server = FakeDoubanServer(latency=0.05, throttle_rate=0.1)
+    server.start()
+    url_template = server.url + '/top250?start={start}&filter='
+    ...
+    server.stop()
+"""
+
+import argparse
+import csv
+import glob
+import html
+import http.server
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDED_CSV = os.path.join(ROOT, 'output', 'movies.csv')
+PAGE_SIZE = 25
+
+COUNTRIES = ['美国', '中国大陆 中国香港', '日本', '英国 美国', '法国', '中国香港', '韩国', '意大利']
+
+ITEM_TEMPLATE = """
+<li>
+<div class="item">
+  <div class="pic"><em class="">{rank}</em><a href="https://movie.douban.com/subject/{subject_id}/"><img width="100" alt="{title}" src="https://img.example/{subject_id}.jpg"></a></div>
+  <div class="info">
+    <div class="hd">
+      <a href="https://movie.douban.com/subject/{subject_id}/" class="">
+        <span class="title">{title}</span>
+        <span class="other">&nbsp;/&nbsp;{title}</span>
+      </a>
+      <span class="playable">[可播放]</span>
+    </div>
+    <div class="bd">
+      <p class="">
+        导演: {director}&nbsp;&nbsp;&nbsp;主演: ...<br>
+        {year}&nbsp;/&nbsp;{country}&nbsp;/&nbsp;{type}
+      </p>
+      <div class="star">
+        <span class="rating5-t"></span>
+        <span class="rating_num" property="v:average">{rating}</span>
+        <span property="v:best" content="10.0"></span>
+        <span>{rating_count}人评价</span>
+      </div>
+      {quote}
+    </div>
+  </div>
+</div>
+</li>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8"><title>豆瓣电影 Top 250</title></head>
+<body><div id="content"><h1>豆瓣电影 Top 250</h1>
+<div class="grid-16-8 clearfix"><div class="article">
+<ol class="grid_view">{items}
+</ol>
+</div></div></div></body></html>"""
+
+# 豆瓣检测到异常请求时返回的验证页：状态码200，但没有任何条目
+ANTIBOT_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8"><title>禁止访问</title></head>
+<body><div id="content"><p>检测到有异常请求从你的 IP 发出，请登录使用豆瓣。</p></div></body></html>"""
+
+SITE_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8"><title>豆瓣电影</title></head><body></body></html>"""
+
+
+def _value(row, field, default):
+    value = (row.get(field) or '').strip()
+    return value if value and value not in ('0', '0.0', '未知') else default
+
+
+def render_pages(csv_file=RECORDED_CSV, page_size=PAGE_SIZE):
+    """由记录的电影数据生成列表页HTML
+
+    Returns:
+        [第1页HTML, 第2页HTML, ...]
+    """
+    with open(csv_file, 'r', encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f))
+
+    pages = []
+    for start in range(0, len(rows), page_size):
+        items = []
+        for row in rows[start:start + page_size]:
+            rank = int(row['rank'])
+            quote = _value(row, 'quote', '')
+            items.append(ITEM_TEMPLATE.format(
+                rank=rank,
+                subject_id=_value(row, 'subject_id', str(1290000 + rank)),
+                title=html.escape(row['title']),
+                director=html.escape(_value(row, 'director', '佚名')),
+                year=_value(row, 'year', str(1950 + rank % 70)),
+                country=_value(row, 'country', COUNTRIES[rank % len(COUNTRIES)]),
+                type=_value(row, 'type', '剧情'),
+                rating=_value(row, 'rating', f"{9.7 - rank * 0.006:.1f}"),
+                rating_count=int(float(_value(row, 'rating_count', str(3000000 - rank * 9000)))),
+                quote=f'<p class="quote"><span class="inq">{html.escape(quote)}</span></p>' if quote else '',
+            ))
+        pages.append(PAGE_TEMPLATE.format(items=''.join(items)))
+    return pages
+
+
+def load_pages(directory):
+    """按文件名顺序读取目录下保存的列表页"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+class FakeDoubanServer(http.server.ThreadingHTTPServer):
+    """多线程的本地豆瓣替身服务器
+
+    每个列表页请求依次判定：超过 rate_limit 时返回429；否则按概率返回
+    500（error_rate）、403/429（throttle_rate）或反爬空页面（antibot_rate）；
+    其余情况在 latency±jitter 秒后返回对应的列表页。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pages=None, port=0, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 throttle_status=429, antibot_rate=0.0, rate_limit=None, retry_after=None, seed=None):
+        """
+        Args:
+            pages: 列表页HTML列表，默认由 output/movies.csv 生成
+            port: 监听端口，0表示随机分配
+            latency: 列表页的平均响应延迟（秒）
+            jitter: 延迟的随机波动幅度（秒）
+            error_rate: 返回500的概率
+            throttle_rate: 返回 throttle_status 的概率
+            throttle_status: 限流时的状态码（403或429）
+            antibot_rate: 返回200但没有条目的反爬页面的概率
+            rate_limit: 每秒允许的列表页请求数，超过时返回429，None表示不限制
+            retry_after: 限流响应的 Retry-After 秒数，None表示不带该响应头
+            seed: 随机数种子，便于复现
+        """
+        super().__init__(('127.0.0.1', port), FakeDoubanHandler)
+        self.pages = pages if pages is not None else render_pages()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.throttle_status = throttle_status
+        self.antibot_rate = antibot_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self._tokens = rate_limit or 0
+        self._last = time.monotonic()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self):
+        """在后台线程中开始服务"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _admit(self):
+        """令牌桶：超过 rate_limit 的请求不被接受"""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._last) * self.rate_limit)
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def decide(self):
+        """决定本次列表页请求的结果: 'ok'、'error'、'throttle'、'antibot' 或 'limited'"""
+        with self.lock:
+            if not self._admit():
+                outcome = 'limited'
+            else:
+                roll = self.random.random()
+                if roll < self.error_rate:
+                    outcome = 'error'
+                elif roll < self.error_rate + self.throttle_rate:
+                    outcome = 'throttle'
+                elif roll < self.error_rate + self.throttle_rate + self.antibot_rate:
+                    outcome = 'antibot'
+                else:
+                    outcome = 'ok'
+            self.stats[outcome] += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        return outcome, delay
+
+
+class FakeDoubanHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, body, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        if url.path != '/top250':
+            # 首页、正在热映等模拟人类行为时访问的页面
+            self._send(200, SITE_PAGE)
+            return
+
+        outcome, delay = server.decide()
+        time.sleep(delay)
+        if outcome in ('limited', 'throttle'):
+            status = 429 if outcome == 'limited' else server.throttle_status
+            headers = {'Retry-After': str(server.retry_after)} if server.retry_after is not None else None
+            self._send(status, '<html><body>请求过于频繁</body></html>', headers)
+        elif outcome == 'error':
+            self._send(500, '<html><body>服务器错误</body></html>')
+        elif outcome == 'antibot':
+            self._send(200, ANTIBOT_PAGE)
+        else:
+            start = int(parse_qs(url.query).get('start', ['0'])[0] or 0)
+            page = start // PAGE_SIZE
+            body = server.pages[page] if 0 <= page < len(server.pages) else PAGE_TEMPLATE.format(items='')
+            self._send(200, body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地豆瓣替身服务器")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--pages', help="保存的列表页HTML目录，默认由 output/movies.csv 生成")
+    parser.add_argument('--latency', type=float, default=0.1, help="平均响应延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.05, help="延迟波动幅度（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回500的概率")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="返回403/429的概率")
+    parser.add_argument('--throttle-status', type=int, default=429, choices=(403, 429))
+    parser.add_argument('--antibot-rate', type=float, default=0.0, help="返回反爬空页面的概率")
+    parser.add_argument('--rate-limit', type=float, help="每秒允许的请求数，超过时返回429")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = FakeDoubanServer(
+        pages=load_pages(args.pages) if args.pages else None,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        throttle_status=args.throttle_status,
+        antibot_rate=args.antibot_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+    )
+    print(f"列表页地址: {server.url}/top250?start=0&filter=  （{len(server.pages)}页，Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
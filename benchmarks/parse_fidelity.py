@@ -0,0 +1,115 @@
+"""
+列表页解析准确性检查
+
+用法:
+    python benchmarks/parse_fidelity.py [保存的HTML目录] [--expected 期望结果CSV] [--min-rate 0.9]
+
+读取保存的Top250列表页（默认 tests/fixtures/top250，按文件名排序依次作为第1~10页），用lxml和BeautifulSoup两条路径分别解析，检查:
+- 两条路径输出一致
+- 共解析出250部电影，排名为1~250且不重复
+- 各字段有效值比例不低于 --min-rate
+- title/director/year/country/type/rating/rating_count 与期望结果逐字段一致
+  （--expected 默认取HTML目录下的 expected.csv，不存在时跳过）
+并输出各字段有效值比例和解析耗时。任一检查失败时以非零状态退出。
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from bench_parser import load_pages  # noqa: E402
+from movie_parser import field_fill_rates, parse_listing_fast, parse_listing_soup  # noqa: E402
+
+EXPECTED_TOTAL = 250
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures', 'top250')
+COMPARED_FIELDS = ("title", "director", "year", "country", "type", "rating", "rating_count")
+
+
+def parse_all(pages, parser):
+    """按文件顺序解析所有页面，返回 (电影列表, 总耗时秒数)"""
+    movies = []
+    start = time.perf_counter()
+    for index, (_, html) in enumerate(pages):
+        movies.extend(parser(html, index + 1))
+    return movies, time.perf_counter() - start
+
+
+def load_expected(path):
+    """读取期望结果CSV，按排名索引"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return {int(row['rank']): row for row in csv.DictReader(f)}
+
+
+def compare_fields(movies, expected):
+    """逐字段对比，返回不一致项的描述列表"""
+    mismatches = []
+    for movie in movies:
+        row = expected.get(movie.rank)
+        if row is None:
+            mismatches.append(f"排名{movie.rank}不在期望结果中")
+            continue
+        for field in COMPARED_FIELDS:
+            value = getattr(movie, field)
+            value = '' if value is None else str(value)
+            if field in row and value != row[field]:
+                mismatches.append(f"排名{movie.rank} {field}: 解析得到'{value}'，期望'{row[field]}'")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表页解析准确性检查")
+    parser.add_argument('directory', nargs='?', default=FIXTURE_DIR, help="保存的列表页HTML目录")
+    parser.add_argument('--expected', help="期望结果CSV（与 output/movies.csv 格式相同）")
+    parser.add_argument('--min-rate', type=float, default=config.MIN_FIELD_FILL_RATE, help="字段最低有效值比例")
+    args = parser.parse_args()
+    if args.expected is None and os.path.exists(os.path.join(args.directory, 'expected.csv')):
+        args.expected = os.path.join(args.directory, 'expected.csv')
+    
+    pages = load_pages(args.directory)
+    if not pages:
+        print(f"目录中没有HTML页面: {args.directory}")
+        return 1
+    
+    failures = []
+    fast_movies, fast_time = parse_all(pages, parse_listing_fast)
+    soup_movies, soup_time = parse_all(pages, parse_listing_soup)
+    print(f"解析 {len(pages)} 个页面: lxml {fast_time * 1000:.1f} ms, soup {soup_time * 1000:.1f} ms")
+    
+    if fast_movies != soup_movies:
+        failures.append("lxml与BeautifulSoup两条路径的解析结果不一致")
+    
+    ranks = sorted(movie.rank for movie in fast_movies)
+    if len(fast_movies) != EXPECTED_TOTAL:
+        failures.append(f"共解析出{len(fast_movies)}部电影，期望{EXPECTED_TOTAL}部")
+    if ranks != list(range(1, len(ranks) + 1)):
+        failures.append("排名不连续或有重复")
+    
+    print("\n字段有效值比例:")
+    for field, rate in field_fill_rates(fast_movies).items():
+        flag = "" if rate >= args.min_rate else "  <-- 低于阈值"
+        print(f"  {field:<14}{rate:>8.1%}{flag}")
+        if rate < args.min_rate:
+            failures.append(f"字段'{field}'有效值比例{rate:.1%}低于{args.min_rate:.0%}")
+    
+    if args.expected:
+        mismatches = compare_fields(fast_movies, load_expected(args.expected))
+        failures.extend(mismatches[:20])
+        if len(mismatches) > 20:
+            failures.append(f"... 另有{len(mismatches) - 20}处不一致")
+    
+    if failures:
+        print("\n检查失败:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n全部检查通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""
+图表渲染
+
+每个图表由一个独立的函数绘制，只接收已经聚合好的数据，使用面向对象的
+Figure API 和 Agg 后端，不依赖 pyplot 的全局状态，因此可以在进程池中并行渲染。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 一个渲染任务：func(data, output_file, **params)
+ChartJob = namedtuple('ChartJob', ['name', 'func', 'data', 'output_file', 'params'])
+
+# 图表样式版本，修改绘图代码后加1，使已缓存的图片全部失效
+CHART_STYLE_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+# 在不同系统上查找合适的中文字体
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',  # Linux
+    '/System/Library/Fonts/PingFang.ttc',  # macOS
+    'C:/Windows/Fonts/simhei.ttf',  # Windows
+    'simhei.ttf'  # 当前目录
+]
+
+
+def _new_figure(figsize):
+    """创建绑定Agg画布的Figure"""
+    # matplotlib导入较慢，只在实际渲染时导入
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _save(fig, output_file):
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    fig.savefig(output_file)
+
+
+def plot_year_distribution(year_counts, output_file):
+    """年份分布柱状图"""
+    fig = _new_figure((12, 6))
+    ax = fig.add_subplot()
+    year_counts.plot(kind='bar', color='skyblue', ax=ax)
+    ax.set_title('豆瓣Top250电影年份分布')
+    ax.set_xlabel('年份')
+    ax.set_ylabel('电影数量')
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    _save(fig, output_file)
+
+
+def plot_rating_distribution(ratings, output_file):
+    """评分分布直方图（含KDE曲线）"""
+    import seaborn as sns
+    
+    fig = _new_figure((10, 6))
+    ax = fig.add_subplot()
+    sns.histplot(ratings, bins=20, kde=True, ax=ax)
+    ax.set_title('豆瓣Top250电影评分分布')
+    ax.set_xlabel('评分')
+    ax.set_ylabel('电影数量')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    _save(fig, output_file)
+
+
+def plot_country_distribution(country_counts, output_file, top_n):
+    """国家/地区分布饼图"""
+    fig = _new_figure((12, 8))
+    ax = fig.add_subplot()
+    country_counts[:top_n].plot(kind='pie', autopct='%1.1f%%', ax=ax)
+    ax.set_title(f'豆瓣Top250电影国家/地区分布 (Top {top_n})')
+    ax.set_ylabel('')
+    fig.tight_layout()
+    _save(fig, output_file)
+
+
+def plot_type_distribution(type_counts, output_file):
+    """类型分布柱状图"""
+    fig = _new_figure((12, 6))
+    ax = fig.add_subplot()
+    type_counts.plot(kind='bar', color='lightgreen', ax=ax)
+    ax.set_title('豆瓣Top250电影类型分布')
+    ax.set_xlabel('电影类型')
+    ax.set_ylabel('出现次数')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    _save(fig, output_file)
+
+
+def plot_rating_by_year(decade_rating, output_file):
+    """各年代平均评分折线图"""
+    fig = _new_figure((12, 6))
+    ax = fig.add_subplot()
+    decade_rating.plot(marker='o', ax=ax)
+    ax.set_title('豆瓣Top250电影各年代平均评分')
+    ax.set_xlabel('年代')
+    ax.set_ylabel('平均评分')
+    ax.grid(linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    _save(fig, output_file)
+
+
+def plot_director_ranking(top_directors, output_file, top_n):
+    """导演作品数量水平条形图"""
+    fig = _new_figure((10, 8))
+    ax = fig.add_subplot()
+    top_directors.plot(kind='barh', color='orange', ax=ax)
+    ax.set_title(f'豆瓣Top250电影导演作品数量排名 (Top {top_n})')
+    ax.set_xlabel('作品数量')
+    ax.set_ylabel('导演')
+    ax.grid(axis='x', linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    _save(fig, output_file)
+
+
+def find_font():
+    """查找可用的中文字体，找不到时创建空字体文件作为备用"""
+    for path in FONT_PATHS:
+        if os.path.exists(path):
+            return path
+    
+    logger.warning("未找到中文字体文件，词云可能无法正确显示中文")
+    with open('simhei.ttf', 'wb') as f:
+        f.write(b'')
+    return 'simhei.ttf'
+
+
+def plot_wordcloud(frequencies, output_file):
+    """简评词云
+
+    Args:
+        frequencies: {词: 出现次数}
+    """
+    from wordcloud import WordCloud
+    
+    wordcloud = WordCloud(
+        font_path=find_font(),
+        width=800,
+        height=600,
+        background_color='white',
+        max_words=100
+    ).generate_from_frequencies(frequencies)
+    
+    fig = _new_figure((10, 8))
+    ax = fig.add_subplot()
+    ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')
+    _save(fig, output_file)
+
+
+def job_hash(job):
+    """根据绘图函数、输入数据和渲染参数计算图表的内容哈希"""
+    digest = hashlib.sha1()
+    digest.update(f"{CHART_STYLE_VERSION}|{job.func.__module__}.{job.func.__qualname__}".encode('utf-8'))
+    digest.update(json.dumps(job.params, sort_keys=True, default=str).encode('utf-8'))
+    
+    data = job.data
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        digest.update(str(getattr(data, 'name', '')).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    elif isinstance(data, (bytes, bytearray)):
+        digest.update(data)
+    else:
+        digest.update(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ChartManifest:
+    """记录每张图片对应的内容哈希，用于跳过未变化图表的重新渲染"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_file(cls, output_file):
+        """图片所在目录的清单"""
+        return cls(os.path.join(os.path.dirname(output_file), MANIFEST_NAME))
+
+    def is_current(self, job, digest):
+        """图片已存在且哈希一致时返回True"""
+        entry = self.entries.get(job.output_file)
+        return entry is not None and entry.get('hash') == digest and os.path.exists(job.output_file)
+
+    def update(self, job, digest):
+        self.entries[job.output_file] = {'name': job.name, 'hash': digest, 'rendered_at': time.time()}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def render_cached(job):
+    """渲染单个图表，内容未变化且图片已存在时跳过
+
+    Returns:
+        是否实际进行了渲染
+    """
+    manifest = ChartManifest.for_file(job.output_file)
+    digest = job_hash(job)
+    if manifest.is_current(job, digest):
+        logger.info(f"图表{job.name}内容未变化，跳过渲染")
+        return False
+    
+    with metrics.timer('render', chart=job.name):
+        job.func(job.data, job.output_file, **job.params)
+    manifest.update(job, digest)
+    manifest.save()
+    return True
+
+
+def _run_job(job):
+    """执行单个渲染任务，返回 (名称, 是否成功, 耗时秒数, 错误信息)"""
+    start = time.perf_counter()
+    try:
+        job.func(job.data, job.output_file, **job.params)
+        return job.name, True, time.perf_counter() - start, ''
+    except Exception as e:
+        return job.name, False, time.perf_counter() - start, str(e)
+
+
+def render_jobs(jobs, max_workers=None, on_result=None):
+    """在进程池中并行渲染图表，跳过内容未变化的图表
+
+    Args:
+        jobs: ChartJob 列表
+        max_workers: 进程数，默认为CPU核数；为1时在当前进程中依次渲染
+        on_result: 每个图表完成（或被跳过）时的回调，参数为该图表的耗时字典
+
+    Returns:
+        每个任务的 {'name', 'ok', 'skipped', 'seconds', 'error'} 列表，顺序与 jobs 一致
+    """
+    if not jobs:
+        return []
+    
+    # 按图片目录分组读取清单，计算哈希并筛出需要渲染的任务
+    manifests = {}
+    digests = []
+    pending = []
+    for job in jobs:
+        directory = os.path.dirname(job.output_file)
+        if directory not in manifests:
+            manifests[directory] = ChartManifest.for_file(job.output_file)
+        digest = job_hash(job)
+        digests.append(digest)
+        if not manifests[directory].is_current(job, digest):
+            pending.append(job)
+    
+    def timing_of(result, skipped=False):
+        name, ok, seconds, error = result
+        timing = {'name': name, 'ok': ok, 'skipped': skipped, 'seconds': seconds, 'error': error}
+        if skipped:
+            metrics.increment('charts_skipped')
+        else:
+            # 耗时在子进程中测得，在主进程中记录
+            metrics.observe('render', seconds, chart=name)
+        if on_result is not None:
+            on_result(timing)
+        return timing
+    
+    pending_files = {job.output_file for job in pending}
+    results = {
+        job.output_file: timing_of((job.name, True, 0.0, ''), skipped=True)
+        for job in jobs if job.output_file not in pending_files
+    }
+    if max_workers == 1 or len(pending) <= 1:
+        for job in pending:
+            results[job.output_file] = timing_of(_run_job(job))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_run_job, job): job for job in pending}
+            for future in as_completed(futures):
+                results[futures[future].output_file] = timing_of(future.result())
+    
+    timings = []
+    for job, digest in zip(jobs, digests):
+        timing = results[job.output_file]
+        if timing['skipped']:
+            pass
+        elif timing['ok']:
+            manifests[os.path.dirname(job.output_file)].update(job, digest)
+        else:
+            logger.error(f"渲染图表{timing['name']}出错: {timing['error']}")
+        timings.append(timing)
+    
+    for manifest in manifests.values():
+        manifest.save()
+    return timings
+
+
+def format_timings(timings):
+    """把渲染耗时整理为文本表格"""
+    lines = [f"{'图表':<24}{'耗时(s)':>10}  状态"]
+    for item in sorted(timings, key=lambda t: t['seconds'], reverse=True):
+        if item.get('skipped'):
+            status = "未变化，已跳过"
+        else:
+            status = "成功" if item['ok'] else f"失败: {item['error']}"
+        lines.append(f"{item['name']:<24}{item['seconds']:>10.2f}  {status}")
+    return '\n'.join(lines)
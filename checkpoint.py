@@ -0,0 +1,127 @@
+"""
+爬取断点：每页完成后追加写入JSONL，支持中断后恢复
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import config
+from models import Movie
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+# 本次爬取的数据已保存，之后的 --resume 从头开始
+STATUS_FINISHED = "finished"
+
+
+def checkpoint_path(list_name):
+    """榜单的断点文件：Top250使用 config.CHECKPOINT_FILE，其他榜单在同一目录下按名称各用一个文件"""
+    from lists import TOP250
+
+    if list_name == TOP250.name:
+        return config.CHECKPOINT_FILE
+    root, extension = os.path.splitext(config.CHECKPOINT_FILE)
+    return f"{root}_{list_name}{extension}"
+
+
+class CrawlCheckpoint:
+    """追加写入的页面级断点文件
+
+    每行一条记录::
+
+        {"page": 3, "status": "ok", "count": 25, "time": 时间戳, "movies": [...]}
+
+    同一页有多条记录时以最后一条为准。数据保存成功后追加一条 finished 记录，
+    此前的页面记录都不再用于恢复。
+    """
+
+    def __init__(self, path, resume=False):
+        """
+        Args:
+            path: 断点文件路径
+            resume: 是否从已有断点恢复；为False时在 start() 时清空旧断点重新开始
+        """
+        self.path = path
+        self.resume = resume
+        self._lock = threading.Lock()
+        
+        self.completed = self._load() if resume else {}
+        if self.completed:
+            logger.info(f"从断点恢复: 已完成第{sorted(self.completed)}页")
+
+    def _load(self):
+        """读取断点文件，返回 {页码: Movie列表}，忽略损坏的行（例如写入时进程被杀）"""
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"断点文件第{line_no}行已损坏，忽略")
+                    continue
+                if record.get('status') == STATUS_FINISHED:
+                    completed.clear()
+                elif record.get('status') == STATUS_OK:
+                    try:
+                        completed[record['page']] = [Movie.from_dict(m) for m in record.get('movies', [])]
+                    except ValueError as e:
+                        logger.warning(f"断点文件第{line_no}行数据无效，忽略: {e}")
+                        completed.pop(record['page'], None)
+                else:
+                    completed.pop(record.get('page'), None)
+        return completed
+
+    def start(self):
+        """开始一次爬取：不恢复时清空旧断点
+
+        只在真正开始爬取时调用，仅创建爬虫实例不会丢失上次中断留下的断点。
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if not self.resume:
+            with self._lock:
+                open(self.path, 'w', encoding='utf-8').close()
+                self.completed = {}
+
+    def is_completed(self, page):
+        return page in self.completed
+
+    def movies(self, page):
+        """已完成页面的电影数据"""
+        return [movie.replace() for movie in self.completed.get(page, [])]
+
+    def record(self, page, movies):
+        """记录一页的爬取结果，没有电影数据时记为失败"""
+        status = STATUS_OK if movies else STATUS_FAILED
+        with self._lock:
+            self._append({
+                'page': page,
+                'status': status,
+                'count': len(movies),
+                'time': time.time(),
+                'movies': [movie.to_dict() for movie in movies],
+            })
+            if movies:
+                self.completed[page] = movies
+            else:
+                self.completed.pop(page, None)
+
+    def finish(self):
+        """数据已保存：追加 finished 记录，之后的 --resume 不再跳过任何页面"""
+        with self._lock:
+            self._append({'status': STATUS_FINISHED, 'time': time.time()})
+            self.completed = {}
+
+    def _append(self, record):
+        """追加一条记录并落盘，调用方持有锁"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,133 @@
+"""
+爬虫与数据分析的配置项
+"""
+
+# ---------------- 并发爬取 ----------------
+# 同时进行的页面请求数上限，设为1则使用原有的顺序爬取
+CONCURRENCY = 4
+# 令牌桶速率：每秒最多发出的请求数
+RATE_LIMIT = 1.0
+# 令牌桶容量：允许的突发请求数
+RATE_BURST = 2
+
+# ---------------- 自适应节流 ----------------
+# 根据响应状态和延迟自动调整请求速率（AIMD），替代固定的随机等待
+ADAPTIVE_PACING = True
+# 学到的请求速率，跨运行保存
+PACING_STATE_FILE = 'output/pacing.json'
+# 速率上下限（次/秒）
+PACING_MIN_RATE = 0.05
+PACING_MAX_RATE = 2.0
+# 每次正常响应增加的速率（次/秒）
+PACING_INCREASE = 0.05
+# 遇到限流、反爬页面或延迟升高时的速率乘数
+PACING_DECREASE = 0.5
+# 平滑延迟超过基线的倍数时视为拥塞
+PACING_LATENCY_FACTOR = 2.0
+# 同时平滑延迟比基线至少高出该秒数时才视为拥塞，基线只有几十毫秒时正常的波动不会触发降速
+PACING_LATENCY_MIN_DELTA = 0.2
+
+# ---------------- 榜单 ----------------
+# Top250以外、条目结构相同的其他榜单，例如:
+# EXTRA_LISTS = {
+#     'my_doulist': {'url_template': 'https://movie.douban.com/...?start={start}', 'page_size': 25, 'total_pages': 4},
+# }
+EXTRA_LISTS = {}
+# 多榜单爬取的输出目录，每个榜单一个数据文件
+LISTS_DIR = 'output/lists'
+
+# ---------------- HTTP会话与重试 ----------------
+# 每个主机的连接池大小，应不小于 CONCURRENCY
+POOL_SIZE = 10
+# 单次请求超时（秒）
+REQUEST_TIMEOUT = 10
+# 单个请求的最大重试次数
+RETRY_MAX_ATTEMPTS = 3
+# 超时/连接错误的退避基数（秒）
+RETRY_BASE_DELAY = 1.0
+# 403/429 限流的退避基数（秒）
+RETRY_THROTTLE_BASE_DELAY = 5.0
+# 5xx 服务器错误的退避基数（秒）
+RETRY_SERVER_BASE_DELAY = 2.0
+# 单次退避的最长等待（秒）
+RETRY_MAX_DELAY = 30.0
+# 单个请求所有重试的累计等待上限（秒）
+RETRY_MAX_TOTAL = 60.0
+
+# ---------------- 响应缓存 ----------------
+# 列表页缓存目录
+CACHE_DIR = 'output/cache/http'
+# 缓存有效期（秒），过期后发送条件请求重新验证
+CACHE_TTL = 3600
+# 离线模式：只从缓存解析，不发出任何网络请求
+OFFLINE = False
+
+# ---------------- 增量爬取 ----------------
+# 每页内容哈希和解析结果
+INCREMENTAL_STATE_FILE = 'output/crawl_state.json'
+# 与上次相比的榜单变化
+DIFF_FILE = 'output/diff.json'
+
+# ---------------- 解析质量 ----------------
+# 各字段的最低有效值比例，低于该值视为解析规则失效，不保存也不出图
+MIN_FIELD_FILL_RATE = 0.9
+
+# ---------------- 详情页补充 ----------------
+# 详情页缓存目录，按豆瓣条目ID保存
+SUBJECT_CACHE_DIR = 'output/cache/subjects'
+# 详情页并发数上限
+ENRICH_CONCURRENCY = 4
+# 每个主机每秒允许的详情页请求数
+ENRICH_RATE_LIMIT = 0.5
+
+# ---------------- 断点续爬 ----------------
+# 每页完成后追加写入的断点文件
+CHECKPOINT_FILE = 'output/checkpoint.jsonl'
+
+# ---------------- 数据存储 ----------------
+# 主数据文件（Parquet或Feather），分析阶段优先从内存或该文件读取
+DATA_FILE = 'output/movies.parquet'
+# 是否额外导出Excel和CSV
+EXPORT_EXCEL = True
+# 额外导出的JSON Lines文件，设为None则不导出
+JSONL_FILE = 'output/movies.jsonl'
+# 边爬边写：每页完成后立即按页码顺序追加到各输出文件，写入中的文件带 .part 后缀，
+# CSV和JSON Lines可以在爬取过程中用 tail -f 读取；爬取成功后才替换正式文件
+STREAM_EXPORT = True
+# 快照历史数据库，每次爬取结果追加为一个快照
+HISTORY_DB = 'output/history.db'
+# 是否在保存数据后写入快照历史
+RECORD_HISTORY = True
+
+# ---------------- 图表渲染 ----------------
+# 并行渲染图表的进程数，None表示使用CPU核数，1表示在主进程中依次渲染
+CHART_WORKERS = None
+
+# ---------------- 实体归并 ----------------
+# 统计导演和国家/地区时，把同一实体的不同写法（截断、只有中文名或外文名、别称）归并为同一个名称
+RESOLVE_ENTITIES = True
+# 名称索引，跨运行复用
+ENTITY_INDEX_FILE = 'output/cache/entities.json'
+
+# ---------------- 只读HTTP接口 ----------------
+# python run.py serve 的监听地址和端口
+API_HOST = '127.0.0.1'
+API_PORT = 8080
+# 两次检查数据文件是否被新一次爬取替换的最小间隔（秒）
+API_RELOAD_INTERVAL = 2.0
+
+# ---------------- 简评分词 ----------------
+# 按电影缓存的分词结果和词频表
+TOKEN_CACHE_FILE = 'output/cache/quote_tokens.json'
+# jieba词典缓存，跨运行复用
+JIEBA_CACHE_FILE = 'output/cache/jieba.cache'
+# 额外的停用词文件（每行一个词），不存在时只使用内置停用词
+STOPWORDS_FILE = 'stopwords.txt'
+
+# ---------------- 运行指标 ----------------
+# 每次运行的阶段耗时和计数摘要
+METRICS_FILE = 'output/metrics/run_summary.json'
+# Prometheus文本格式的指标文件，可由 node_exporter 的 textfile collector 采集
+PROMETHEUS_FILE = 'output/metrics/douban.prom'
+# --profile 时的cProfile统计文件，同名 .txt 为文本报告
+PROFILE_FILE = 'output/metrics/profile.pstats'
@@ -1,53 +1,156 @@
-import tkinter as tk
-from tkinter import messagebox
-import threading
-
-# 导入你的爬虫主函数
-from run import main as run_crawler
-
-class App:
-    def __init__(self, master):
-        self.master = master
-        master.title("豆瓣Top250爬虫")
-        master.geometry("300x200")
-
-        self.label = tk.Label(master, text="豆瓣Top250电影爬虫", font=(None, 14))
-        self.label.pack(pady=10)
-
-        self.start_btn = tk.Button(master, text="开始爬取", width=20, command=self.start_crawl)
-        self.start_btn.pack(pady=5)
-
-        self.open_btn = tk.Button(master, text="打开结果文件", width=20, command=self.open_file)
-        self.open_btn.pack(pady=5)
-
-        self.status = tk.Label(master, text="状态：等待操作", fg="blue")
-        self.status.pack(pady=10)
-
-    def start_crawl(self):
-        self.start_btn.config(state=tk.DISABLED)
-        self.status.config(text="状态：正在爬取...")
-        threading.Thread(target=self.run_task).start()
-
-    def run_task(self):
-        try:
-            run_crawler()
-            self.status.config(text="状态：爬取完成！")
-            messagebox.showinfo("完成", "豆瓣Top250电影爬取并分析完成！")
-        except Exception as e:
-            messagebox.showerror("错误", f"爬取失败：{e}")
-            self.status.config(text="状态：爬取失败")
-        finally:
-            self.start_btn.config(state=tk.NORMAL)
-
-    def open_file(self):
-        import os
-        filepath = os.path.abspath("output/movies.xlsx")
-        if os.path.exists(filepath):
-            os.startfile(filepath)
-        else:
-            messagebox.showwarning("警告", "结果文件不存在！")
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = App(root)
-    root.mainloop()
+import tkinter as tk
+from tkinter import messagebox, ttk
+import queue
+import threading
+import time
+
+# 导入你的爬虫主函数
+from run import main as run_crawler, write_metrics
+from metrics import metrics
+
+# 轮询事件队列的间隔（毫秒）
+POLL_INTERVAL = 100
+
+
+class App:
+    def __init__(self, master):
+        self.master = master
+        master.title("豆瓣Top250爬虫")
+        master.geometry("320x260")
+
+        # 工作线程只往队列里放事件，所有控件都在主线程中更新
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+        self.started_at = None
+        self.pages_done = 0
+        self.total_pages = 0
+
+        self.label = tk.Label(master, text="豆瓣Top250电影爬虫", font=(None, 14))
+        self.label.pack(pady=10)
+
+        self.start_btn = tk.Button(master, text="开始爬取", width=20, command=self.start_crawl)
+        self.start_btn.pack(pady=5)
+
+        self.cancel_btn = tk.Button(master, text="取消", width=20, command=self.cancel_crawl, state=tk.DISABLED)
+        self.cancel_btn.pack(pady=5)
+
+        self.open_btn = tk.Button(master, text="打开结果文件", width=20, command=self.open_file)
+        self.open_btn.pack(pady=5)
+
+        self.progress = ttk.Progressbar(master, length=260, mode='determinate')
+        self.progress.pack(pady=5)
+
+        self.status = tk.Label(master, text="状态：等待操作", fg="blue")
+        self.status.pack(pady=5)
+
+    def start_crawl(self):
+        self.start_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.status.config(text="状态：正在爬取...")
+        self.progress.config(value=0)
+        self.cancel_event.clear()
+        self.started_at = time.monotonic()
+        self.pages_done = 0
+        self.total_pages = 0
+        self.worker = threading.Thread(target=self.run_task, daemon=True)
+        self.worker.start()
+        self.master.after(POLL_INTERVAL, self.poll_events)
+
+    def cancel_crawl(self):
+        self.cancel_event.set()
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.status.config(text="状态：正在取消...")
+
+    def run_task(self):
+        """在工作线程中运行爬虫，结果和异常都通过队列交给主线程"""
+        metrics.reset()
+        try:
+            ok = run_crawler(on_event=self.events.put, cancel_event=self.cancel_event)
+            self.events.put({'type': 'done', 'ok': ok})
+        except Exception as e:
+            self.events.put({'type': 'error', 'error': str(e)})
+        finally:
+            write_metrics()
+
+    def poll_events(self):
+        """在主线程中处理队列里积压的事件，任务结束前持续轮询"""
+        finished = False
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            finished = self.handle_event(event) or finished
+
+        if finished:
+            self.start_btn.config(state=tk.NORMAL)
+            self.cancel_btn.config(state=tk.DISABLED)
+        else:
+            self.master.after(POLL_INTERVAL, self.poll_events)
+
+    def handle_event(self, event):
+        """根据事件更新界面，任务结束时返回True"""
+        kind = event['type']
+        if kind == 'crawl_started':
+            self.total_pages = event['total_pages']
+            self.progress.config(maximum=self.total_pages)
+        elif kind == 'page_started':
+            self.status.config(text=f"状态：正在爬取第{event['page']}页{self.eta_text()}")
+        elif kind == 'page_parsed':
+            self.pages_done += 1
+            self.progress.config(value=self.pages_done)
+            self.status.config(text=f"状态：第{event['page']}页获取{event['count']}部电影{self.eta_text()}")
+        elif kind == 'retry':
+            self.status.config(text=f"状态：请求失败({event['reason']})，{event['delay']:.0f}秒后重试")
+        elif kind == 'stage':
+            names = {'enrich': "正在抓取详情页", 'save': "正在保存数据", 'charts': "正在生成图表"}
+            self.status.config(text=f"状态：{names.get(event['name'], event['name'])}...")
+        elif kind == 'detail_fetched':
+            self.status.config(text=f"状态：正在抓取详情页 {event['done']}/{event['total']}")
+        elif kind == 'chart_rendered':
+            self.status.config(text=f"状态：图表 {event['name']} 已生成")
+        elif kind == 'done':
+            if self.cancel_event.is_set():
+                self.status.config(text="状态：已取消")
+            elif event['ok']:
+                self.status.config(text="状态：爬取完成！")
+                messagebox.showinfo("完成", "豆瓣Top250电影爬取并分析完成！")
+            else:
+                self.status.config(text="状态：爬取失败")
+                messagebox.showerror("错误", "爬取失败，详情见 douban_crawler.log")
+            return True
+        elif kind == 'error':
+            messagebox.showerror("错误", f"爬取失败：{event['error']}")
+            self.status.config(text="状态：爬取失败")
+            return True
+        return False
+
+    def eta_text(self):
+        """根据已完成页面的平均耗时估算剩余时间"""
+        if not self.pages_done or not self.total_pages:
+            return ""
+        elapsed = time.monotonic() - self.started_at
+        remaining = elapsed / self.pages_done * (self.total_pages - self.pages_done)
+        return f"，预计剩余{remaining:.0f}秒"
+
+    def open_file(self):
+        import os
+        import subprocess
+        import sys
+        filepath = os.path.abspath("output/movies.xlsx")
+        if os.path.exists(filepath):
+            # os.startfile 只在Windows上可用
+            if sys.platform == 'win32':
+                os.startfile(filepath)
+            elif sys.platform == 'darwin':
+                subprocess.Popen(['open', filepath])
+            else:
+                subprocess.Popen(['xdg-open', filepath])
+        else:
+            messagebox.showwarning("警告", "结果文件不存在！")
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = App(root)
+    root.mainloop()
@@ -0,0 +1,202 @@
+"""
+详情页补充爬取：片长、完整演员表、IMDb编号和评分星级分布
+"""
+
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from lxml import html as lxml_html
+from tqdm import tqdm
+
+import config
+from metrics import metrics
+from throttle import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+SUBJECT_URL = "https://movie.douban.com/subject/{subject_id}/"
+
+IMDB_RE = re.compile(r'IMDb:\s*(tt\d+)')
+RUNTIME_RE = re.compile(r'(\d+)')
+
+# 评分星级分布依次为5星到1星
+STAR_FIELDS = ("stars5", "stars4", "stars3", "stars2", "stars1")
+
+
+@metrics.timed('parse', kind='subject')
+def parse_subject(html):
+    """解析电影详情页
+
+    Args:
+        html: 详情页HTML文本
+
+    Returns:
+        详情字典；页面不是正常的详情页（如反爬页面）时返回None
+    """
+    root = lxml_html.fromstring(html)
+    if not root.xpath("//span[@property='v:itemreviewed']"):
+        return None
+    
+    runtime = 0
+    runtime_elements = root.xpath("//span[@property='v:runtime']")
+    if runtime_elements:
+        value = runtime_elements[0].get('content') or runtime_elements[0].text_content()
+        runtime_match = RUNTIME_RE.search(value)
+        if runtime_match:
+            runtime = int(runtime_match.group(1))
+    
+    info = root.xpath("//div[@id='info']")
+    imdb_match = IMDB_RE.search(info[0].text_content()) if info else None
+    
+    details = {
+        "runtime": runtime,
+        "directors": "/".join(a.text_content().strip() for a in root.xpath("//a[@rel='v:directedBy']")),
+        "cast": "/".join(a.text_content().strip() for a in root.xpath("//a[@rel='v:starring']")),
+        "genres": "/".join(s.text_content().strip() for s in root.xpath("//span[@property='v:genre']")),
+        "imdb_id": imdb_match.group(1) if imdb_match else "",
+    }
+    
+    percents = root.xpath("//div[contains(@class, 'ratings-on-weight')]//span[contains(@class, 'rating_per')]")
+    for field, element in zip(STAR_FIELDS, percents):
+        try:
+            details[field] = float(element.text_content().strip().rstrip('%')) / 100
+        except ValueError:
+            details[field] = 0.0
+    
+    return details
+
+
+class DetailEnricher:
+    """并发抓取电影详情页，并按条目ID缓存到磁盘
+
+    详情页一旦抓取成功就写入缓存目录，中断后重新运行时已缓存的条目
+    不再请求网络，从而从中断处继续。
+    """
+
+    def __init__(self, session, cache_dir=None, max_workers=None, rate=None, offline=False,
+                 subject_url=SUBJECT_URL, cancel_event=None, on_event=None, sleep=None):
+        """
+        Args:
+            session: 共享的 HttpSession
+            cache_dir: 详情页缓存目录，默认取 config.SUBJECT_CACHE_DIR
+            max_workers: 并发数上限，默认取 config.ENRICH_CONCURRENCY
+            rate: 每个主机每秒允许的请求数，默认取 config.ENRICH_RATE_LIMIT
+            offline: 离线模式，只使用已缓存的详情页
+            subject_url: 详情页URL模板，包含 {subject_id} 占位符
+            cancel_event: threading.Event，被设置后不再发起新请求，已排队的条目直接跳过
+            on_event: 进度回调，每完成一部电影发送 {'type': 'detail_fetched', 'done', 'total'}
+            sleep: 限速等待函数，见 throttle.TokenBucket
+        """
+        self.session = session
+        self.cache_dir = cache_dir or config.SUBJECT_CACHE_DIR
+        self.max_workers = max_workers or config.ENRICH_CONCURRENCY
+        self.cancel_event = cancel_event or threading.Event()
+        self.on_event = on_event
+        self.limiter = HostRateLimiter(
+            rate or config.ENRICH_RATE_LIMIT, config.RATE_BURST, self.cancel_event, sleep
+        )
+        self.offline = offline
+        self.subject_url = subject_url
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _emit(self, event_type, **data):
+        if self.on_event is not None:
+            try:
+                self.on_event(dict(type=event_type, **data))
+            except Exception as e:
+                logger.error(f"进度回调出错: {e}")
+
+    def _cache_path(self, subject_id):
+        return os.path.join(self.cache_dir, f"{subject_id}.html")
+
+    def _load_cached(self, subject_id):
+        try:
+            with open(self._cache_path(subject_id), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _save_cached(self, subject_id, html):
+        path = self._cache_path(subject_id)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def fetch_details(self, subject_id, headers=None):
+        """获取单部电影的详情，优先使用磁盘缓存
+
+        Returns:
+            详情字典，失败时返回None
+        """
+        html = self._load_cached(subject_id)
+        if html is not None:
+            details = parse_subject(html)
+            if details is not None:
+                return details
+            logger.warning(f"缓存的详情页无法解析，重新抓取: {subject_id}")
+        
+        if self.offline or self.cancel_event.is_set():
+            return None
+        
+        url = self.subject_url.format(subject_id=subject_id)
+        self.limiter.acquire(url)
+        if self.cancel_event.is_set():
+            return None
+        response = self.session.get(url, headers=headers)
+        if response.status_code != 200:
+            logger.error(f"详情页请求失败({response.status_code}): {url}")
+            return None
+        
+        details = parse_subject(response.text)
+        if details is None:
+            logger.error(f"详情页解析失败，可能遇到反爬机制: {url}")
+            return None
+        
+        self._save_cached(subject_id, response.text)
+        return details
+
+    def enrich(self, movies, header_factory=None):
+        """为电影列表补充详情字段（原地写入 Movie.details）
+
+        Args:
+            movies: Movie 列表，没有 subject_id 的电影跳过
+            header_factory: 生成请求头的函数，例如爬虫的 get_random_header
+
+        Returns:
+            成功补充详情的电影数量
+        """
+        targets = [movie for movie in movies if movie.subject_id]
+        cached = sum(1 for movie in targets if os.path.exists(self._cache_path(movie.subject_id)))
+        logger.info(f"开始补充详情: 共{len(targets)}部，其中{cached}部已有缓存")
+        
+        enriched = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self.fetch_details,
+                    movie.subject_id,
+                    header_factory() if header_factory else None,
+                ): movie
+                for movie in targets
+            }
+            for done, future in enumerate(tqdm(as_completed(futures), total=len(futures), desc="详情进度"), 1):
+                movie = futures[future]
+                try:
+                    details = future.result()
+                except Exception as e:
+                    logger.error(f"获取详情出错({movie.subject_id}): {e}")
+                    details = None
+                if details:
+                    movie.details = details
+                    enriched += 1
+                self._emit('detail_fetched', done=done, total=len(futures))
+        
+        if self.cancel_event.is_set():
+            logger.warning(f"详情补充已取消: 已补充{enriched}部")
+            return enriched
+        logger.info(f"详情补充完成: 成功{enriched}部，失败{len(targets) - enriched}部")
+        return enriched
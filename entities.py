@@ -0,0 +1,293 @@
+"""
+导演、国家/地区名称的归一化索引：把同一实体的不同写法映射到同一个规范名称
+
+列表页上的导演名常被截断（"弗兰克·德拉邦特 Frank Dara..."），同一个人也可能只出现中文名
+或只出现外文名。每个名称在加入索引时预先计算几类键:
+
+    alias   规整后的完整写法（去掉截断省略号、多余空白）
+    cjk     中文部分，如"弗兰克·德拉邦特"
+    latin   外文部分的小写词，排序后拼接，如"darabont frank"
+    gram    字符三元组，用于为截断的名称查找以其开头的已知写法
+
+查找时先按 alias/cjk/latin 做字典查找，截断的名称再用三元组倒排表取候选
+（候选必须包含该名称的全部三元组，从最短的倒排表开始求交集），
+因此名称表随快照和榜单增长时，单次解析的开销基本不变。
+
+截断的名称只在恰好有一个实体的完整写法以它开头时才归入该实体；
+找不到或有多个时单独成为一个实体，之后出现的完整写法不会反过来并入它，
+避免"詹姆斯·..."这类有歧义的前缀把不同的人合并在一起。
+
+索引保存为JSON，跨运行复用；文件中只保存实体和别名，各类键在加载时重新计算。
+"""
+
+import json
+import logging
+import os
+import re
+import unicodedata
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# 2: 不再通过截断的前缀合并之后出现的完整写法，旧索引中可能有错误的合并，重新建立
+_INDEX_VERSION = 2
+
+TRUNCATION_RE = re.compile(r'\s*(?:\.{2,}|…+)\s*$')
+# 截断处残留的内容：后面"主演:"的开头（"主..."），或被截断的HTML实体（"&nbsp"、"&n"）
+DANGLING_FIELD_RE = re.compile(r'(?:\s+主(?:演)?[:：]?|\s*&[a-z]*;?)\s*$')
+LATIN_WORD_RE = re.compile(r"[a-zà-ÿ][a-zà-ÿ'\-]*")
+NON_CJK_RE = re.compile(r"[\sA-Za-zÀ-ÿ0-9.'\-]+")
+
+# 国家/地区的常见别称
+COUNTRY_ALIASES = {
+    '香港': '中国香港',
+    '台湾': '中国台湾',
+    '澳门': '中国澳门',
+    '大陆': '中国大陆',
+    '美國': '美国',
+    '英國': '英国',
+}
+
+
+def normalize(name):
+    """规整名称
+
+    被截断的是名称后面的字段（"宫崎骏 Hayao Miyazaki 主..."）时，去掉残留部分后名称本身是完整的。
+
+    Returns:
+        (规整后的名称, 名称本身是否被截断)
+    """
+    name = unicodedata.normalize('NFKC', str(name or ''))
+    name = ' '.join(name.split())
+    truncated = bool(TRUNCATION_RE.search(name))
+    if truncated:
+        name = TRUNCATION_RE.sub('', name)
+        complete = DANGLING_FIELD_RE.sub('', name)
+        truncated = complete == name
+        name = complete
+    return name.strip(' /'), truncated
+
+
+def cjk_key(name):
+    """名称的中文部分，不足两个字时为空"""
+    key = NON_CJK_RE.sub('', name)
+    return key if len(key) >= 2 else ''
+
+
+def latin_key(name):
+    """名称外文部分的小写词，排序后以空格拼接，不足两个词时为空"""
+    words = sorted(LATIN_WORD_RE.findall(name.lower().replace('.', ' ')))
+    return ' '.join(words) if len(words) >= 2 else ''
+
+
+def trigrams(name):
+    """字符三元组集合（忽略空白和大小写）"""
+    text = ''.join(name.lower().split())
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Entity:
+    """一个实体：规范名称和所有见过的写法"""
+
+    __slots__ = ('id', 'name', 'aliases', 'cjk', 'latin')
+
+    def __init__(self, entity_id, name):
+        self.id = entity_id
+        self.name = name
+        self.aliases = set()
+        self.cjk = ''
+        self.latin = ''
+
+    def compatible(self, cjk, latin):
+        """中文部分和外文部分都不冲突时才可能是同一实体"""
+        return (not cjk or not self.cjk or cjk == self.cjk) and (not latin or not self.latin or latin == self.latin)
+
+
+def _preference(name):
+    """选择规范名称的优先级：同时有中外文名的优先，其次更长的"""
+    return (bool(cjk_key(name)) and bool(latin_key(name)), len(name))
+
+
+class EntityIndex:
+    """一类实体（导演或国家/地区）的名称索引"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.entities = []
+        self._aliases = {}
+        self._cjk = {}
+        self._latin = {}
+        self._grams = {}
+        # 截断的写法，只用于查找，不作为其他名称的匹配目标
+        self._truncated = set()
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.entities)
+
+    def _candidates(self, grams):
+        """包含全部 grams 的实体ID集合，从最短的倒排表开始求交集"""
+        postings = sorted((self._grams.get(gram, ()) for gram in grams), key=len)
+        if not postings or not postings[0]:
+            return set()
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def _find(self, name, truncated):
+        """按预先计算的键查找已有实体，找不到时返回None"""
+        entity_id = self._aliases.get(name)
+        if entity_id is not None:
+            return self.entities[entity_id]
+
+        cjk, latin = cjk_key(name), latin_key(name)
+        for key, table in ((cjk, self._cjk), (latin, self._latin)):
+            entity_id = table.get(key) if key else None
+            if entity_id is not None and self.entities[entity_id].compatible(cjk, latin):
+                return self.entities[entity_id]
+
+        if truncated and len(name) >= 3:
+            # 截断的名称：恰好一个实体有以它开头的完整写法时才归入该实体
+            matches = [
+                self.entities[entity_id] for entity_id in self._candidates(trigrams(name))
+                if any(alias.startswith(name) for alias in self.entities[entity_id].aliases
+                       if alias not in self._truncated)
+            ]
+            if len(matches) == 1:
+                return matches[0]
+        return None
+
+    def _add_alias(self, entity, name, truncated):
+        entity.aliases.add(name)
+        self._aliases[name] = entity.id
+        if truncated:
+            self._truncated.add(name)
+        else:
+            cjk, latin = cjk_key(name), latin_key(name)
+            if cjk and entity.compatible(cjk, latin):
+                entity.cjk = entity.cjk or cjk
+                self._cjk.setdefault(cjk, entity.id)
+            if latin and entity.compatible(cjk, latin):
+                entity.latin = entity.latin or latin
+                self._latin.setdefault(latin, entity.id)
+            if entity.name in self._truncated or _preference(name) > _preference(entity.name):
+                entity.name = name
+        for gram in trigrams(name):
+            self._grams.setdefault(gram, set()).add(entity.id)
+        self.dirty = True
+
+    def resolve(self, name):
+        """返回名称对应的规范名称，新名称加入索引
+
+        Args:
+            name: 原始名称
+
+        Returns:
+            规范名称；name 为空时返回空字符串
+        """
+        name, truncated = normalize(name)
+        if not name:
+            return ''
+        entity = self._find(name, truncated)
+        if entity is None:
+            entity = Entity(len(self.entities), name)
+            self.entities.append(entity)
+        if name not in entity.aliases:
+            self._add_alias(entity, name, truncated)
+        return entity.name
+
+    def lookup(self, name):
+        """只查找不登记：返回已知实体的规范名称，未知时返回None"""
+        name, truncated = normalize(name)
+        entity = self._find(name, truncated) if name else None
+        return entity.name if entity is not None else None
+
+    def add_alias(self, canonical, alias):
+        """把 alias 登记为 canonical 的别名"""
+        self.resolve(canonical)
+        entity = self.entities[self._aliases[normalize(canonical)[0]]]
+        alias, truncated = normalize(alias)
+        if alias and alias not in entity.aliases:
+            self._add_alias(entity, alias, truncated)
+
+    def to_list(self):
+        return [{'name': entity.name, 'aliases': sorted(entity.aliases)} for entity in self.entities]
+
+    @classmethod
+    def from_list(cls, kind, records):
+        index = cls(kind)
+        for record in records:
+            entity = Entity(len(index.entities), record['name'])
+            index.entities.append(entity)
+            truncated = set(record.get('truncated', ()))
+            # 先登记完整写法，截断的写法只用于查找
+            for alias in sorted(record['aliases'], key=lambda alias: alias in truncated):
+                index._add_alias(entity, alias, alias in truncated)
+            entity.name = record['name']
+        index.dirty = False
+        return index
+
+
+class EntityResolver:
+    """导演和国家/地区两个索引，持久化到同一个JSON文件"""
+
+    KINDS = ('director', 'country')
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: 索引文件路径，默认取 config.ENTITY_INDEX_FILE
+        """
+        self.path = path or config.ENTITY_INDEX_FILE
+        self.indexes = self._load()
+        for alias, canonical in COUNTRY_ALIASES.items():
+            if alias not in self.indexes['country']._aliases:
+                self.indexes['country'].add_alias(canonical, alias)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == _INDEX_VERSION:
+                return {
+                    kind: EntityIndex.from_list(kind, data.get(kind, [])) for kind in self.KINDS
+                }
+            logger.info("实体索引格式已变化，重新建立")
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return {kind: EntityIndex(kind) for kind in self.KINDS}
+
+    def resolve(self, kind, name):
+        """返回 kind 类实体名称的规范写法"""
+        return self.indexes[kind].resolve(name)
+
+    def lookup(self, kind, name):
+        """只查找不登记，未知名称返回None"""
+        return self.indexes[kind].lookup(name)
+
+    def save(self):
+        """有新名称时写入索引文件"""
+        if not any(index.dirty for index in self.indexes.values()):
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = {'version': _INDEX_VERSION}
+        for kind, index in self.indexes.items():
+            records = index.to_list()
+            for record, entity in zip(records, index.entities):
+                truncated = sorted(alias for alias in entity.aliases if alias in index._truncated)
+                if truncated:
+                    record['truncated'] = truncated
+            data[kind] = records
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        for index in self.indexes.values():
+            index.dirty = False
+        logger.info(f"实体索引已保存到 {self.path}")
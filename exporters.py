@@ -0,0 +1,353 @@
+"""
+流式导出：每页爬取完成后立即把该页的电影追加到输出文件
+
+支持CSV、JSON Lines、Parquet（每批一个row group）、Feather（Arrow IPC，每批一个record batch）
+和Excel（openpyxl只写模式）。导出器只持有当前这一批记录，内存占用不随榜单长度增长。
+
+写入过程中的文件带 .part 后缀，CSV和JSONL每批写完即刷新，可以边爬边用 tail -f 读取；
+commit 时才替换正式文件，中途失败或取消时已有的数据文件保持不变。
+"""
+
+import csv
+import json
+import logging
+import os
+
+from metrics import metrics
+from models import Movie
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = '.part'
+
+# 列类型，与 storage.records_to_frame 生成的DataFrame一致
+INTEGER_FIELDS = {'rank': 'int16', 'year': 'int16', 'rating_count': 'int64'}
+FLOAT_FIELDS = ('rating',)
+CATEGORY_FIELDS = ('country', 'type')
+
+
+def detail_columns(movies):
+    """详情字段及其取值类型，按首次出现的顺序
+
+    Returns:
+        {字段名: 第一个非空值的类型}，没有详情时为空字典
+    """
+    columns = {}
+    for movie in movies:
+        for field, value in (movie.details or {}).items():
+            if columns.get(field) is None and value is not None:
+                columns[field] = type(value)
+            else:
+                columns.setdefault(field, None)
+    return columns
+
+
+def _row(movie, detail_fields):
+    """一行的单元格值，缺失的数值记为0、文本记为空字符串，与DataFrame导出一致"""
+    row = []
+    for field in Movie.FIELDS:
+        value = getattr(movie, field)
+        if field in INTEGER_FIELDS or field in FLOAT_FIELDS:
+            row.append(value or 0)
+        else:
+            row.append(value or '')
+    details = movie.details or {}
+    row.extend(details.get(field) for field in detail_fields)
+    return row
+
+
+class Exporter:
+    """导出器基类
+
+    子类实现 _open、_write 和 _close；write 可以多次调用，每次传入一批 Movie。
+    """
+
+    extension = ''
+
+    def __init__(self, filename, detail_fields=None):
+        """
+        Args:
+            filename: 输出文件名
+            detail_fields: 详情字段 {字段名: 取值类型}（见 detail_columns），没有详情时为None
+        """
+        self.filename = filename
+        self.part_file = filename + PART_SUFFIX
+        self.detail_fields = dict(detail_fields or {})
+        self.columns = list(Movie.FIELDS) + list(self.detail_fields)
+        self.count = 0
+        self._opened = False
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+        self._open()
+        self._opened = True
+
+    def write(self, movies):
+        """追加一批电影"""
+        if not movies:
+            return
+        with metrics.timer('write', format=self.extension):
+            self._write(movies)
+        self.count += len(movies)
+
+    def commit(self):
+        """完成写入并替换正式文件"""
+        self.close()
+        os.replace(self.part_file, self.filename)
+        logger.info(f"数据已保存到 {self.filename}（{self.count}部电影）")
+
+    def abort(self):
+        """放弃本次写入，删除未完成的文件"""
+        try:
+            self.close()
+        except Exception as e:
+            logger.debug(f"关闭{self.part_file}出错: {e}")
+        if os.path.exists(self.part_file):
+            os.remove(self.part_file)
+
+    def close(self):
+        if self._opened:
+            self._opened = False
+            with metrics.timer('write', format=self.extension):
+                self._close()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, movies):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class CsvExporter(Exporter):
+    """CSV，带BOM以便Excel直接打开"""
+
+    extension = 'csv'
+
+    def _open(self):
+        self.file = open(self.part_file, 'w', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+
+    def _write(self, movies):
+        self.writer.writerows(_row(movie, self.detail_fields) for movie in movies)
+        self.file.flush()
+
+    def _close(self):
+        self.file.close()
+
+
+class JsonlExporter(Exporter):
+    """JSON Lines，每行一部电影（Movie.to_dict，缺失值为null）"""
+
+    extension = 'jsonl'
+
+    def _open(self):
+        self.file = open(self.part_file, 'w', encoding='utf-8')
+
+    def _write(self, movies):
+        for movie in movies:
+            self.file.write(json.dumps(movie.to_dict(), ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def _close(self):
+        self.file.close()
+
+
+class ExcelExporter(Exporter):
+    """Excel，openpyxl只写模式逐行写入，不在内存中保留整个工作表"""
+
+    extension = 'xlsx'
+
+    def _open(self):
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Sheet1')
+        self.sheet.append(self.columns)
+
+    def _write(self, movies):
+        for movie in movies:
+            self.sheet.append(_row(movie, self.detail_fields))
+
+    def _close(self):
+        self.workbook.save(self.part_file)
+
+
+class ArrowExporter(Exporter):
+    """Parquet/Feather的公共部分：按固定的列类型把每批记录转换为Arrow表"""
+
+    def _schema(self):
+        import pyarrow as pa
+
+        arrow_types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+        fields = []
+        for field in Movie.FIELDS:
+            if field in INTEGER_FIELDS:
+                fields.append(pa.field(field, getattr(pa, INTEGER_FIELDS[field])()))
+            elif field in FLOAT_FIELDS:
+                fields.append(pa.field(field, pa.float64()))
+            elif field in CATEGORY_FIELDS:
+                fields.append(pa.field(field, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(field, pa.string()))
+        for field, value_type in self.detail_fields.items():
+            fields.append(pa.field(field, arrow_types.get(value_type, pa.string())))
+        return pa.schema(fields)
+
+    def _table(self, movies):
+        import pyarrow as pa
+
+        rows = [_row(movie, self.detail_fields) for movie in movies]
+        arrays = []
+        for index, field in enumerate(self.schema):
+            values = [row[index] for row in rows]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            elif pa.types.is_string(field.type) and field.name in self.detail_fields:
+                arrays.append(pa.array([None if v is None else str(v) for v in values], type=field.type))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+
+class ParquetExporter(ArrowExporter):
+    """Parquet，每批写为一个row group"""
+
+    extension = 'parquet'
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        self.schema = self._schema()
+        self.writer = pq.ParquetWriter(self.part_file, self.schema)
+
+    def _write(self, movies):
+        self.writer.write_table(self._table(movies))
+
+    def _close(self):
+        self.writer.close()
+
+
+class FeatherExporter(ArrowExporter):
+    """Feather（Arrow IPC文件），每批写为一个record batch"""
+
+    extension = 'feather'
+
+    def _open(self):
+        import pyarrow as pa
+
+        self.schema = self._schema()
+        self.sink = pa.OSFile(self.part_file, 'wb')
+        self.writer = pa.ipc.new_file(self.sink, self.schema)
+
+    def _write(self, movies):
+        self.writer.write_table(self._table(movies))
+
+    def _close(self):
+        self.writer.close()
+        self.sink.close()
+
+
+EXPORTERS = {
+    '.csv': CsvExporter,
+    '.jsonl': JsonlExporter,
+    '.xlsx': ExcelExporter,
+    '.parquet': ParquetExporter,
+    '.feather': FeatherExporter,
+}
+
+
+def exporter_for(filename, detail_fields=None):
+    """按扩展名创建导出器，不支持的格式抛出ValueError"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in EXPORTERS:
+        raise ValueError(f"不支持的导出格式: {filename}")
+    return EXPORTERS[extension](filename, detail_fields)
+
+
+class ExportPipeline:
+    """把按页到达的爬取结果按页码顺序写入一组导出器
+
+    并发爬取时页面完成的顺序不固定，先到的后续页面暂存，
+    等前面的页面都到齐后再依次写出，因此输出文件始终按排名排列。
+    某个导出器出错时只放弃该导出器，不影响其他格式。
+    """
+
+    def __init__(self, filenames, detail_fields=None, first_page=1):
+        """
+        Args:
+            filenames: 输出文件名列表，格式由扩展名决定
+            detail_fields: 详情字段 {字段名: 取值类型}，没有详情时为None
+            first_page: 第一页的页码
+        """
+        self.exporters = [exporter_for(filename, detail_fields) for filename in filenames]
+        self.next_page = first_page
+        self.pending = {}
+        self.count = 0
+        self.failed = []
+        for exporter in list(self.exporters):
+            self._call(exporter, 'open')
+
+    def _call(self, exporter, method, *args):
+        try:
+            getattr(exporter, method)(*args)
+            return True
+        except Exception as e:
+            logger.error(f"写入{exporter.filename}出错，放弃该文件: {e}")
+            self.exporters.remove(exporter)
+            self.failed.append(exporter.filename)
+            exporter.abort()
+            return False
+
+    def _write(self, movies):
+        for exporter in list(self.exporters):
+            self._call(exporter, 'write', movies)
+        self.count += len(movies)
+
+    def add_page(self, page, movies):
+        """收到一页结果，写出所有已经连续到达的页面"""
+        self.pending[page] = movies
+        while self.next_page in self.pending:
+            self._write(self.pending.pop(self.next_page))
+            self.next_page += 1
+
+    def write(self, movies, batch_size=25):
+        """不分页的数据按 batch_size 分批写入"""
+        for start in range(0, len(movies), batch_size):
+            self._write(movies[start:start + batch_size])
+
+    def commit(self):
+        """写出剩余的页面（中间有缺页时按页码顺序）并替换正式文件
+
+        Returns:
+            成功保存的文件名列表
+        """
+        for page in sorted(self.pending):
+            self._write(self.pending.pop(page))
+        saved = []
+        for exporter in list(self.exporters):
+            if self._call(exporter, 'commit'):
+                saved.append(exporter.filename)
+        self.exporters = []
+        return saved
+
+    def abort(self):
+        """放弃所有未完成的文件，已有的正式文件不受影响"""
+        for exporter in self.exporters:
+            exporter.abort()
+        self.exporters = []
+        self.pending.clear()
+
+
+def export_movies(movies, filenames, batch_size=25):
+    """把内存中的电影按批写入多个文件
+
+    Returns:
+        成功保存的文件名列表
+    """
+    pipeline = ExportPipeline(filenames, detail_columns(movies))
+    pipeline.write(movies, batch_size)
+    return pipeline.commit()
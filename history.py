@@ -0,0 +1,283 @@
+"""
+快照历史：每次爬取结果作为一个快照追加写入SQLite，支持按电影和时间范围查询
+
+表结构:
+    snapshots     每次爬取一行（id, taken_at, source）
+    movies        按豆瓣条目ID保存的电影基本信息，以最近一次快照为准
+    observations  (subject_id, snapshot_id) 为主键的排名/评分观测值
+"""
+
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import config
+from models import Movie, _text
+
+logger = logging.getLogger(__name__)
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_at TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_taken_at ON snapshots (taken_at);
+
+CREATE TABLE IF NOT EXISTS movies (
+    subject_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    director TEXT,
+    year INTEGER,
+    country TEXT,
+    type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_movies_title ON movies (title);
+
+CREATE TABLE IF NOT EXISTS observations (
+    subject_id TEXT NOT NULL REFERENCES movies (subject_id),
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    rank INTEGER NOT NULL,
+    rating REAL,
+    rating_count INTEGER,
+    PRIMARY KEY (subject_id, snapshot_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_observations_snapshot ON observations (snapshot_id, rank);
+"""
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_time(value):
+    if value is None:
+        return datetime.now().strftime(TIME_FORMAT)
+    if isinstance(value, datetime):
+        return value.strftime(TIME_FORMAT)
+    return str(value)
+
+
+class SnapshotHistory:
+    """基于SQLite的爬取快照历史"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: 数据库文件路径，默认取 config.HISTORY_DB
+        """
+        self.path = path or config.HISTORY_DB
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _resolve_subject(self, movie):
+        """返回电影的条目ID；旧数据没有 subject_id 时按片名匹配已有电影"""
+        subject_id = _text(movie.get('subject_id'))
+        if subject_id:
+            return subject_id
+        title = _text(movie.get('title')) or ''
+        row = self.conn.execute(
+            "SELECT subject_id FROM movies WHERE title = ? ORDER BY subject_id LIMIT 1", (title,)
+        ).fetchone()
+        return row['subject_id'] if row else f"title:{title}"
+
+    def _merge_placeholders(self, movie_rows):
+        """旧数据按片名生成的临时ID在出现真实条目ID后合并过去"""
+        pairs = [(f"title:{title}", subject_id) for subject_id, title, *_ in movie_rows
+                 if not subject_id.startswith('title:')]
+        placeholders = {
+            row['subject_id'] for row in self.conn.execute(
+                "SELECT subject_id FROM movies WHERE subject_id LIKE 'title:%'"
+            )
+        }
+        for placeholder, subject_id in pairs:
+            if placeholder not in placeholders:
+                continue
+            self.conn.execute(
+                "UPDATE OR IGNORE observations SET subject_id = ? WHERE subject_id = ?", (subject_id, placeholder)
+            )
+            self.conn.execute("DELETE FROM observations WHERE subject_id = ?", (placeholder,))
+            self.conn.execute("DELETE FROM movies WHERE subject_id = ?", (placeholder,))
+
+    def add_snapshot(self, movies, taken_at=None, source=''):
+        """追加一次爬取结果
+
+        Args:
+            movies: Movie 列表、电影数据字典列表或DataFrame
+            taken_at: 快照时间（datetime或 'YYYY-MM-DD HH:MM:SS'），默认为当前时间
+            source: 快照来源说明，例如导入的文件名
+
+        Returns:
+            新快照的ID
+        """
+        if hasattr(movies, 'to_dict'):
+            # 缺失值（NaN/NA）统一为None，避免被转换为字符串'nan'
+            movies = movies.astype(object).where(movies.notna(), None).to_dict('records')
+        movies = [movie.to_dict() if isinstance(movie, Movie) else movie for movie in movies]
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (taken_at, source) VALUES (?, ?)",
+                (_format_time(taken_at), source),
+            )
+            snapshot_id = cursor.lastrowid
+
+            movie_rows = []
+            observation_rows = []
+            for movie in movies:
+                subject_id = self._resolve_subject(movie)
+                movie_rows.append((
+                    subject_id,
+                    _text(movie.get('title')) or '',
+                    _text(movie.get('director')) or '',
+                    _to_int(movie.get('year')) or None,
+                    _text(movie.get('country')) or '',
+                    _text(movie.get('type')) or '',
+                ))
+                # 评分为0表示解析失败，记为NULL，避免被当作评分变化
+                observation_rows.append((
+                    subject_id,
+                    snapshot_id,
+                    _to_int(movie.get('rank')),
+                    _to_float(movie.get('rating')) or None,
+                    _to_int(movie.get('rating_count')) or None,
+                ))
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO movies (subject_id, title, director, year, country, type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                movie_rows,
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO observations (subject_id, snapshot_id, rank, rating, rating_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                observation_rows,
+            )
+            self._merge_placeholders(movie_rows)
+
+        logger.info(f"已写入快照{snapshot_id}: {len(observation_rows)}部电影")
+        return snapshot_id
+
+    def import_file(self, filename, taken_at=None):
+        """把历史导出文件（xlsx/csv/parquet/feather）导入为一个快照，默认以文件修改时间为快照时间"""
+        import pandas as pd
+        from storage import load_table, is_columnar
+
+        if is_columnar(filename):
+            df = load_table(filename)
+        elif filename.endswith('.csv'):
+            # 条目ID按文本读取，否则有缺失值时整列变为浮点数（"1292052.0"）
+            df = pd.read_csv(filename, dtype={'subject_id': str})
+        else:
+            df = pd.read_excel(filename, dtype={'subject_id': str})
+
+        if taken_at is None:
+            taken_at = datetime.fromtimestamp(os.path.getmtime(filename))
+        return self.add_snapshot(df, taken_at=taken_at, source=os.path.basename(filename))
+
+    def snapshots(self):
+        """所有快照，按时间排序"""
+        rows = self.conn.execute(
+            "SELECT s.id, s.taken_at, s.source, COUNT(o.subject_id) AS movie_count "
+            "FROM snapshots s LEFT JOIN observations o ON o.snapshot_id = s.id "
+            "GROUP BY s.id ORDER BY s.taken_at, s.id"
+        )
+        return [dict(row) for row in rows]
+
+    def find_subjects(self, title):
+        """按片名（支持部分匹配）查找条目ID"""
+        rows = self.conn.execute(
+            "SELECT subject_id, title, year FROM movies WHERE title = ? "
+            "UNION SELECT subject_id, title, year FROM movies WHERE title LIKE ? LIMIT 20",
+            (title, f"%{title}%"),
+        )
+        return [dict(row) for row in rows]
+
+    def rank_trajectory(self, subject_id, since=None):
+        """某部电影在各快照中的排名和评分
+
+        Args:
+            subject_id: 豆瓣条目ID
+            since: 只返回该时间之后的快照（datetime或字符串）
+
+        Returns:
+            [{'taken_at', 'rank', 'rating', 'rating_count'}, ...]，按时间排序
+        """
+        rows = self.conn.execute(
+            "SELECT s.taken_at, o.rank, o.rating, o.rating_count "
+            "FROM observations o JOIN snapshots s ON s.id = o.snapshot_id "
+            "WHERE o.subject_id = ? AND s.taken_at >= ? ORDER BY s.taken_at, s.id",
+            (subject_id, _format_time(since) if since is not None else ''),
+        )
+        return [dict(row) for row in rows]
+
+    def _snapshot_at(self, since, latest):
+        order = 'DESC' if latest else 'ASC'
+        row = self.conn.execute(
+            f"SELECT id FROM snapshots WHERE taken_at >= ? ORDER BY taken_at {order}, id {order} LIMIT 1",
+            (since,),
+        ).fetchone()
+        return row['id'] if row else None
+
+    def rating_changes(self, min_delta=0.1, days=30, now=None):
+        """最近 days 天内评分变化超过 min_delta 的电影
+
+        比较时间窗口内最早和最新两个快照，两次都在榜上的电影才会出现在结果中。
+
+        Returns:
+            [{'subject_id', 'title', 'old_rating', 'new_rating', 'delta', 'old_rank', 'new_rank'}, ...]，
+            按变化幅度从大到小排序
+        """
+        now = now or datetime.now()
+        since = _format_time(now - timedelta(days=days))
+        first = self._snapshot_at(since, latest=False)
+        last = self._snapshot_at(since, latest=True)
+        if first is None or first == last:
+            return []
+
+        rows = self.conn.execute(
+            "SELECT m.subject_id, m.title, a.rating AS old_rating, b.rating AS new_rating, "
+            "ROUND(b.rating - a.rating, 3) AS delta, a.rank AS old_rank, b.rank AS new_rank "
+            "FROM observations a "
+            "JOIN observations b ON b.subject_id = a.subject_id AND b.snapshot_id = ? "
+            "JOIN movies m ON m.subject_id = a.subject_id "
+            "WHERE a.snapshot_id = ? AND ABS(ROUND(b.rating - a.rating, 3)) > ? "
+            "ORDER BY ABS(b.rating - a.rating) DESC, b.rank",
+            (last, first, min_delta),
+        )
+        return [dict(row) for row in rows]
+
+    def latest(self):
+        """最新快照中的榜单，按排名排序"""
+        rows = self.conn.execute(
+            "SELECT o.rank, m.subject_id, m.title, m.director, m.year, m.country, m.type, "
+            "o.rating, o.rating_count "
+            "FROM observations o JOIN movies m ON m.subject_id = o.subject_id "
+            "WHERE o.snapshot_id = (SELECT id FROM snapshots ORDER BY taken_at DESC, id DESC LIMIT 1) "
+            "ORDER BY o.rank"
+        )
+        return [dict(row) for row in rows]
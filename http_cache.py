@@ -0,0 +1,95 @@
+"""
+HTTP响应的磁盘缓存，支持TTL和条件请求重新验证
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """按URL保存响应正文、ETag/Last-Modified和抓取时间
+
+    每个URL对应缓存目录下的一对文件：<hash>.json 存放元数据，<hash>.html 存放正文。
+    """
+
+    def __init__(self, cache_dir, ttl):
+        """
+        Args:
+            cache_dir: 缓存目录
+            ttl: 缓存有效期（秒），在有效期内直接复用，不发请求
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.html'
+
+    def load(self, url):
+        """读取缓存条目，不存在或已损坏时返回None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'r', encoding='utf-8') as f:
+                entry['body'] = f.read()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        """判断缓存条目是否仍在TTL内"""
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _write_meta(self, url, entry):
+        meta_path, _ = self._paths(url)
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+    def store(self, url, response):
+        """保存一个200响应"""
+        _, body_path = self._paths(url)
+        tmp_path = body_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        os.replace(tmp_path, body_path)
+        
+        self._write_meta(url, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        })
+
+    def touch(self, url, entry):
+        """服务器返回304时刷新抓取时间"""
+        entry['fetched_at'] = time.time()
+        self._write_meta(url, entry)
+
+    def invalidate(self, url):
+        """删除缓存条目，例如缓存到了反爬页面时"""
+        for path in self._paths(url):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
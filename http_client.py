@@ -0,0 +1,240 @@
+"""
+共享HTTP会话层：连接池复用与重试退避策略
+"""
+
+import logging
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """按失败类型区分的指数退避重试策略
+
+    第n次重试的等待时间为 base * factor**(n-1)，不超过 max_delay，
+    并使用"全抖动"（在 [0, delay] 内随机取值）打散并发请求。
+    所有重试的累计等待时间不超过 max_total。
+    """
+
+    THROTTLED = "throttled"  # 403/429，被限流或触发反爬
+    SERVER_ERROR = "server_error"  # 5xx
+    NETWORK_ERROR = "network_error"  # 超时、连接失败
+
+    THROTTLE_STATUSES = frozenset({403, 429})
+
+    def __init__(self, max_retries=None, base_delay=None, throttle_base_delay=None,
+                 server_base_delay=None, factor=2.0, max_delay=None, max_total=None):
+        self.max_retries = config.RETRY_MAX_ATTEMPTS if max_retries is None else max_retries
+        self.base_delays = {
+            self.NETWORK_ERROR: config.RETRY_BASE_DELAY if base_delay is None else base_delay,
+            self.THROTTLED: config.RETRY_THROTTLE_BASE_DELAY if throttle_base_delay is None else throttle_base_delay,
+            self.SERVER_ERROR: config.RETRY_SERVER_BASE_DELAY if server_base_delay is None else server_base_delay,
+        }
+        self.factor = factor
+        self.max_delay = config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.max_total = config.RETRY_MAX_TOTAL if max_total is None else max_total
+
+    def classify(self, status_code):
+        """根据状态码判断失败类型，不需要重试时返回None"""
+        if status_code in self.THROTTLE_STATUSES:
+            return self.THROTTLED
+        if 500 <= status_code < 600:
+            return self.SERVER_ERROR
+        return None
+
+    def compute_delay(self, attempt, kind, retry_after=None):
+        """计算第attempt次重试（从1开始）前的等待秒数"""
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        delay = min(self.max_delay, self.base_delays[kind] * self.factor ** (attempt - 1))
+        return random.uniform(0, delay)
+
+
+def _parse_retry_after(response):
+    """解析Retry-After头（仅支持秒数形式）"""
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class HttpSession:
+    """带连接池和重试策略的HTTP会话
+
+    所有请求复用同一个 requests.Session，使 keep-alive 真正生效，
+    避免每个页面都重新建立TCP/TLS连接。
+    """
+
+    def __init__(self, headers=None, pool_size=None, timeout=None, retry_policy=None,
+                 cache=None, offline=False, cancel_event=None, on_retry=None, on_response=None, sleep=None):
+        """
+        Args:
+            headers: 默认请求头
+            pool_size: 每个主机的连接池大小，默认取 config.POOL_SIZE
+            timeout: 请求超时秒数，默认取 config.REQUEST_TIMEOUT
+            retry_policy: 重试策略，默认使用 RetryPolicy()
+            cache: 响应缓存（ResponseCache），为None时不使用缓存
+            offline: 离线模式，只从缓存读取
+            cancel_event: threading.Event，被设置后立即停止重试等待
+            on_retry: 重试回调 on_retry(url, attempt, reason, delay)
+            on_response: 每次收到响应（含重试）时的回调 on_response(status, seconds)，用于自适应节流
+            sleep: 重试退避的等待函数 sleep(seconds)，返回是否已取消；默认可被 cancel_event 打断
+        """
+        pool_size = pool_size or config.POOL_SIZE
+        self.timeout = timeout or config.REQUEST_TIMEOUT
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self.offline = offline
+        self.cancel_event = cancel_event
+        self.on_retry = on_retry
+        self.on_response = on_response
+        self.sleep = sleep
+        
+        self.session = requests.Session()
+        # 重试由 RetryPolicy 统一处理，关闭urllib3自身的重试
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(self, url, headers=None, **kwargs):
+        """发送GET请求，按重试策略处理限流、服务器错误和网络错误
+
+        Returns:
+            最后一次得到的响应；若始终未能得到响应则抛出最后一次的异常
+        """
+        policy = self.retry_policy
+        kwargs.setdefault('timeout', self.timeout)
+        waited = 0.0
+        attempt = 0
+        
+        while True:
+            try:
+                start = time.perf_counter()
+                response = self.session.get(url, headers=headers, **kwargs)
+                self._record_response(response, time.perf_counter() - start)
+                kind = policy.classify(response.status_code)
+                if kind is None:
+                    return response
+                error = None
+                retry_after = _parse_retry_after(response)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                metrics.increment('http_errors', error=type(e).__name__)
+                response = None
+                error = e
+                kind = RetryPolicy.NETWORK_ERROR
+                retry_after = None
+            
+            attempt += 1
+            if attempt > policy.max_retries:
+                break
+            delay = policy.compute_delay(attempt, kind, retry_after)
+            if waited + delay > policy.max_total:
+                logger.warning(f"累计重试等待将超过{policy.max_total}秒，放弃重试: {url}")
+                break
+            
+            reason = response.status_code if response is not None else error
+            logger.warning(f"请求失败({reason})，{delay:.1f}秒后进行第{attempt}次重试: {url}")
+            if self.on_retry:
+                self.on_retry(url, attempt, str(reason), delay)
+            metrics.increment('http_retries', kind=kind)
+            if self._wait(delay, reason='retry'):
+                logger.info(f"已取消，放弃重试: {url}")
+                break
+            waited += delay
+        
+        if response is None:
+            raise error
+        return response
+
+    def _record_response(self, response, seconds):
+        """记录一次响应的首字节时间、下载时间和字节数
+        
+        requests默认在返回前读完响应体，response.elapsed 是收到响应头为止的耗时，
+        其余部分即为下载响应体的时间。
+        """
+        ttfb = min(response.elapsed.total_seconds(), seconds)
+        metrics.observe('http_ttfb', ttfb)
+        metrics.observe('http_download', seconds - ttfb)
+        metrics.increment('http_responses', status=response.status_code)
+        metrics.increment('http_bytes', len(response.content))
+        if self.on_response is not None:
+            self.on_response(response.status_code, seconds)
+
+    def _wait(self, seconds, reason='retry'):
+        """等待指定秒数，期间被取消时提前返回True"""
+        with metrics.timer('sleep', reason=reason):
+            if self.sleep is not None:
+                return self.sleep(seconds)
+            if self.cancel_event is not None:
+                return self.cancel_event.wait(seconds)
+            time.sleep(seconds)
+        return False
+
+    def fetch_text(self, url, headers=None):
+        """获取页面文本，优先使用缓存
+
+        缓存在TTL内直接返回；过期时带 If-None-Match/If-Modified-Since 重新验证，
+        收到304则复用缓存正文。离线模式下只读缓存。
+
+        Returns:
+            页面文本，失败时返回None
+        """
+        cache = self.cache
+        entry = cache.load(url) if cache else None
+        
+        if entry is not None and (self.offline or cache.is_fresh(entry)):
+            logger.debug(f"使用缓存: {url}")
+            metrics.increment('cache_hits', result='fresh')
+            return entry['body']
+        
+        if self.offline:
+            logger.error(f"离线模式下缓存中没有该页面: {url}")
+            return None
+        
+        headers = dict(headers or {})
+        if entry is not None:
+            headers.update(cache.conditional_headers(entry))
+        
+        response = self.get(url, headers=headers)
+        
+        if response.status_code == 304 and entry is not None:
+            logger.info(f"页面未变化(304)，使用缓存: {url}")
+            cache.touch(url, entry)
+            metrics.increment('cache_hits', result='not_modified')
+            return entry['body']
+        
+        if response.status_code != 200:
+            logger.error(f"请求失败: {response.status_code}")
+            return None
+        
+        if cache:
+            cache.store(url, response)
+        return response.text
+
+    def is_cached(self, url):
+        """判断该URL能否不经网络直接从缓存得到"""
+        if not self.cache:
+            return False
+        entry = self.cache.load(url)
+        return entry is not None and (self.offline or self.cache.is_fresh(entry))
+
+    def invalidate(self, url):
+        """丢弃某个URL的缓存"""
+        if self.cache:
+            self.cache.invalidate(url)
+
+    def close(self):
+        """关闭会话，释放连接池"""
+        self.session.close()
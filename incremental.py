@@ -0,0 +1,151 @@
+"""
+增量爬取：页面内容哈希与排名变化对比
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from models import Movie
+
+logger = logging.getLogger(__name__)
+
+# 只对榜单列表部分取哈希，页面其他部分（广告、登录状态等）每次请求都可能变化
+_GRID_PATTERN = re.compile(r'<ol class="grid_view".*?</ol>', re.S)
+
+
+def page_hash(html):
+    """计算列表页内容哈希"""
+    match = _GRID_PATTERN.search(html)
+    content = match.group(0) if match else html
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def diff_movies(old_movies, new_movies):
+    """对比两次爬取结果
+
+    Args:
+        old_movies: 上次的 Movie 列表
+        new_movies: 本次的 Movie 列表
+
+    Returns:
+        包含 entered / left / rank_moved / rating_changed 的字典
+    """
+    old = {m.subject_id: m for m in old_movies if m.subject_id}
+    new = {m.subject_id: m for m in new_movies if m.subject_id}
+    
+    diff = {'entered': [], 'left': [], 'rank_moved': [], 'rating_changed': []}
+    
+    for sid, movie in new.items():
+        if sid not in old:
+            diff['entered'].append({'subject_id': sid, 'title': movie.title, 'rank': movie.rank})
+            continue
+        
+        previous = old[sid]
+        if previous.rank != movie.rank:
+            diff['rank_moved'].append({
+                'subject_id': sid,
+                'title': movie.title,
+                'old_rank': previous.rank,
+                'new_rank': movie.rank,
+            })
+        if previous.rating != movie.rating:
+            diff['rating_changed'].append({
+                'subject_id': sid,
+                'title': movie.title,
+                'old_rating': previous.rating,
+                'new_rating': movie.rating,
+            })
+    
+    for sid, movie in old.items():
+        if sid not in new:
+            diff['left'].append({'subject_id': sid, 'title': movie.title, 'rank': movie.rank})
+    
+    return diff
+
+
+class IncrementalState:
+    """保存每页的内容哈希和解析结果
+
+    文件结构::
+
+        {
+            "updated_at": 时间戳,
+            "pages": {"1": {"hash": "...", "movies": [...]}, ...}
+        }
+
+    榜单变化由上次和本次的解析结果直接对比得出，不再单独保存每部电影的哈希；
+    旧版状态文件中的 "movies" 字段在加载时忽略，下次保存时去掉。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.load()
+        # 本次运行开始前的完整榜单，用于生成diff
+        self.previous_movies = self.all_movies()
+
+    def load(self):
+        """读取状态文件，不存在时为空状态"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.pages = {
+                int(page): {'hash': entry['hash'], 'movies': [Movie.from_dict(m) for m in entry['movies']]}
+                for page, entry in state.get('pages', {}).items()
+            }
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"增量状态文件读取失败，将全量爬取: {e}")
+            self.pages = {}
+
+    def save(self):
+        """写入状态文件"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        state = {
+            'updated_at': time.time(),
+            'pages': {
+                str(page): {'hash': entry['hash'], 'movies': [m.to_dict() for m in entry['movies']]}
+                for page, entry in sorted(self.pages.items())
+            },
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def cached_movies(self, page, html_hash):
+        """页面哈希未变化时返回上次的解析结果，否则返回None"""
+        entry = self.pages.get(page)
+        if entry and entry['hash'] == html_hash and entry['movies']:
+            return [m.replace() for m in entry['movies']]
+        return None
+
+    def update_page(self, page, html_hash, movies):
+        """记录页面的新哈希和解析结果"""
+        self.pages[page] = {'hash': html_hash, 'movies': movies}
+
+    def page_movies(self, page):
+        """上次成功解析的某页电影数据"""
+        entry = self.pages.get(page)
+        return [m.replace() for m in entry['movies']] if entry else []
+
+    def all_movies(self):
+        """按页码顺序返回状态中的全部电影"""
+        movies = []
+        for page in sorted(self.pages):
+            movies.extend(self.pages[page]['movies'])
+        return movies
+
+
+def write_diff(diff, filename):
+    """把diff写成JSON文件"""
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    payload = dict(diff)
+    payload['generated_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
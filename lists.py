@@ -0,0 +1,278 @@
+"""
+榜单定义与多榜单调度
+
+每个榜单由 ListDefinition 描述（URL模板、每页条目数、页数、解析函数），
+一次爬取中按榜单区分的状态（断点、流式导出）由 ListJob 描述。
+ListScheduler 在同一个线程池和同一组按主机的令牌桶（或自适应节流）下并发爬取多个榜单，
+多个榜单中重复出现的条目只完整解析一次；Top250 的并发爬取是其中只有一个榜单的情形。
+"""
+
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from metrics import metrics
+from throttle import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def parse_standard_listing(html, page, page_size, known=None):
+    """与Top250条目结构相同的列表页解析，lxml只在用到时导入"""
+    from movie_parser import parse_listing
+
+    return parse_listing(html, page, page_size, known)
+
+
+class ListDefinition(namedtuple('ListDefinition', ['name', 'url_template', 'page_size', 'total_pages', 'parser'])):
+    """榜单定义
+
+    Attributes:
+        name: 榜单名称，用于命令行和输出文件名
+        url_template: 列表页URL模板，{start} 替换为该页第一个条目的偏移量
+        page_size: 每页条目数
+        total_pages: 页数
+        parser: 解析函数 parser(html, page, page_size, known)，返回电影数据列表
+    """
+    __slots__ = ()
+
+    def page_url(self, page):
+        """返回指定页码的列表页URL"""
+        return self.url_template.format(start=(page - 1) * self.page_size)
+
+
+TOP250 = ListDefinition(
+    name='top250',
+    url_template='https://movie.douban.com/top250?start={start}&filter=',
+    page_size=25,
+    total_pages=10,
+    parser=parse_standard_listing,
+)
+
+_REGISTRY = {TOP250.name: TOP250}
+
+
+class ListJob(namedtuple('ListJob', ['definition', 'checkpoint', 'export_pipeline', 'parse'],
+                         defaults=(None, None, None))):
+    """一个榜单的一次爬取
+
+    Attributes:
+        definition: ListDefinition
+        checkpoint: checkpoint.CrawlCheckpoint，每页完成后写入；为None时不写断点
+        export_pipeline: exporters.ExportPipeline，每页完成后立即写入；为None时不流式导出
+        parse: 解析函数 parse(html, page)，返回电影数据列表；为None时使用榜单定义的解析函数，
+            并在榜单间共享已解析的条目
+    """
+    __slots__ = ()
+
+
+def register_list(definition):
+    """注册榜单定义，同名时覆盖"""
+    _REGISTRY[definition.name] = definition
+    return definition
+
+
+def _load_configured_lists():
+    """注册 config.EXTRA_LISTS 中配置的榜单，默认使用标准列表页解析"""
+    for name, options in getattr(config, 'EXTRA_LISTS', {}).items():
+        if name not in _REGISTRY:
+            register_list(ListDefinition(
+                name=name,
+                url_template=options['url_template'],
+                page_size=options.get('page_size', 25),
+                total_pages=options.get('total_pages', 1),
+                parser=options.get('parser', parse_standard_listing),
+            ))
+
+
+def get_list(name):
+    """按名称返回榜单定义，未注册时抛出KeyError"""
+    _load_configured_lists()
+    if name not in _REGISTRY:
+        raise KeyError(f"未知的榜单: {name}，可用: {', '.join(sorted(_REGISTRY))}")
+    return _REGISTRY[name]
+
+
+def all_lists():
+    """所有已注册的榜单定义"""
+    _load_configured_lists()
+    return list(_REGISTRY.values())
+
+
+class ListScheduler:
+    """在全局按主机限速下并发爬取多个榜单
+
+    所有榜单的所有页面放进同一个线程池，按页码交错提交，各榜单齐头并进；
+    每个请求先从所属主机的令牌桶取令牌，因此无论同时爬多少个榜单，
+    对同一主机的总请求频率都不超过 rate。指定 pacer 时改由自适应节流控制请求间隔。
+    """
+
+    def __init__(self, session, header_factory=None, rate=None, burst=None, max_workers=None,
+                 cancel_event=None, on_event=None, sleep=None, pacer=None):
+        """
+        Args:
+            session: http_client.HttpSession
+            header_factory: 返回每次请求所用请求头的函数
+            rate: 每个主机每秒允许的请求数，默认取 config.RATE_LIMIT
+            burst: 令牌桶容量，默认取 config.RATE_BURST
+            max_workers: 并发请求数上限，默认取 config.CONCURRENCY
+            cancel_event: threading.Event，被设置后不再发起新请求
+            on_event: 进度事件回调，事件中带有 list 字段表示所属榜单
+            sleep: 限速等待函数，见 throttle.TokenBucket
+            pacer: throttle.AimdPacer，指定时代替令牌桶控制请求间隔，空列表页按限流反馈给它
+        """
+        self.session = session
+        self.header_factory = header_factory or (lambda: None)
+        self.cancel_event = cancel_event or threading.Event()
+        self.limiter = HostRateLimiter(
+            rate or config.RATE_LIMIT, burst or config.RATE_BURST, self.cancel_event, sleep
+        )
+        self.pacer = pacer
+        self.max_workers = max_workers or config.CONCURRENCY
+        self.on_event = on_event
+        # 已解析的条目，按 subject_id 在所有榜单间共享
+        self.known = {}
+        self._lock = threading.Lock()
+
+    def _emit(self, event_type, **data):
+        if self.on_event is not None:
+            try:
+                self.on_event(dict(type=event_type, **data))
+            except Exception as e:
+                logger.error(f"进度回调出错: {e}")
+
+    def _parse(self, job, html, page):
+        if job.parse is not None:
+            return job.parse(html, page)
+        definition = job.definition
+        with metrics.timer('parse', kind='listing'):
+            return definition.parser(html, page, definition.page_size, self.known)
+
+    def _remember(self, movies):
+        """记录已解析的条目，供其他榜单复用"""
+        with self._lock:
+            for movie in movies:
+                if movie.subject_id:
+                    self.known.setdefault(movie.subject_id, movie)
+        return movies
+
+    def fetch_page(self, job, page):
+        """请求并解析榜单的一页（只尝试一次），顺序爬取和并发爬取共用
+
+        Returns:
+            (电影数据列表, 是否命中缓存)
+        """
+        url = job.definition.page_url(page)
+        cached = self.session.is_cached(url)
+        try:
+            # 命中缓存时不发请求，不占用主机配额
+            if not cached:
+                if self.pacer is not None:
+                    self.pacer.acquire()
+                else:
+                    self.limiter.acquire(url)
+            if self.cancel_event.is_set():
+                return [], cached
+            self._emit('page_started', list=job.definition.name, page=page)
+            logger.info(f"爬取页面: {url}")
+            html = self.session.fetch_text(url, headers=self.header_factory())
+            movies = self._parse(job, html, page) if html is not None else []
+        except Exception as e:
+            logger.error(f"爬取{job.definition.name}第{page}页出错: {e}")
+            movies = []
+
+        if movies:
+            self._remember(movies)
+        else:
+            # 不缓存反爬页面或异常页面
+            self.session.invalidate(url)
+            if not cached and self.pacer is not None:
+                self.pacer.record_empty()
+        return movies, cached
+
+    def _crawl_page(self, job, page):
+        """爬取并解析榜单的一页，失败时重试一次"""
+        for attempt in range(2):
+            if self.cancel_event.is_set():
+                return []
+            movies, _ = self.fetch_page(job, page)
+            if movies or self.cancel_event.is_set():
+                return movies
+            if attempt == 0:
+                logger.warning(f"{job.definition.name}第{page}页未获取到任何电影，尝试重试...")
+
+        logger.error(f"{job.definition.name}第{page}页重试后仍未获取到电影，可能遇到反爬机制")
+        return []
+
+    def page_done(self, job, page, movies):
+        """一页完成（包括从断点恢复的页面）：写入流式导出并通知进度"""
+        if job.export_pipeline is not None:
+            job.export_pipeline.add_page(page, movies)
+        self._emit('page_parsed', list=job.definition.name, page=page, count=len(movies))
+
+    def crawl(self, jobs):
+        """并发爬取多个榜单
+
+        带断点的榜单先清空旧断点（不恢复时）或跳过断点中已完成的页面，
+        每页完成后写入断点和流式导出；取消导致的空页不写入断点，恢复时重新爬取。
+
+        Args:
+            jobs: ListJob 或 ListDefinition 列表
+
+        Returns:
+            {榜单名称: 电影数据列表}，每个榜单内按页码顺序排列
+        """
+        from tqdm import tqdm
+
+        jobs = [job if isinstance(job, ListJob) else ListJob(job) for job in jobs]
+        for job in jobs:
+            if job.checkpoint is not None:
+                job.checkpoint.start()
+        pages = {job.definition.name: {} for job in jobs}
+        tasks = []
+        for page in range(1, max(job.definition.total_pages for job in jobs) + 1):
+            for job in jobs:
+                if page > job.definition.total_pages:
+                    continue
+                if job.checkpoint is not None and job.checkpoint.is_completed(page):
+                    pages[job.definition.name][page] = self._remember(job.checkpoint.movies(page))
+                    logger.info(f"{job.definition.name}第{page}页已在断点中完成，跳过")
+                else:
+                    tasks.append((job, page))
+
+        total_pages = sum(job.definition.total_pages for job in jobs)
+        self._emit('crawl_started', total_pages=total_pages, lists=[job.definition.name for job in jobs])
+        for job in jobs:
+            by_page = pages[job.definition.name]
+            for page in sorted(by_page):
+                self.page_done(job, page, by_page[page])
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._crawl_page, *task): task for task in tasks}
+                for future in tqdm(as_completed(futures), total=len(tasks), desc="爬取进度"):
+                    job, page = futures[future]
+                    movies = future.result()
+                    if not movies and self.cancel_event.is_set():
+                        continue
+                    pages[job.definition.name][page] = movies
+                    if job.checkpoint is not None:
+                        job.checkpoint.record(page, movies)
+                    logger.info(f"{job.definition.name}第{page}页爬取完成，获取{len(movies)}部电影")
+                    self.page_done(job, page, movies)
+        except Exception as e:
+            logger.error(f"爬取过程中出现错误: {e}")
+
+        results = {
+            name: [movie for page in sorted(by_page) for movie in by_page[page]]
+            for name, by_page in pages.items()
+        }
+        total = sum(len(movies) for movies in results.values())
+        logger.info(
+            f"{len(jobs)}个榜单爬取完成，共{total}个条目，其中{len(self.known)}部不重复电影，"
+            f"{total - len(self.known)}个重复条目复用了已解析结果"
+        )
+        self._emit('crawl_finished', count=total, cancelled=self.cancel_event.is_set())
+        return results
@@ -0,0 +1,184 @@
+"""
+运行指标：按阶段累计耗时和计数，导出JSON运行摘要和Prometheus文本格式
+
+各模块通过模块级的 metrics 实例记录:
+
+    with metrics.timer('parse'):
+        ...
+    metrics.observe('sleep', seconds, reason='page')
+    metrics.increment('http_bytes', len(content))
+
+阶段名称:
+    http_ttfb      发出请求到收到响应头（新连接时包含DNS解析和建立连接）
+    http_download  读取响应体
+    parse          列表页/详情页解析
+    sleep          主动等待（页面间隔、重试退避）
+    render         图表渲染（子进程内的耗时）
+    analyze        数据预处理和统计
+    write          写数据文件
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_PREFIX = 'douban'
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class Metrics:
+    """线程安全的计时器和计数器集合"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空所有指标，开始新一次运行"""
+        with self._lock:
+            # (阶段, 标签) -> [次数, 累计秒数, 最大秒数]
+            self.timers = {}
+            # (名称, 标签) -> 累计值
+            self.counters = {}
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+
+    def observe(self, stage, seconds, **labels):
+        """记录一次阶段耗时"""
+        key = (stage, _label_key(labels))
+        with self._lock:
+            timer = self.timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def increment(self, name, value=1, **labels):
+        """累加计数器"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """统计 with 代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def timed(self, stage, **labels):
+        """装饰器形式的 timer"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """运行摘要字典，可直接序列化为JSON"""
+        with self._lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+            duration = time.perf_counter() - self._started
+
+        stages = {}
+        for (stage, _), (count, total, _) in timers:
+            stage_total = stages.setdefault(stage, {'count': 0, 'seconds': 0.0})
+            stage_total['count'] += count
+            stage_total['seconds'] += total
+
+        return {
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'wall_seconds': round(duration, 3),
+            'stages': {stage: {'count': v['count'], 'seconds': round(v['seconds'], 3)} for stage, v in stages.items()},
+            'timers': [
+                {'stage': stage, 'labels': dict(labels), 'count': count,
+                 'seconds': round(total, 4), 'max_seconds': round(peak, 4)}
+                for (stage, labels), (count, total, peak) in timers
+            ],
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in counters
+            ],
+        }
+
+    def to_prometheus(self):
+        """Prometheus文本格式（textfile collector可直接读取）"""
+        with self._lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+
+        name = f'{PROMETHEUS_PREFIX}_stage_seconds'
+        lines = [
+            f'# HELP {name} Time spent per crawl stage.',
+            f'# TYPE {name} summary',
+        ]
+        for (stage, labels), (count, total, _) in timers:
+            label_text = _format_labels((('stage', stage),) + labels)
+            lines.append(f'{name}_sum{label_text} {total:.6f}')
+            lines.append(f'{name}_count{label_text} {count}')
+
+        lines.append(f'# TYPE {name}_max gauge')
+        for (stage, labels), (_, _, peak) in timers:
+            lines.append(f'{name}_max{_format_labels((("stage", stage),) + labels)} {peak:.6f}')
+
+        declared = set()
+        for (counter, labels), value in counters:
+            metric = f'{PROMETHEUS_PREFIX}_{counter}_total'
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{_format_labels(labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_file, prometheus_file=None):
+        """写出JSON运行摘要和Prometheus文本文件，失败时只记录日志"""
+        try:
+            os.makedirs(os.path.dirname(json_file) or '.', exist_ok=True)
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+            if prometheus_file:
+                os.makedirs(os.path.dirname(prometheus_file) or '.', exist_ok=True)
+                # 先写临时文件再替换，避免采集端读到写了一半的文件
+                tmp_file = prometheus_file + '.tmp'
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(self.to_prometheus())
+                os.replace(tmp_file, prometheus_file)
+            logger.info(f"运行指标已保存到 {json_file}")
+        except OSError as e:
+            logger.error(f"保存运行指标失败: {e}")
+
+    def format_stages(self):
+        """各阶段耗时的简表"""
+        stages = self.summary()['stages']
+        lines = [f"{'阶段':<14}{'次数':>8}{'耗时(s)':>12}"]
+        for stage, total in sorted(stages.items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{stage:<16}{total['count']:>8}{total['seconds']:>12.2f}")
+        return '\n'.join(lines)
+
+
+# 全局实例，各模块共用
+metrics = Metrics()
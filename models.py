@@ -0,0 +1,119 @@
+"""
+电影记录：带类型的紧凑数据结构
+
+列表页解析直接产出 Movie，字段在构造时完成解析和校验，
+之后的存储、对比和分析不再需要从字符串反复转换。
+缺失的值统一为None（页面上的"未知"、评分0等都视为缺失）。
+"""
+
+import re
+
+# 页面或旧数据中表示"未取到"的取值
+MISSING_TEXTS = frozenset(("", "未知", "None", "nan"))
+
+_INT_RE = re.compile(r'-?\d+')
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in MISSING_TEXTS else value
+
+
+def _int(value):
+    """整数字段：接受整数、浮点数和数字字符串，无法解析或为0时返回None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value or None
+    if isinstance(value, float):
+        return int(value) or None if value == value else None
+    match = _INT_RE.search(str(value).replace(',', ''))
+    return int(match.group(0)) or None if match else None
+
+
+def _float(value):
+    """浮点字段：无法解析或为0时返回None"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value and value != 0 else None
+
+
+class Movie:
+    """一部电影在某个榜单上的记录
+
+    Attributes:
+        rank: 排名
+        subject_id: 豆瓣条目ID
+        title: 标题
+        director: 导演（可能有多个，以'/'分隔）
+        year: 上映年份
+        country: 国家/地区（多个时以空格分隔）
+        type: 类型（多个时以空格分隔）
+        rating: 评分
+        rating_count: 评价人数
+        quote: 一句话简评
+        details: 详情页补充的字段（片长、演员表等），未补充时为None
+    """
+
+    FIELDS = ('rank', 'subject_id', 'title', 'director', 'year', 'country', 'type',
+              'rating', 'rating_count', 'quote')
+    __slots__ = FIELDS + ('details',)
+
+    def __init__(self, rank, subject_id='', title='', director=None, year=None, country=None,
+                 type=None, rating=None, rating_count=None, quote='', details=None):
+        rank = _int(rank)
+        if rank is None or rank < 1:
+            raise ValueError(f"无效的排名: {rank}")
+        title = str(title or '').strip()
+        if not title:
+            raise ValueError("电影标题不能为空")
+
+        self.rank = rank
+        self.subject_id = str(subject_id or '').strip()
+        self.title = title
+        self.director = _text(director)
+        self.year = _int(year)
+        self.country = _text(country)
+        self.type = _text(type)
+        self.rating = _float(rating)
+        self.rating_count = _int(rating_count)
+        self.quote = str(quote or '').strip()
+        self.details = dict(details) if details else None
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典构造，兼容旧版断点/增量状态文件中全部为字符串的记录"""
+        known = {field: data.get(field) for field in cls.FIELDS if field in data}
+        details = data.get('details')
+        if details is None:
+            # 旧数据把详情字段直接合并在电影字典中
+            details = {k: v for k, v in data.items() if k not in cls.FIELDS} or None
+        return cls(details=details, **known)
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典，详情字段保存在 details 下"""
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        if self.details:
+            data['details'] = dict(self.details)
+        return data
+
+    def replace(self, **changes):
+        """返回修改了部分字段的副本"""
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data['details'] = self.details
+        data.update(changes)
+        return Movie(**data)
+
+    def __eq__(self, other):
+        if not isinstance(other, Movie):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"Movie(rank={self.rank}, subject_id={self.subject_id!r}, title={self.title!r})"
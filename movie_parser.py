@@ -0,0 +1,277 @@
+"""
+豆瓣电影列表页解析（Top250及条目结构相同的榜单）
+
+提供两条解析路径：
+- parse_listing_fast: 基于lxml预编译XPath，一次遍历取出所有字段
+- parse_listing_soup: 原有的BeautifulSoup CSS选择器实现，作为回退
+两者共用同一套字段规整逻辑，输出完全一致。
+"""
+
+import logging
+import re
+
+from lxml import etree, html as lxml_html
+
+from models import Movie
+
+logger = logging.getLogger(__name__)
+
+# 预编译的正则表达式
+# 导演名后面可能紧跟"主演:"，也可能因过长被截断为"..."后直接结束。
+# 整行过长时截断点也可能落在导演名之后：截断为"主..."、截断在"&nbsp;"中间（"&n..."）
+# 或正好截断在空白之后（"   ..."），这些残留都作为导演名的结尾，不计入导演名
+DIRECTOR_RE = re.compile(
+    r'导演:\s*(.*?)(?:\s*主演?\s*[:：.…]|\s*&[a-z]*;?(?:\.{2,}|…)|\s+(?:\.{2,}|…)\s*$|$)'
+)
+YEAR_RE = re.compile(r'(\d{4})')
+RATING_COUNT_RE = re.compile(r'(\d+)人评价')
+SUBJECT_ID_RE = re.compile(r'/subject/(\d+)')
+
+PAGE_SIZE = 25
+
+
+def _has_class(name):
+    """XPath条件：class属性包含指定类名"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 预编译的XPath表达式
+_ITEMS_XPATH = etree.XPath(f"//div[{_has_class('article')}]//ol[{_has_class('grid_view')}]//li")
+_RANK_XPATH = etree.XPath(f".//div[{_has_class('pic')}]//em/text()")
+_LINK_XPATH = etree.XPath(f".//div[{_has_class('hd')}]//a")
+_TITLE_XPATH = etree.XPath(f".//div[{_has_class('hd')}]//a//span[{_has_class('title')}]")
+_INFO_XPATH = etree.XPath(f".//div[{_has_class('bd')}]//p")
+# 评分区域的div不一定带有star类名，因此直接在div.bd下查找
+_RATING_XPATH = etree.XPath(f".//div[{_has_class('bd')}]//span[{_has_class('rating_num')}]")
+_STAR_SPANS_XPATH = etree.XPath(f".//div[{_has_class('bd')}]/div//span")
+_QUOTE_XPATH = etree.XPath(
+    f".//div[{_has_class('bd')}]//p[{_has_class('quote')}]//span[{_has_class('inq')}]"
+)
+
+
+def build_movie(rank, subject_id, title, info_lines, rating, star_texts, quote):
+    """根据提取到的原始文本构造电影数据
+
+    Args:
+        rank: 排名
+        subject_id: 豆瓣条目ID
+        title: 标题
+        info_lines: 详情段落按行拆分后的文本
+        rating: 评分文本，缺失时为None
+        star_texts: 评分区域内各span的文本，用于查找评价人数
+        quote: 一句话简评
+
+    Returns:
+        Movie，未取到的字段为None
+    """
+    director = None
+    year = None
+    country = None
+    movie_type = None
+    
+    # 导演、主演信息通常在第一行
+    if len(info_lines) > 0:
+        director_match = DIRECTOR_RE.search(info_lines[0].strip())
+        if director_match:
+            director = director_match.group(1).strip()
+    
+    # 年份、国家、类型信息通常在第二行，格式为"年份 / 国家 / 类型"，
+    # 个别电影有多个上映年份，如"1961(中国大陆) / 1964 / 1978 / 中国大陆 / 剧情 动画"
+    if len(info_lines) > 1:
+        parts = [part.strip() for part in info_lines[1].split('/')]
+        
+        year_match = YEAR_RE.search(parts[0])
+        if year_match:
+            year = year_match.group(1)
+        
+        if len(parts) > 2 and parts[-2]:
+            country = parts[-2]
+        
+        if len(parts) > 1 and parts[-1]:
+            movie_type = parts[-1]
+    
+    rating_count = None
+    for text in star_texts:
+        count_match = RATING_COUNT_RE.search(text)
+        if count_match:
+            rating_count = count_match.group(1)
+            break
+    
+    return Movie(
+        rank=rank,
+        subject_id=subject_id,
+        title=title,
+        director=director,
+        year=year,
+        country=country,
+        type=movie_type,
+        rating=rating,
+        rating_count=rating_count,
+        quote=quote,
+    )
+
+
+def _text_lines(element):
+    """等价于 BeautifulSoup 的 get_text(strip=True, separator='\\n').split('\\n')"""
+    return [text.strip() for text in element.itertext() if text.strip()]
+
+
+def _reuse_known(known, subject_id, rank):
+    """已在其他榜单中解析过的条目只更新排名，不再重复提取字段"""
+    if known is not None and subject_id and subject_id in known:
+        return known[subject_id].replace(rank=rank)
+    return None
+
+
+def parse_listing_fast(html, page, page_size=PAGE_SIZE, known=None):
+    """使用lxml预编译XPath解析列表页
+
+    Args:
+        html: 页面HTML文本
+        page: 页码，页面上缺少排名序号时用于推算排名
+        page_size: 每页条目数，用于推算排名
+        known: {subject_id: Movie}，其中已有的条目直接复用，只更新排名
+
+    Returns:
+        Movie 列表，未找到电影列表时返回空列表
+    """
+    root = lxml_html.fromstring(html)
+    movies = []
+    for index, item in enumerate(_ITEMS_XPATH(root)):
+        try:
+            subject_id = ""
+            links = _LINK_XPATH(item)
+            if links:
+                id_match = SUBJECT_ID_RE.search(links[0].get('href', ''))
+                if id_match:
+                    subject_id = id_match.group(1)
+            
+            rank = (page - 1) * page_size + index + 1
+            rank_texts = _RANK_XPATH(item)
+            if rank_texts and rank_texts[0].strip().isdigit():
+                rank = int(rank_texts[0].strip())
+            
+            reused = _reuse_known(known, subject_id, rank)
+            if reused is not None:
+                movies.append(reused)
+                continue
+            
+            titles = _TITLE_XPATH(item)
+            if not titles:
+                logger.warning("无法找到电影标题元素，跳过")
+                continue
+            title = titles[0].text_content().strip()
+            
+            info_elements = _INFO_XPATH(item)
+            if not info_elements:
+                logger.warning(f"电影'{title}'无法找到详情信息元素，跳过")
+                continue
+            
+            ratings = _RATING_XPATH(item)
+            quotes = _QUOTE_XPATH(item)
+            
+            movies.append(build_movie(
+                rank,
+                subject_id,
+                title,
+                _text_lines(info_elements[0]),
+                ratings[0].text_content().strip() if ratings else None,
+                [span.text_content() for span in _STAR_SPANS_XPATH(item)],
+                quotes[0].text_content().strip() if quotes else "",
+            ))
+        except Exception as e:
+            logger.error(f"解析电影数据时出错: {e}")
+    return movies
+
+
+def parse_listing_soup(html, page, page_size=PAGE_SIZE, known=None):
+    """使用BeautifulSoup解析列表页（回退路径）
+
+    参数和返回值与 parse_listing_fast 相同。
+    """
+    # BeautifulSoup只在回退时需要，延迟导入以缩短启动时间
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, "lxml")
+    movies = []
+    for index, movie in enumerate(soup.select("div.article ol.grid_view li")):
+        try:
+            subject_id = ""
+            link_element = movie.select_one("div.hd a")
+            if link_element is not None:
+                id_match = SUBJECT_ID_RE.search(link_element.get('href', ''))
+                if id_match:
+                    subject_id = id_match.group(1)
+            
+            rank = (page - 1) * page_size + index + 1
+            rank_element = movie.select_one("div.pic em")
+            if rank_element is not None and rank_element.text.strip().isdigit():
+                rank = int(rank_element.text.strip())
+            
+            reused = _reuse_known(known, subject_id, rank)
+            if reused is not None:
+                movies.append(reused)
+                continue
+            
+            title_element = movie.select_one("div.hd a span.title")
+            if title_element is None:
+                logger.warning("无法找到电影标题元素，跳过")
+                continue
+            title = title_element.text.strip()
+            
+            info_elements = movie.select("div.bd p")
+            if not info_elements:
+                logger.warning(f"电影'{title}'无法找到详情信息元素，跳过")
+                continue
+            
+            rating_element = movie.select_one("div.bd span.rating_num")
+            quote_element = movie.select_one("div.bd p.quote span.inq")
+            
+            movies.append(build_movie(
+                rank,
+                subject_id,
+                title,
+                info_elements[0].get_text(strip=True, separator='\n').split('\n'),
+                rating_element.text.strip() if rating_element else None,
+                [element.text for element in movie.select("div.bd > div span")],
+                quote_element.text.strip() if quote_element else "",
+            ))
+        except Exception as e:
+            logger.error(f"解析电影数据时出错: {e}")
+    return movies
+
+
+# 参与完整率统计的字段，值为None或空字符串时视为未取到
+FILL_CHECK_FIELDS = ("title", "subject_id", "director", "year", "country", "type", "rating", "rating_count")
+
+
+def field_fill_rates(movies):
+    """统计各字段的有效值比例
+
+    Args:
+        movies: Movie 列表
+
+    Returns:
+        {字段名: 0~1之间的比例}，没有数据时全部为0
+    """
+    if not movies:
+        return {field: 0.0 for field in FILL_CHECK_FIELDS}
+    rates = {}
+    for field in FILL_CHECK_FIELDS:
+        filled = sum(1 for movie in movies if getattr(movie, field) not in (None, ""))
+        rates[field] = filled / len(movies)
+    return rates
+
+
+def low_fill_fields(movies, min_rate):
+    """返回有效值比例低于 min_rate 的字段及其比例"""
+    return {field: rate for field, rate in field_fill_rates(movies).items() if rate < min_rate}
+
+
+def parse_listing(html, page, page_size=PAGE_SIZE, known=None):
+    """解析列表页，优先走lxml快速路径，出错时回退到BeautifulSoup"""
+    try:
+        return parse_listing_fast(html, page, page_size, known)
+    except Exception as e:
+        logger.warning(f"lxml快速解析失败，回退到BeautifulSoup: {e}")
+        return parse_listing_soup(html, page, page_size, known)
@@ -1,735 +1,988 @@
-"""
-豆瓣Top250电影爬虫项目
-作者: [赵嘉恒]
-日期: 2025年5月
-"""
-
-import os
-import time
-import random
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
-import jieba
-import logging
-from tqdm import tqdm
-import re
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("douban_crawler.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-class DoubanMovieCrawler:
-    """豆瓣电影Top250爬虫类"""
-    
-    def __init__(self):
-        self.base_url = "https://movie.douban.com/top250"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Connection': 'keep-alive',
-            'Referer': 'https://movie.douban.com/'
-        }
-        self.movies = []
-        
-    def get_user_agents(self):
-        """返回一个User-Agent列表"""
-        user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 11.5; rv:90.0) Gecko/20100101 Firefox/90.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 11_5_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Safari/605.1.15'
-        ]
-        return user_agents
-    
-    def get_random_header(self):
-        """获取随机的请求头"""
-        user_agents = self.get_user_agents()
-        headers = self.headers.copy()
-        headers['User-Agent'] = random.choice(user_agents)
-        return headers
-        
-    def crawl_page(self, page):
-        """爬取指定页面的电影数据
-        
-        Args:
-            page: 页码
-            
-        Returns:
-            成功爬取的电影数量
-        """
-        try:
-            url = f"{self.base_url}?start={(page-1)*25}&filter="
-            logger.info(f"爬取页面: {url}")
-            
-            headers = self.get_random_header()
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
-                logger.error(f"请求失败: {response.status_code}")
-                return 0
-            
-            # 随机延迟，防止被封IP
-            time.sleep(random.uniform(1, 3))
-            
-            soup = BeautifulSoup(response.text, "lxml")
-            movie_list = soup.select("div.article ol.grid_view li")
-            
-            if not movie_list:
-                logger.error("未找到电影列表，可能是页面结构变化或遇到反爬机制")
-                # 保存当前页面以便调试
-                with open(f"error_page_{page}.html", "w", encoding="utf-8") as f:
-                    f.write(response.text)
-                return 0
-            
-            movies_found = 0
-            for movie in movie_list:
-                try:
-                    # 更加健壮的电影信息提取
-                    # 电影标题 - 使用更加健壮的选择器
-                    title_element = movie.select_one("div.hd a span.title")
-                    if title_element is None:
-                        logger.warning("无法找到电影标题元素，跳过")
-                        continue
-                    
-                    title = title_element.text.strip()
-                    
-                    # 获取其他信息 - 使用更加健壮的方式
-                    info_elements = movie.select("div.bd p")
-                    if not info_elements:
-                        logger.warning(f"电影'{title}'无法找到详情信息元素，跳过")
-                        continue
-                    
-                    info = info_elements[0].get_text(strip=True, separator='\n')
-                    info_lines = info.split('\n')
-                    
-                    # 默认值
-                    director = "未知"
-                    year = "未知"
-                    country = "未知"
-                    movie_type = "未知"
-                    
-                    # 导演、主演信息通常在第一行
-                    if len(info_lines) > 0:
-                        director_actors = info_lines[0].strip()
-                        director_match = re.search(r'导演:([^主演]*)(?:主演:|$)', director_actors)
-                        if director_match:
-                            director = director_match.group(1).strip()
-                    
-                    # 年份、国家、类型信息通常在第二行
-                    if len(info_lines) > 1:
-                        year_country_type = info_lines[1].strip()
-                        
-                        # 提取年份
-                        year_match = re.search(r'(\d{4})', year_country_type)
-                        if year_match:
-                            year = year_match.group(1)
-                        
-                        # 尝试提取国家/地区
-                        country_match = re.search(r'(\d{4})([^/]*)', year_country_type)
-                        if country_match:
-                            country = country_match.group(2).strip()
-                        
-                        # 提取类型
-                        type_parts = year_country_type.split('/')
-                        if len(type_parts) > 1:
-                            movie_type = type_parts[-1].strip()
-                    
-                    # 提取评分 - 使用更加健壮的选择器
-                    rating_element = movie.select_one("div.bd div.star span.rating_num")
-                    rating = rating_element.text.strip() if rating_element else "0.0"
-                    
-                    # 提取评价人数 - 使用更加健壮的选择器和正则表达式
-                    rating_count = "0"
-                    rating_count_elements = movie.select("div.bd div.star span")
-                    for element in rating_count_elements:
-                        count_match = re.search(r'(\d+)人评价', element.text)
-                        if count_match:
-                            rating_count = count_match.group(1)
-                            break
-                    
-                    # 提取一句话简评 - 使用更加健壮的选择器
-                    quote = ""
-                    quote_element = movie.select_one("div.bd p.quote span.inq")
-                    if quote_element:
-                        quote = quote_element.text.strip()
-                    
-                    movie_data = {
-                        "rank": len(self.movies) + 1,
-                        "title": title,
-                        "director": director,
-                        "year": year,
-                        "country": country,
-                        "type": movie_type,
-                        "rating": rating,
-                        "rating_count": rating_count,
-                        "quote": quote
-                    }
-                    
-                    self.movies.append(movie_data)
-                    logger.debug(f"成功爬取电影: {title}")
-                    movies_found += 1
-                    
-                except Exception as e:
-                    logger.error(f"解析电影数据时出错: {e}")
-            
-            return movies_found
-            
-        except Exception as e:
-            logger.error(f"爬取页面出错: {e}")
-            return 0
-    
-    def crawl(self):
-        """爬取豆瓣Top250电影"""
-        total_pages = 10  # 豆瓣电影Top250共10页
-        
-        try:
-            for page in tqdm(range(1, total_pages + 1), desc="爬取进度"):
-                count = self.crawl_page(page)
-                logger.info(f"第{page}页爬取完成，获取{count}部电影")
-                
-                if count == 0:
-                    logger.warning(f"第{page}页未获取到任何电影，尝试重试...")
-                    # 增加更长的等待时间并重试
-                    time.sleep(random.uniform(10, 15))
-                    count = self.crawl_page(page)
-                    if count == 0:
-                        logger.error(f"重试后仍未获取到电影，可能遇到反爬机制，暂停一段时间")
-                        time.sleep(random.uniform(30, 60))
-                
-                # 随机暂停一段时间，避免请求过于频繁
-                time.sleep(random.uniform(5, 8))
-                
-            logger.info(f"爬取完成，总共获取{len(self.movies)}部电影")
-            
-            # 如果获取的电影数量太少，可能是遇到了反爬机制
-            if len(self.movies) < 50:  # 预期是250部，如果少于50可能有问题
-                logger.warning(f"获取的电影数量({len(self.movies)})过少，可能遇到了反爬机制")
-            
-            return self.movies
-        
-        except Exception as e:
-            logger.error(f"爬取过程中出现错误: {e}")
-            return self.movies
-
-    def save_to_excel(self, filename="output/movies.xlsx"):
-        """将电影数据保存到Excel文件
-        
-        Args:
-            filename: 保存的文件名
-        """
-        try:
-            # 确保输出目录存在
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-            
-            # 如果没有数据，给出提示
-            if not self.movies:
-                logger.error("没有电影数据可保存")
-                return False
-            
-            # 创建DataFrame
-            df = pd.DataFrame(self.movies)
-            
-            # 保存到Excel
-            df.to_excel(filename, index=False)
-            logger.info(f"数据已保存到 {filename}")
-            
-            # 同时保存为CSV格式，作为备份
-            csv_filename = filename.replace('.xlsx', '.csv')
-            df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-            logger.info(f"数据已备份到 {csv_filename}")
-            
-            return True
-        except Exception as e:
-            logger.error(f"保存数据出错: {e}")
-            return False
-
-    def simulate_human_behavior(self):
-        """模拟人类行为，减少被反爬机制识别的可能性"""
-        # 随机访问一些非目标页面
-        try:
-            random_pages = [
-                "https://movie.douban.com/",
-                "https://movie.douban.com/cinema/nowplaying/",
-                "https://movie.douban.com/explore"
-            ]
-            
-            page = random.choice(random_pages)
-            logger.info(f"模拟人类行为，随机访问: {page}")
-            
-            headers = self.get_random_header()
-            requests.get(page, headers=headers, timeout=10)
-            
-            # 随机等待
-            time.sleep(random.uniform(2, 5))
-            
-        except Exception as e:
-            logger.error(f"模拟人类行为时出错: {e}")
-
-
-class DataAnalyzer:
-    """数据分析类"""
-    
-    def __init__(self, data):
-        """
-        初始化数据分析器
-        
-        Args:
-            data: DataFrame或包含电影数据的文件路径
-        """
-        if isinstance(data, str):
-            # 尝试不同的方式加载数据
-            try:
-                if data.endswith('.xlsx'):
-                    self.df = pd.read_excel(data)
-                elif data.endswith('.csv'):
-                    self.df = pd.read_csv(data)
-                else:
-                    logger.error(f"不支持的文件格式: {data}")
-                    raise ValueError(f"不支持的文件格式: {data}")
-            except Exception as e:
-                logger.error(f"加载数据文件出错: {e}")
-                raise
-        else:
-            self.df = data
-        
-        # 检查数据是否为空
-        if self.df.empty:
-            logger.error("数据为空，无法进行分析")
-            raise ValueError("数据为空，无法进行分析")
-        
-        # 数据预处理
-        self._preprocess()
-    
-    def _preprocess(self):
-        """预处理数据"""
-        try:
-            # 检查必要的列是否存在
-            required_columns = ['rating', 'rating_count', 'year', 'type']
-            for col in required_columns:
-                if col not in self.df.columns:
-                    logger.error(f"缺少必要的列: {col}")
-                    raise ValueError(f"缺少必要的列: {col}")
-            
-            # 处理缺失值
-            self.df['quote'] = self.df['quote'].fillna('')
-            
-            # 转换评分为浮点型
-            self.df['rating'] = pd.to_numeric(self.df['rating'], errors='coerce').fillna(0).astype(float)
-            
-            # 转换评价人数为整型
-            self.df['rating_count'] = pd.to_numeric(self.df['rating_count'], errors='coerce').fillna(0).astype(int)
-            
-            # 转换年份为整型
-            self.df['year'] = pd.to_numeric(self.df['year'], errors='coerce').fillna(0).astype(int)
-            
-            # 处理电影类型
-            self.df['type_list'] = self.df['type'].fillna('').astype(str).str.split('/')
-            
-            # 提取出所有类型
-            all_types = []
-            for types in self.df['type_list']:
-                if isinstance(types, list):
-                    all_types.extend([t.strip() for t in types if t.strip()])
-            
-            self.all_types = all_types
-            
-        except Exception as e:
-            logger.error(f"数据预处理出错: {e}")
-            raise
-    
-    def year_distribution(self, output_file="output/images/year_distribution.png"):
-        """分析电影年份分布"""
-        try:
-            plt.figure(figsize=(12, 6))
-            
-            # 过滤掉无效年份
-            valid_years = self.df[self.df['year'] > 1900]['year']
-            if valid_years.empty:
-                logger.error("没有有效的年份数据")
-                return pd.Series()
-            
-            year_counts = valid_years.value_counts().sort_index()
-            year_counts.plot(kind='bar', color='skyblue')
-            plt.title('豆瓣Top250电影年份分布')
-            plt.xlabel('年份')
-            plt.ylabel('电影数量')
-            plt.xticks(rotation=90)
-            plt.grid(axis='y', linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            
-            # 保存图片
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            plt.savefig(output_file)
-            plt.close()
-            
-            return year_counts
-        except Exception as e:
-            logger.error(f"生成年份分布图出错: {e}")
-            plt.close()
-            return pd.Series()
-    
-    def rating_distribution(self, output_file="output/images/rating_distribution.png"):
-        """分析电影评分分布"""
-        try:
-            plt.figure(figsize=(10, 6))
-            sns.histplot(self.df['rating'], bins=20, kde=True)
-            plt.title('豆瓣Top250电影评分分布')
-            plt.xlabel('评分')
-            plt.ylabel('电影数量')
-            plt.grid(axis='y', linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            
-            # 保存图片
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            plt.savefig(output_file)
-            plt.close()
-            
-            return self.df['rating'].describe()
-        except Exception as e:
-            logger.error(f"生成评分分布图出错: {e}")
-            plt.close()
-            return None
-    
-    def country_distribution(self, top_n=10, output_file="output/images/country_distribution.png"):
-        """分析电影国家/地区分布"""
-        try:
-            # 提取所有国家/地区
-            all_countries = []
-            for country in self.df['country']:
-                if isinstance(country, str) and country != "未知":
-                    countries = [c.strip() for c in country.split('/') if c.strip()]
-                    all_countries.extend(countries)
-            
-            if not all_countries:
-                logger.error("没有有效的国家/地区数据")
-                return pd.Series()
-            
-            # 统计各国家/地区电影数量
-            country_counts = pd.Series(all_countries).value_counts()
-            
-            # 检查是否有足够的数据进行绘图
-            if len(country_counts) == 0:
-                logger.error("国家/地区数据统计为空")
-                return pd.Series()
-            
-            # 调整top_n，确保不超过实际数据量
-            top_n = min(top_n, len(country_counts))
-            
-            # 绘制饼图
-            plt.figure(figsize=(12, 8))
-            country_counts[:top_n].plot(kind='pie', autopct='%1.1f%%')
-            plt.title(f'豆瓣Top250电影国家/地区分布 (Top {top_n})')
-            plt.ylabel('')
-            plt.tight_layout()
-            
-            # 保存图片
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            plt.savefig(output_file)
-            plt.close()
-            
-            return country_counts
-        except Exception as e:
-            logger.error(f"生成国家分布图出错: {e}")
-            plt.close()
-            return pd.Series()
-    
-    def type_distribution(self, output_file="output/images/type_distribution.png"):
-        """分析电影类型分布"""
-        try:
-            if not self.all_types:
-                logger.error("没有有效的电影类型数据")
-                return pd.Series()
-            
-            # 统计各类型电影数量
-            type_counts = pd.Series(self.all_types).value_counts()
-            
-            # 绘制条形图
-            plt.figure(figsize=(12, 6))
-            type_counts.plot(kind='bar', color='lightgreen')
-            plt.title('豆瓣Top250电影类型分布')
-            plt.xlabel('电影类型')
-            plt.ylabel('出现次数')
-            plt.xticks(rotation=45)
-            plt.grid(axis='y', linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            
-            # 保存图片
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            plt.savefig(output_file)
-            plt.close()
-            
-            return type_counts
-        except Exception as e:
-            logger.error(f"生成类型分布图出错: {e}")
-            plt.close()
-            return pd.Series()
-    
-    def rating_by_year(self, output_file="output/images/rating_by_year.png"):
-        """分析不同年代电影评分情况"""
-        try:
-            # 过滤无效年份
-            valid_df = self.df[(self.df['year'] > 1900) & (self.df['rating'] > 0)]
-            if valid_df.empty:
-                logger.error("没有有效的年份和评分数据")
-                return pd.Series()
-            
-            # 创建年代标签
-            valid_df['decade'] = (valid_df['year'] // 10) * 10
-            
-            # 计算各年代平均评分
-            decade_rating = valid_df.groupby('decade')['rating'].mean()
-            
-            if decade_rating.empty:
-                logger.error("年代评分统计为空")
-                return pd.Series()
-            
-            # 绘制折线图
-            plt.figure(figsize=(12, 6))
-            decade_rating.plot(marker='o')
-            plt.title('豆瓣Top250电影各年代平均评分')
-            plt.xlabel('年代')
-            plt.ylabel('平均评分')
-            plt.grid(linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            
-            # 保存图片
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            plt.savefig(output_file)
-            plt.close()
-            
-            return decade_rating
-        except Exception as e:
-            logger.error(f"生成年代评分图出错: {e}")
-            plt.close()
-            return pd.Series()
-    
-    def director_ranking(self, top_n=10, output_file="output/images/director_ranking.png"):
-        """分析导演作品数量排名"""
-        try:
-            # 提取所有导演
-            all_directors = []
-            for director in self.df['director']:
-                if isinstance(director, str) and director != "未知":
-                    directors = [d.strip() for d in director.split('/') if d.strip()]
-                    all_directors.extend(directors)
-            
-            if not all_directors:
-                logger.error("没有有效的导演数据")
-                return pd.Series()
-            
-            # 统计各导演作品数量
-            director_counts = pd.Series(all_directors).value_counts()
-            
-            if director_counts.empty:
-                logger.error("导演作品统计为空")
-                return pd.Series()
-            
-            # 获取前N名导演
-            top_n = min(top_n, len(director_counts))
-            top_directors = director_counts[:top_n]
-            
-            # 绘制水平条形图
-            plt.figure(figsize=(10, 8))
-            top_directors.plot(kind='barh', color='orange')
-            plt.title(f'豆瓣Top250电影导演作品数量排名 (Top {top_n})')
-            plt.xlabel('作品数量')
-            plt.ylabel('导演')
-            plt.grid(axis='x', linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            
-            # 保存图片
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            plt.savefig(output_file)
-            plt.close()
-            
-            return top_directors
-        except Exception as e:
-            logger.error(f"生成导演排名图出错: {e}")
-            plt.close()
-            return pd.Series()
-    
-    def generate_wordcloud(self, output_file="output/images/quote_wordcloud.png"):
-        """生成电影简评词云"""
-        try:
-            # 合并所有简评
-            all_quotes = ' '.join(self.df['quote'].dropna())
-            
-            if not all_quotes.strip():
-                logger.error("没有有效的简评数据")
-                return False
-            
-            # 使用jieba分词
-            words = ' '.join(jieba.cut(all_quotes))
-            
-            # 指定字体路径
-            # 在不同系统上查找合适的中文字体
-            font_paths = [
-                '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',  # Linux
-                '/System/Library/Fonts/PingFang.ttc',  # macOS
-                'C:/Windows/Fonts/simhei.ttf',  # Windows
-                'simhei.ttf'  # 当前目录
-            ]
-            
-            font_path = None
-            for path in font_paths:
-                if os.path.exists(path):
-                    font_path = path
-                    break
-            
-            if not font_path:
-                logger.warning("未找到中文字体文件，词云可能无法正确显示中文")
-                # 创建一个空的字体文件作为备用
-                with open('simhei.ttf', 'wb') as f:
-                    f.write(b'')
-                font_path = 'simhei.ttf'
-            
-            # 生成词云
-            wordcloud = WordCloud(
-                font_path=font_path,
-                width=800,
-                height=600,
-                background_color='white',
-                max_words=100
-            ).generate(words)
-            
-            # 显示词云
-            plt.figure(figsize=(10, 8))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            
-            # 保存图片
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            plt.savefig(output_file)
-            plt.close()
-            
-            return True
-        except Exception as e:
-            logger.error(f"生成词云出错: {e}")
-            plt.close()
-            return False
-    
-    def generate_report(self):
-        """生成数据分析报告"""
-        try:
-            report = {}
-            
-            # 基本统计信息
-            report['movie_count'] = len(self.df)
-            report['avg_rating'] = self.df['rating'].mean()
-            report['min_rating'] = self.df['rating'].min()
-            report['max_rating'] = self.df['rating'].max()
-            
-            # 年份分布
-            valid_year_df = self.df[self.df['year'] > 1900]
-            if not valid_year_df.empty:
-                oldest_idx = valid_year_df['year'].idxmin()
-                newest_idx = valid_year_df['year'].idxmax()
-                
-                report['oldest_movie'] = {
-                    'title': self.df.loc[oldest_idx, 'title'],
-                    'year': self.df.loc[oldest_idx, 'year']
-                }
-                
-                report['newest_movie'] = {
-                    'title': self.df.loc[newest_idx, 'title'],
-                    'year': self.df.loc[newest_idx, 'year']
-                }
-                
-                report['most_common_year'] = valid_year_df['year'].value_counts().idxmax()
-            else:
-                report['oldest_movie'] = {'title': '未知', 'year': '未知'}
-                report['newest_movie'] = {'title': '未知', 'year': '未知'}
-                report['most_common_year'] = '未知'
-            
-            # 评分分布
-            report['rating_counts'] = self.df['rating'].value_counts().sort_index()
-            
-            # 其他分析
-            report['type_counts'] = pd.Series(self.all_types).value_counts() if self.all_types else pd.Series()
-            
-            return report
-        except Exception as e:
-            logger.error(f"生成分析报告出错: {e}")
-            return {
-                'movie_count': len(self.df),
-                'error': str(e)
-            }
-
-
-def main():
-    """主函数：爬取豆瓣Top250电影并进行数据分析"""
-    try:
-        # 创建输出目录
-        os.makedirs('output/images', exist_ok=True)
-        
-        # 创建爬虫实例
-        crawler = DoubanMovieCrawler()
-        
-        # 进行一些前置操作，模拟人类行为
-        crawler.simulate_human_behavior()
-        
-        # 爬取电影数据
-        movies = crawler.crawl()
-        
-        # 检查是否获取到了电影数据
-        if not movies:
-            logger.error("未获取到任何电影数据，程序终止")
-            return
-        
-        # 保存数据到Excel
-        if not crawler.save_to_excel():
-            logger.error("保存数据失败，程序终止")
-            return
-        
-        # 数据分析
-        try:
-            analyzer = DataAnalyzer('output/movies.xlsx')
-            
-            # 生成各类分析图表
-            analyzer.year_distribution()
-            analyzer.rating_distribution()
-            analyzer.country_distribution()
-            analyzer.type_distribution()
-            analyzer.rating_by_year()
-            analyzer.director_ranking()
-            analyzer.generate_wordcloud()
-            
-            # 生成分析报告
-            report = analyzer.generate_report()
-            
-            # 输出分析结果
-            print("\n==== 豆瓣TOP250电影数据分析报告 ====")
-            print(f"共收集了 {report['movie_count']} 部电影")
-            print(f"平均评分: {report['avg_rating']:.2f}")
-            print(f"最高评分: {report['max_rating']}")
-            print(f"最低评分: {report['min_rating']}")
-            
-            if isinstance(report['oldest_movie'], dict):
-                print(f"最早的电影: {report['oldest_movie']['title']} ({report['oldest_movie']['year']})")
-                print(f"最新的电影: {report['newest_movie']['title']} ({report['newest_movie']['year']})")
-            else:
-                print(f"最早的电影: {report['oldest_movie']['title'].values[0]} ({report['oldest_movie']['year'].values[0]})")
-                print(f"最新的电影: {report['newest_movie']['title'].values[0]} ({report['newest_movie']['year'].values[0]})")
-            
-            print(f"电影最多的年份: {report['most_common_year']}")
-            print("\n分析图表已保存到 output/images/ 目录")
-        except Exception as e:
-            print(f"\n❌ 数据分析或图表生成失败，错误信息: {e}")
-    except Exception as e:
-        print(f"\n❌ 程序运行失败，错误信息: {e}")
-
-if __name__ == "__main__":
-    main()
+"""
+豆瓣Top250电影爬虫项目
+作者: [赵嘉恒]
+日期: 2025年5月
+
+命令行用法:
+    python run.py                 爬取、保存、出图并输出报告（完整流程）
+    python run.py crawl           只爬取并保存数据
+    python run.py analyze         从已保存的数据生成图表
+    python run.py report          从已保存的数据输出分析报告
+    python run.py export          把已保存的数据导出为其他格式
+    python run.py history         查询快照历史（import/list/rank/changes）
+    python run.py lists [榜单...]   在同一限速下并发爬取多个榜单，不带参数时列出可用榜单
+    python run.py serve           启动只读HTTP接口，提供查询和图表（见 api.py）
+    python run.py --profile ...   用cProfile分析本次运行
+
+每次运行结束后把各阶段耗时和计数写入 config.METRICS_FILE（JSON）
+和 config.PROMETHEUS_FILE（Prometheus文本格式）。
+
+pandas、matplotlib、jieba、requests、lxml 等较重的依赖都在用到时才导入，
+GUI 导入本模块或只执行爬取时不需要为绘图库付出启动时间。
+"""
+
+import os
+import sys
+import random
+import logging
+import threading
+from urllib.parse import urljoin
+
+import config
+from metrics import metrics
+from checkpoint import CrawlCheckpoint, checkpoint_path
+from incremental import IncrementalState, diff_movies, page_hash, write_diff
+from throttle import AimdPacer
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler("douban_crawler.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+class DoubanMovieCrawler:
+    """豆瓣电影Top250爬虫类"""
+    
+    def __init__(self, base_url=None, use_cache=True, offline=None,
+                 incremental=False, resume=False, on_event=None, cancel_event=None, list_def=None,
+                 export_pipeline=None, sleep=None):
+        """
+        Args:
+            base_url: 榜单地址，指定时替换 list_def 的URL（分页参数沿用Top250的格式）
+            use_cache: 是否使用列表页磁盘缓存
+            offline: 离线模式，只从缓存解析，默认取 config.OFFLINE
+            incremental: 增量模式，跳过内容未变化的页面并与上次结果合并
+            resume: 从断点文件恢复，跳过上次已完成的页面
+            on_event: 进度事件回调，参数为包含 type 字段的字典，见 _emit
+            cancel_event: threading.Event，被设置后在请求之间协作式地停止爬取
+            list_def: 要爬取的榜单定义（lists.ListDefinition），默认为Top250
+            export_pipeline: exporters.ExportPipeline，每页完成后立即写入输出文件
+            sleep: 等待函数 sleep(seconds)，返回是否已取消；默认为 cancel_event.wait。
+                页面间隔、重试退避、自适应节流和令牌桶限速（包括多榜单和详情页）的等待都经由该函数，
+                基准测试可替换为不实际等待的实现
+        """
+        from lists import TOP250, get_list
+        
+        # 按名称取榜单定义，register_list 注册的同名定义（例如指向本地测试服务器）优先
+        self.list_def = list_def or get_list(TOP250.name)
+        if base_url is not None:
+            self.list_def = self.list_def._replace(url_template=f"{base_url}?start={{start}}&filter=")
+        self.on_event = on_event
+        self.cancel_event = cancel_event or threading.Event()
+        self.sleep = sleep or self.cancel_event.wait
+        self.export_pipeline = export_pipeline
+        self.offline = config.OFFLINE if offline is None else offline
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+            'Connection': 'keep-alive',
+            'Referer': 'https://movie.douban.com/'
+        }
+        self.movies = []
+        self.incremental_state = IncrementalState(config.INCREMENTAL_STATE_FILE) if incremental else None
+        # 每页完成后写入断点，进程中断时最多损失一页；各榜单的断点互不影响，
+        # 旧断点在 crawl()/crawl_concurrent() 开始时才清空
+        self.checkpoint = CrawlCheckpoint(checkpoint_path(self.list_def.name), resume=resume)
+        # 共享的连接池会话，所有请求复用连接并按统一策略重试
+        from http_cache import ResponseCache
+        from http_client import HttpSession
+        
+        cache = ResponseCache(config.CACHE_DIR, config.CACHE_TTL) if use_cache or self.offline else None
+        # 自适应节流：按响应状态和延迟调整请求间隔，学到的速率跨运行保存
+        self.pacer = None
+        if config.ADAPTIVE_PACING:
+            self.pacer = AimdPacer.load(config.PACING_STATE_FILE, cancel_event=self.cancel_event, sleep=self.sleep)
+        self.session = HttpSession(
+            headers=self.headers,
+            cache=cache,
+            offline=self.offline,
+            cancel_event=self.cancel_event,
+            on_retry=self._on_retry,
+            on_response=self.pacer.record if self.pacer else None,
+            sleep=self.sleep,
+        )
+        
+    def _emit(self, event_type, **data):
+        """发送进度事件
+        
+        事件类型:
+            crawl_started   total_pages
+            page_started    page
+            page_parsed     page, count
+            retry           url, attempt, reason, delay
+            detail_fetched  done, total（详情页补充阶段）
+            crawl_finished  count, cancelled
+        """
+        if self.on_event is not None:
+            try:
+                self.on_event(dict(type=event_type, **data))
+            except Exception as e:
+                logger.error(f"进度回调出错: {e}")
+
+    def _on_retry(self, url, attempt, reason, delay):
+        self._emit('retry', url=url, attempt=attempt, reason=reason, delay=delay)
+
+    @property
+    def cancelled(self):
+        """是否已请求取消"""
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """请求取消爬取，正在进行的请求完成后停止"""
+        self.cancel_event.set()
+
+    def _sleep(self, seconds, reason='page'):
+        """可被取消打断的等待，已取消时返回True"""
+        with metrics.timer('sleep', reason=reason):
+            return self.sleep(seconds)
+
+    def _save_pacing(self):
+        """保存自适应节流学到的速率，离线模式下没有新的观测，不保存"""
+        if self.pacer is None or self.offline:
+            return
+        try:
+            self.pacer.save()
+        except OSError as e:
+            logger.error(f"保存节流状态失败: {e}")
+
+    def get_user_agents(self):
+        """返回一个User-Agent列表"""
+        user_agents = [
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 11.5; rv:90.0) Gecko/20100101 Firefox/90.0',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 11_5_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Safari/605.1.15'
+        ]
+        return user_agents
+    
+    def get_random_header(self):
+        """获取随机的请求头"""
+        user_agents = self.get_user_agents()
+        headers = self.headers.copy()
+        headers['User-Agent'] = random.choice(user_agents)
+        return headers
+        
+    def page_url(self, page):
+        """返回指定页码的列表页URL"""
+        return self.list_def.page_url(page)
+
+    def job(self):
+        """本爬虫的榜单爬取任务：带断点、流式导出，增量模式下复用未变化页面的解析结果"""
+        from lists import ListJob
+        
+        return ListJob(self.list_def, self.checkpoint, self.export_pipeline, self._parse_or_reuse)
+
+    def make_scheduler(self, max_workers=None, rate=None, burst=None):
+        """创建共用本爬虫会话、请求头和取消事件的榜单调度器
+        
+        显式指定速率时使用固定速率的令牌桶，否则优先使用自适应节流。
+        
+        Args:
+            max_workers: 并发请求数上限，默认取 config.CONCURRENCY
+            rate: 每个主机每秒允许的请求数，默认取 config.RATE_LIMIT
+            burst: 令牌桶容量，默认取 config.RATE_BURST
+        """
+        from lists import ListScheduler
+        
+        return ListScheduler(
+            self.session,
+            header_factory=self.get_random_header,
+            rate=rate,
+            burst=burst,
+            max_workers=max_workers,
+            cancel_event=self.cancel_event,
+            on_event=self.on_event,
+            sleep=self.sleep,
+            pacer=self.pacer if rate is None else None,
+        )
+
+    def parse_page(self, html, page):
+        """解析列表页HTML
+        
+        Args:
+            html: 页面HTML文本
+            page: 页码，用于计算排名和保存调试页面
+            
+        Returns:
+            解析出的电影数据列表
+        """
+        with metrics.timer('parse', kind='listing'):
+            movies = self.list_def.parser(html, page, self.list_def.page_size)
+        metrics.increment('movies_parsed', len(movies))
+        
+        if not movies:
+            logger.error("未找到电影列表，可能是页面结构变化或遇到反爬机制")
+            # 保存当前页面以便调试
+            with open(f"error_page_{page}.html", "w", encoding="utf-8") as f:
+                f.write(html)
+            return []
+        
+        logger.debug(f"第{page}页解析出{len(movies)}部电影")
+        return movies
+
+    def _parse_or_reuse(self, html, page):
+        """解析页面；增量模式下页面内容未变化时直接复用上次的解析结果"""
+        state = self.incremental_state
+        if state is None:
+            return self.parse_page(html, page)
+        
+        html_hash = page_hash(html)
+        movies = state.cached_movies(page, html_hash)
+        if movies is not None:
+            logger.info(f"第{page}页内容未变化，跳过解析")
+            return movies
+        
+        movies = self.parse_page(html, page)
+        if movies:
+            state.update_page(page, html_hash, movies)
+        return movies
+
+    def finish_incremental(self, diff_file=None):
+        """合并增量结果并输出榜单变化
+        
+        本次爬取失败的页面沿用上次的数据，合并后的榜单与上次结果对比，
+        把新上榜、跌出榜单、排名变化和评分变化写入diff文件。
+        
+        Args:
+            diff_file: diff文件路径，默认取 config.DIFF_FILE
+            
+        Returns:
+            diff字典，非增量模式下返回None
+        """
+        state = self.incremental_state
+        if state is None:
+            return None
+        
+        crawled_pages = {}
+        for movie in self.movies:
+            crawled_pages.setdefault((movie.rank - 1) // self.list_def.page_size + 1, []).append(movie)
+        
+        merged = []
+        for page in sorted(set(crawled_pages) | set(state.pages)):
+            if page in crawled_pages:
+                merged.extend(crawled_pages[page])
+            else:
+                logger.warning(f"第{page}页本次未获取到数据，沿用上次结果")
+                merged.extend(state.page_movies(page))
+        self.movies = merged
+        
+        diff = diff_movies(state.previous_movies, merged)
+        write_diff(diff, diff_file or config.DIFF_FILE)
+        state.save()
+        logger.info(
+            f"增量更新完成: 新上榜{len(diff['entered'])}部，跌出{len(diff['left'])}部，"
+            f"排名变化{len(diff['rank_moved'])}部，评分变化{len(diff['rating_changed'])}部"
+        )
+        return diff
+
+    def crawl(self):
+        """顺序爬取豆瓣Top250电影，每页之间随机暂停"""
+        from tqdm import tqdm
+        
+        total_pages = self.list_def.total_pages
+        scheduler = self.make_scheduler(max_workers=1)
+        job = self.job()
+        self.checkpoint.start()
+        
+        self._emit('crawl_started', total_pages=total_pages)
+        try:
+            for page in tqdm(range(1, total_pages + 1), desc="爬取进度"):
+                if self.cancelled:
+                    logger.info(f"爬取已取消，停止于第{page}页之前")
+                    break
+                
+                if self.checkpoint.is_completed(page):
+                    movies = self.checkpoint.movies(page)
+                    self.movies.extend(movies)
+                    logger.info(f"第{page}页已在断点中完成，跳过")
+                    scheduler.page_done(job, page, movies)
+                    continue
+                
+                movies, cached = scheduler.fetch_page(job, page)
+                logger.info(f"第{page}页爬取完成，获取{len(movies)}部电影")
+                
+                if not movies and not self.cancelled:
+                    logger.warning(f"第{page}页未获取到任何电影，尝试重试...")
+                    # 按退避策略等待后重试
+                    policy = self.session.retry_policy
+                    if self._sleep(policy.compute_delay(1, policy.THROTTLED), reason='retry'):
+                        break
+                    movies, cached = scheduler.fetch_page(job, page)
+                    if not movies:
+                        logger.error(f"重试后仍未获取到电影，可能遇到反爬机制，暂停一段时间")
+                        self._sleep(policy.compute_delay(2, policy.THROTTLED), reason='retry')
+                
+                if not movies and self.cancelled:
+                    # 取消导致的空页不写入断点，恢复时重新爬取
+                    break
+                self.movies.extend(movies)
+                self.checkpoint.record(page, movies)
+                scheduler.page_done(job, page, movies)
+                
+                # 随机暂停一段时间，避免请求过于频繁（自适应节流时由 pacer 控制间隔）
+                if not cached and self.pacer is None:
+                    self._sleep(random.uniform(5, 8))
+                
+            logger.info(f"爬取完成，总共获取{len(self.movies)}部电影")
+            self._save_pacing()
+            self._emit('crawl_finished', count=len(self.movies), cancelled=self.cancelled)
+            
+            # 如果获取的电影数量太少，可能是遇到了反爬机制
+            if len(self.movies) < 50:  # 预期是250部，如果少于50可能有问题
+                logger.warning(f"获取的电影数量({len(self.movies)})过少，可能遇到了反爬机制")
+            
+            return self.movies
+        
+        except Exception as e:
+            logger.error(f"爬取过程中出现错误: {e}")
+            return self.movies
+
+    def crawl_concurrent(self, max_workers=None, rate=None, burst=None):
+        """并发爬取豆瓣Top250电影
+        
+        作为只有一个榜单的情形交给 lists.ListScheduler，用令牌桶或自适应节流代替固定的随机延迟。
+        结果按页码顺序合并，与顺序爬取得到的 self.movies 顺序一致。
+        
+        Args:
+            max_workers: 并发请求数上限，默认取 config.CONCURRENCY
+            rate: 每秒允许的请求数，默认取 config.RATE_LIMIT
+            burst: 令牌桶容量，默认取 config.RATE_BURST
+        """
+        results = self.crawl_lists([self.job()], max_workers=max_workers, rate=rate, burst=burst)
+        self.movies.extend(results[self.list_def.name])
+        
+        # 如果获取的电影数量太少，可能是遇到了反爬机制
+        if len(self.movies) < 50:  # 预期是250部，如果少于50可能有问题
+            logger.warning(f"获取的电影数量({len(self.movies)})过少，可能遇到了反爬机制")
+        
+        return self.movies
+
+    def crawl_lists(self, jobs, max_workers=None, rate=None, burst=None):
+        """在同一个调度器下并发爬取多个榜单，共享限速（或自适应节流）和已解析条目
+        
+        Args:
+            jobs: lists.ListJob 或 lists.ListDefinition 列表
+            max_workers: 并发请求数上限，默认取 config.CONCURRENCY
+            rate: 每个主机每秒允许的请求数，不指定时使用自适应节流或 config.RATE_LIMIT
+            burst: 令牌桶容量，默认取 config.RATE_BURST
+            
+        Returns:
+            {榜单名称: 电影数据列表}
+        """
+        results = self.make_scheduler(max_workers, rate, burst).crawl(jobs)
+        self._save_pacing()
+        return results
+
+    def enrich_details(self):
+        """抓取每部电影的详情页，补充片长、完整演员表、IMDb编号和评分星级分布
+        
+        Returns:
+            成功补充详情的电影数量
+        """
+        from enrich import DetailEnricher
+        
+        enricher = DetailEnricher(
+            self.session,
+            offline=self.offline,
+            cancel_event=self.cancel_event,
+            on_event=self.on_event,
+            sleep=self.sleep,
+        )
+        return enricher.enrich(self.movies, header_factory=self.get_random_header)
+
+    def check_parse_quality(self, min_rate=None, movies=None):
+        """检查各字段的有效值比例，尽早发现页面结构变化导致的解析失败
+        
+        Args:
+            min_rate: 最低有效值比例，默认取 config.MIN_FIELD_FILL_RATE
+            movies: 要检查的电影数据，默认为 self.movies
+            
+        Returns:
+            低于阈值的字段及其比例，全部达标时为空字典
+        """
+        from movie_parser import field_fill_rates, low_fill_fields
+        
+        min_rate = config.MIN_FIELD_FILL_RATE if min_rate is None else min_rate
+        movies = self.movies if movies is None else movies
+        rates = field_fill_rates(movies)
+        logger.info("字段有效值比例: " + ", ".join(f"{field}={rate:.1%}" for field, rate in rates.items()))
+        
+        low_fields = low_fill_fields(movies, min_rate)
+        for field, rate in low_fields.items():
+            logger.error(f"字段'{field}'有效值比例仅为{rate:.1%}，低于{min_rate:.0%}，解析规则可能已失效")
+        return low_fields
+
+    def to_dataframe(self):
+        """返回带类型的电影数据DataFrame"""
+        from storage import to_typed_frame
+        
+        return to_typed_frame(self.movies)
+
+    def save(self, filenames):
+        """将电影数据按批写入多个文件，格式由扩展名决定
+        
+        Args:
+            filenames: 输出文件名列表（.parquet/.feather/.xlsx/.csv/.jsonl）
+            
+        Returns:
+            是否至少成功保存了一个文件
+        """
+        from exporters import export_movies
+        
+        if not self.movies:
+            logger.error("没有电影数据可保存")
+            return False
+        try:
+            return bool(export_movies(self.movies, filenames, self.list_def.page_size))
+        except Exception as e:
+            logger.error(f"保存数据出错: {e}")
+            return False
+
+    def save_columnar(self, filename=None):
+        """将电影数据保存为Parquet/Feather列式文件，默认取 config.DATA_FILE"""
+        return self.save([filename or config.DATA_FILE])
+
+    def save_to_excel(self, filename="output/movies.xlsx"):
+        """将电影数据保存到Excel文件，同时保存同名CSV作为备份"""
+        return self.save([filename, filename.replace('.xlsx', '.csv')])
+
+    def simulate_human_behavior(self):
+        """模拟人类行为，减少被反爬机制识别的可能性"""
+        # 随机访问榜单所在站点的一些非目标页面
+        try:
+            site = self.list_def.page_url(1)
+            random_pages = [
+                urljoin(site, "/"),
+                urljoin(site, "/cinema/nowplaying/"),
+                urljoin(site, "/explore")
+            ]
+            
+            page = random.choice(random_pages)
+            logger.info(f"模拟人类行为，随机访问: {page}")
+            
+            headers = self.get_random_header()
+            self.session.get(page, headers=headers)
+            
+            # 随机等待
+            self._sleep(random.uniform(2, 5), reason='warmup')
+            
+        except Exception as e:
+            logger.error(f"模拟人类行为时出错: {e}")
+
+
+def __getattr__(name):
+    """延迟导入 DataAnalyzer，兼容 from run import DataAnalyzer 的用法"""
+    if name == 'DataAnalyzer':
+        from analyzer import DataAnalyzer
+        return DataAnalyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def crawl_and_save(incremental=False, enrich=False, resume=False, offline=None, export_excel=None,
+                   on_event=None, cancel_event=None, sleep=None):
+    """爬取电影数据并保存
+    
+    Args:
+        incremental: 增量模式，只重新解析变化的页面，并输出榜单变化diff
+        enrich: 是否抓取详情页补充片长、演员表等信息
+        resume: 从断点恢复，跳过上次已完成的页面
+        offline: 离线模式，只从缓存解析，默认取 config.OFFLINE
+        export_excel: 是否额外导出Excel/CSV，默认取 config.EXPORT_EXCEL
+        on_event: 进度事件回调，除爬虫事件外还会收到 type 为 stage 的阶段事件
+        cancel_event: threading.Event，被设置后停止爬取且不保存结果
+        sleep: 爬虫使用的等待函数，见 DoubanMovieCrawler
+        
+    Returns:
+        带类型的电影数据DataFrame，失败或取消时返回None
+    """
+    from exporters import ExportPipeline
+    
+    filenames = export_filenames(export_excel)
+    # 边爬边写：每页完成后立即追加到各输出文件的 .part 文件，成功结束时再替换正式文件
+    pipeline = ExportPipeline(filenames) if config.STREAM_EXPORT else None
+    
+    # 创建爬虫实例
+    crawler = DoubanMovieCrawler(
+        incremental=incremental,
+        resume=resume,
+        offline=offline,
+        on_event=on_event,
+        cancel_event=cancel_event,
+        export_pipeline=pipeline,
+        sleep=sleep,
+    )
+    try:
+        return _crawl_and_save(crawler, incremental, enrich, filenames)
+    finally:
+        # 取消、失败或出错时删除未完成的文件，已有数据保持不变（已提交时无操作）
+        if pipeline is not None:
+            pipeline.abort()
+
+
+def _crawl_and_save(crawler, incremental, enrich, filenames):
+    # 进行一些前置操作，模拟人类行为（离线模式下不访问网络）
+    if not crawler.offline:
+        crawler.simulate_human_behavior()
+    
+    # 爬取电影数据
+    if config.CONCURRENCY > 1:
+        movies = crawler.crawl_concurrent()
+    else:
+        movies = crawler.crawl()
+    
+    # 已取消：已完成的页面保留在断点文件中，不覆盖已有数据
+    if crawler.cancelled:
+        logger.warning("爬取已取消，未保存数据，可使用 --resume 继续")
+        return None
+    
+    # 增量模式：合并上次结果并输出diff
+    if incremental:
+        crawler.finish_incremental()
+        movies = crawler.movies
+    
+    # 检查是否获取到了电影数据
+    if not movies:
+        logger.error("未获取到任何电影数据，程序终止")
+        return None
+    
+    # 检查解析质量，字段大面积缺失时不覆盖已有数据，也不生成无意义的图表
+    if crawler.check_parse_quality():
+        logger.error("解析结果字段缺失过多，程序终止")
+        return None
+    
+    # 可选：抓取详情页补充信息
+    if enrich:
+        crawler._emit('stage', name='enrich')
+        crawler.enrich_details()
+        if crawler.cancelled:
+            logger.warning("详情补充已取消，未保存数据，已抓取的详情页保留在缓存中")
+            return None
+    
+    # 保存数据：边爬边写的文件与最终结果一致时直接提交；
+    # 补充了详情或增量合并了上次的页面时，按最终结果重新写一遍
+    crawler._emit('stage', name='save')
+    pipeline = crawler.export_pipeline
+    if pipeline is not None and not enrich and pipeline.count == len(movies):
+        saved = bool(pipeline.commit())
+    else:
+        if pipeline is not None:
+            pipeline.abort()
+        saved = crawler.save(filenames)
+    if not saved:
+        logger.error("保存数据失败，程序终止")
+        return None
+    # 数据已保存，之后的 --resume 重新爬取所有页面
+    crawler.checkpoint.finish()
+    if config.RECORD_HISTORY:
+        record_history(movies)
+    return crawler.to_dataframe()
+
+
+def export_filenames(export_excel=None):
+    """本次爬取要保存的文件：主数据文件，以及可选的Excel/CSV和JSON Lines
+    
+    Args:
+        export_excel: 是否额外导出Excel/CSV，默认取 config.EXPORT_EXCEL
+    """
+    export_excel = config.EXPORT_EXCEL if export_excel is None else export_excel
+    filenames = [config.DATA_FILE]
+    if export_excel:
+        filenames += ['output/movies.xlsx', 'output/movies.csv']
+    if config.JSONL_FILE:
+        filenames.append(config.JSONL_FILE)
+    return filenames
+
+
+def record_history(movies):
+    """把本次爬取结果（Movie列表或DataFrame）追加到快照历史，失败时只记录日志"""
+    from history import SnapshotHistory
+    
+    try:
+        with SnapshotHistory() as history:
+            history.add_snapshot(movies, source='crawl')
+    except Exception as e:
+        logger.error(f"写入快照历史失败: {e}")
+
+
+def load_saved_data(filename=None):
+    """读取已保存的电影数据，默认依次尝试 config.DATA_FILE 和 output/movies.xlsx"""
+    from analyzer import DataAnalyzer
+    
+    candidates = [filename] if filename else [config.DATA_FILE, 'output/movies.xlsx', 'output/movies.csv']
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return DataAnalyzer(candidate)
+    raise FileNotFoundError(f"找不到数据文件: {', '.join(candidates)}")
+
+
+def print_report(report):
+    """输出分析报告"""
+    print("\n==== 豆瓣TOP250电影数据分析报告 ====")
+    print(f"共收集了 {report['movie_count']} 部电影")
+    print(f"平均评分: {report['avg_rating']:.2f}")
+    print(f"最高评分: {report['max_rating']}")
+    print(f"最低评分: {report['min_rating']}")
+    
+    if isinstance(report['oldest_movie'], dict):
+        print(f"最早的电影: {report['oldest_movie']['title']} ({report['oldest_movie']['year']})")
+        print(f"最新的电影: {report['newest_movie']['title']} ({report['newest_movie']['year']})")
+    else:
+        print(f"最早的电影: {report['oldest_movie']['title'].values[0]} ({report['oldest_movie']['year'].values[0]})")
+        print(f"最新的电影: {report['newest_movie']['title'].values[0]} ({report['newest_movie']['year'].values[0]})")
+    
+    print(f"电影最多的年份: {report['most_common_year']}")
+
+
+def print_chart_timings(timings):
+    """输出图表渲染耗时"""
+    import charts
+    
+    print("\n==== 图表渲染耗时 ====")
+    print(charts.format_timings(timings))
+    print("\n分析图表已保存到 output/images/ 目录")
+
+
+def main(incremental=False, enrich=False, resume=False, on_event=None, cancel_event=None, sleep=None):
+    """主函数：爬取豆瓣Top250电影并进行数据分析
+    
+    Args:
+        incremental: 增量模式，只重新解析变化的页面，并输出榜单变化diff
+        enrich: 是否抓取详情页补充片长、演员表等信息
+        resume: 从断点恢复，跳过上次已完成的页面
+        on_event: 进度事件回调，在工作线程中调用
+        cancel_event: threading.Event，被设置后尽快停止
+        sleep: 爬虫使用的等待函数，见 DoubanMovieCrawler
+        
+    Returns:
+        是否成功完成爬取和分析
+    """
+    try:
+        # 创建输出目录
+        os.makedirs('output/images', exist_ok=True)
+        
+        df = crawl_and_save(
+            incremental=incremental,
+            enrich=enrich,
+            resume=resume,
+            on_event=on_event,
+            cancel_event=cancel_event,
+            sleep=sleep,
+        )
+        if df is None:
+            return False
+        
+        # 数据分析：直接使用内存中的DataFrame，不再从文件重新读取
+        try:
+            from analyzer import DataAnalyzer
+            
+            analyzer = DataAnalyzer(df)
+            
+            # 并行生成各类分析图表
+            if on_event is not None:
+                on_event({'type': 'stage', 'name': 'charts'})
+            timings = analyzer.render_charts(on_event=on_event)
+            
+            # 生成并输出分析报告
+            print_report(analyzer.generate_report())
+            print_chart_timings(timings)
+            return all(t['ok'] for t in timings)
+        except Exception as e:
+            print(f"\n❌ 数据分析或图表生成失败，错误信息: {e}")
+    except Exception as e:
+        print(f"\n❌ 程序运行失败，错误信息: {e}")
+    return False
+
+
+def _add_crawl_arguments(parser, **kwargs):
+    parser.add_argument('--incremental', action='store_true', help="增量爬取，只重新解析变化的页面并输出榜单变化", **kwargs)
+    parser.add_argument('--enrich', action='store_true', help="抓取详情页，补充片长、演员表、IMDb编号和评分分布", **kwargs)
+    parser.add_argument('--resume', action='store_true', help="从断点恢复，跳过上次已完成的页面", **kwargs)
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="豆瓣Top250电影爬虫与数据分析")
+    parser.add_argument('--profile', action='store_true', help="用cProfile分析本次运行，结果保存到 config.PROFILE_FILE")
+    _add_crawl_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command')
+    
+    crawl_parser = subparsers.add_parser('crawl', help="爬取并保存数据")
+    # 这些选项写在子命令前后都可以；子命令中未指定时不设默认值，以免覆盖写在子命令前的选项
+    _add_crawl_arguments(crawl_parser, default=argparse.SUPPRESS)
+    crawl_parser.add_argument('--offline', action='store_true', help="离线模式，只从缓存解析")
+    crawl_parser.add_argument('--no-excel', action='store_true', help="不导出Excel/CSV，只保存列式数据文件")
+    
+    analyze_parser = subparsers.add_parser('analyze', help="从已保存的数据生成图表")
+    analyze_parser.add_argument('--data', help="数据文件，默认取 config.DATA_FILE")
+    analyze_parser.add_argument('--workers', type=int, help="并行渲染的进程数")
+    
+    report_parser = subparsers.add_parser('report', help="从已保存的数据输出分析报告")
+    report_parser.add_argument('--data', help="数据文件，默认取 config.DATA_FILE")
+    
+    export_parser = subparsers.add_parser('export', help="把已保存的数据导出为其他格式")
+    export_parser.add_argument('output', help="输出文件，格式由扩展名决定(.xlsx/.csv/.parquet/.feather)")
+    export_parser.add_argument('--data', help="数据文件，默认取 config.DATA_FILE")
+    
+    lists_parser = subparsers.add_parser('lists', help="在同一限速下并发爬取多个榜单")
+    lists_parser.add_argument('names', nargs='*', help="榜单名称，不指定时列出可用榜单")
+    lists_parser.add_argument('--workers', type=int, help="并发请求数")
+    lists_parser.add_argument('--rate', type=float, help="每个主机每秒允许的请求数")
+    lists_parser.add_argument('--output-dir', default=config.LISTS_DIR, help="输出目录，每个榜单一个数据文件")
+    lists_parser.add_argument(
+        '--resume', action='store_true', default=argparse.SUPPRESS, help="从各榜单的断点恢复，跳过上次已完成的页面"
+    )
+    
+    serve_parser = subparsers.add_parser('serve', help="启动只读HTTP接口，提供查询和图表")
+    serve_parser.add_argument('--host', help="监听地址，默认取 config.API_HOST")
+    serve_parser.add_argument('--port', type=int, help="监听端口，默认取 config.API_PORT")
+    serve_parser.add_argument('--data', help="数据文件，默认取 config.DATA_FILE")
+    
+    history_parser = subparsers.add_parser('history', help="查询快照历史")
+    history_parser.add_argument('--db', help="历史数据库，默认取 config.HISTORY_DB")
+    history_sub = history_parser.add_subparsers(dest='history_command', required=True)
+    import_parser = history_sub.add_parser('import', help="把历史导出文件导入为快照，以文件修改时间为快照时间")
+    import_parser.add_argument('files', nargs='+')
+    history_sub.add_parser('list', help="列出所有快照")
+    rank_parser = history_sub.add_parser('rank', help="某部电影的排名变化")
+    rank_parser.add_argument('movie', help="豆瓣条目ID或片名")
+    changes_parser = history_sub.add_parser('changes', help="评分变化超过阈值的电影")
+    changes_parser.add_argument('--days', type=int, default=30)
+    changes_parser.add_argument('--min-delta', type=float, default=0.1)
+    
+    return parser
+
+
+def export_data(source, output):
+    """把已保存的数据导出为 output 扩展名对应的格式"""
+    from storage import is_columnar, save_table
+    
+    df = load_saved_data(source).df
+    # 去掉分析阶段添加的辅助列
+    df = df.drop(columns=['movie_id'], errors='ignore')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    if output.endswith('.xlsx'):
+        df.to_excel(output, index=False)
+    elif output.endswith('.csv'):
+        df.to_csv(output, index=False, encoding='utf-8-sig')
+    elif is_columnar(output):
+        save_table(df, output)
+    else:
+        raise ValueError(f"不支持的导出格式: {output}")
+    logger.info(f"数据已导出到 {output}")
+
+
+def crawl_lists(names, max_workers=None, rate=None, output_dir=None, resume=False):
+    """并发爬取多个榜单，每个榜单保存为 output_dir 下的一个数据文件
+    
+    与Top250爬取共用同一个调度器：每个榜单在 output_dir 下有自己的断点文件
+    （与 config.CHECKPOINT_FILE 互不影响），边爬边写数据文件，未指定 rate 时使用自适应节流。
+    字段缺失过多的榜单不覆盖已有数据；包含Top250时同样记入快照历史。
+    
+    Args:
+        names: 榜单名称列表
+        max_workers: 并发请求数上限，默认取 config.CONCURRENCY
+        rate: 每个主机每秒允许的请求数
+        output_dir: 输出目录，默认取 config.LISTS_DIR
+        resume: 从各榜单的断点恢复，跳过上次已完成的页面
+    
+    Returns:
+        是否所有榜单都获取到了数据并保存成功
+    """
+    from exporters import ExportPipeline
+    from lists import ListJob, get_list
+    
+    output_dir = output_dir or config.LISTS_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    extension = os.path.splitext(config.DATA_FILE)[1]
+    
+    jobs = []
+    for name in names:
+        definition = get_list(name)
+        filename = os.path.join(output_dir, f"{name}{extension}")
+        jobs.append((ListJob(
+            definition,
+            checkpoint=CrawlCheckpoint(os.path.join(output_dir, f"{name}.checkpoint.jsonl"), resume=resume),
+            export_pipeline=ExportPipeline([filename]) if config.STREAM_EXPORT else None,
+        ), filename))
+    
+    crawler = DoubanMovieCrawler()
+    try:
+        results = crawler.crawl_lists([job for job, _ in jobs], max_workers=max_workers, rate=rate)
+        if crawler.cancelled:
+            logger.warning("爬取已取消，未保存数据，可使用 --resume 继续")
+            return False
+        saved = [_save_list(crawler, job, filename, results[job.definition.name]) for job, filename in jobs]
+        return all(saved)
+    finally:
+        # 未保存的榜单删除未完成的文件，已有数据保持不变（已提交时无操作）
+        for job, _ in jobs:
+            if job.export_pipeline is not None:
+                job.export_pipeline.abort()
+
+
+def _save_list(crawler, job, filename, movies):
+    """保存一个榜单的爬取结果，成功后关闭该榜单的断点
+    
+    Returns:
+        是否保存成功
+    """
+    from exporters import export_movies
+    from lists import TOP250
+    
+    name = job.definition.name
+    if not movies:
+        logger.error(f"榜单{name}未获取到任何电影")
+        return False
+    if crawler.check_parse_quality(movies=movies):
+        logger.error(f"榜单{name}解析结果字段缺失过多，未覆盖已有数据")
+        return False
+    
+    pipeline = job.export_pipeline
+    if pipeline is not None and pipeline.count == len(movies):
+        saved = bool(pipeline.commit())
+    else:
+        if pipeline is not None:
+            pipeline.abort()
+        saved = bool(export_movies(movies, [filename], job.definition.page_size))
+    if not saved:
+        logger.error(f"榜单{name}保存失败")
+        return False
+    
+    job.checkpoint.finish()
+    logger.info(f"榜单{name}共{len(movies)}部电影，已保存到 {filename}")
+    if name == TOP250.name and config.RECORD_HISTORY:
+        record_history(movies)
+    return True
+
+
+def history_command(args):
+    """执行 history 子命令"""
+    from history import SnapshotHistory
+    
+    with SnapshotHistory(args.db) as history:
+        if args.history_command == 'import':
+            # 按修改时间顺序导入，快照ID与时间顺序一致
+            for filename in sorted(args.files, key=os.path.getmtime):
+                history.import_file(filename)
+        elif args.history_command == 'list':
+            for snapshot in history.snapshots():
+                print(f"{snapshot['id']:>4}  {snapshot['taken_at']}  {snapshot['movie_count']:>4}部  {snapshot['source']}")
+        elif args.history_command == 'rank':
+            subject_id = args.movie
+            if not subject_id.isdigit():
+                matches = history.find_subjects(args.movie)
+                if not matches:
+                    print(f"找不到电影: {args.movie}")
+                    return 1
+                subject_id = matches[0]['subject_id']
+                print(f"{matches[0]['title']} ({subject_id})")
+            for point in history.rank_trajectory(subject_id):
+                print(f"{point['taken_at']}  第{point['rank']}名  评分{point['rating']}")
+        elif args.history_command == 'changes':
+            for change in history.rating_changes(min_delta=args.min_delta, days=args.days):
+                print(f"{change['title']}: {change['old_rating']} -> {change['new_rating']} "
+                      f"({change['delta']:+.1f})，排名 {change['old_rank']} -> {change['new_rank']}")
+    return 0
+
+
+def write_metrics():
+    """写出本次运行的指标摘要（JSON和Prometheus文本格式）"""
+    metrics.write(config.METRICS_FILE, config.PROMETHEUS_FILE)
+    logger.info("各阶段耗时:\n" + metrics.format_stages())
+
+
+def save_profile(profiler, filename=None):
+    """保存cProfile统计，另存一份按累计耗时排序的文本报告"""
+    import pstats
+    
+    filename = filename or config.PROFILE_FILE
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    profiler.dump_stats(filename)
+    with open(os.path.splitext(filename)[0] + '.txt', 'w', encoding='utf-8') as f:
+        pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(60)
+    logger.info(f"性能分析结果已保存到 {filename}")
+
+
+def cli(argv=None):
+    """命令行入口，返回进程退出码"""
+    args = build_parser().parse_args(argv)
+    metrics.reset()
+    
+    if args.profile:
+        import cProfile
+        
+        profiler = cProfile.Profile()
+        try:
+            code = profiler.runcall(run_command, args)
+        finally:
+            save_profile(profiler)
+    else:
+        code = run_command(args)
+    
+    write_metrics()
+    return code
+
+
+def run_command(args):
+    """执行解析好的命令行参数对应的命令，返回进程退出码"""
+    if args.command is None:
+        return 0 if main(incremental=args.incremental, enrich=args.enrich, resume=args.resume) else 1
+    
+    try:
+        if args.command == 'crawl':
+            df = crawl_and_save(
+                incremental=args.incremental,
+                enrich=args.enrich,
+                resume=args.resume,
+                offline=True if args.offline else None,
+                export_excel=False if args.no_excel else None,
+            )
+            return 0 if df is not None else 1
+        
+        if args.command == 'analyze':
+            timings = load_saved_data(args.data).render_charts(max_workers=args.workers)
+            print_chart_timings(timings)
+            return 0 if all(t['ok'] for t in timings) else 1
+        
+        if args.command == 'report':
+            print_report(load_saved_data(args.data).generate_report())
+            return 0
+        
+        if args.command == 'export':
+            export_data(args.data, args.output)
+            return 0
+        
+        if args.command == 'history':
+            return history_command(args)
+        
+        if args.command == 'serve':
+            import api
+            
+            api.serve(args.host, args.port, args.data)
+            return 0
+        
+        if args.command == 'lists':
+            if not args.names:
+                from lists import all_lists
+                
+                for definition in all_lists():
+                    print(f"{definition.name:<16} {definition.total_pages}页 x {definition.page_size}  {definition.url_template}")
+                return 0
+            return 0 if crawl_lists(args.names, args.workers, args.rate, args.output_dir, args.resume) else 1
+    except Exception as e:
+        logger.error(f"执行{args.command}失败: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,112 @@
+"""
+列式存储：带类型的DataFrame与Parquet/Feather读写
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from models import Movie
+
+logger = logging.getLogger(__name__)
+
+# 列类型：数值列在构造时完成转换，分析阶段无需再次从字符串解析
+INTEGER_COLUMNS = {
+    'rank': 'int16',
+    'rating_count': 'int64',
+    'year': 'int16',
+}
+FLOAT_COLUMNS = ('rating',)
+CATEGORY_COLUMNS = ('country', 'type')
+STRING_COLUMNS = ('subject_id', 'title', 'director', 'quote')
+
+COLUMNAR_EXTENSIONS = ('.parquet', '.feather')
+
+
+def records_to_frame(movies):
+    """由 Movie 列表按列直接构造带类型的DataFrame
+
+    Movie 的字段在构造时已经是数值，这里逐列生成数组，不经过字符串再解析；
+    缺失的数值记为0，缺失的文本记为空字符串，详情字段各占一列。
+    """
+    columns = {}
+    for field in Movie.FIELDS:
+        values = [getattr(movie, field) for movie in movies]
+        if field in INTEGER_COLUMNS:
+            columns[field] = np.fromiter((v or 0 for v in values), dtype=INTEGER_COLUMNS[field], count=len(values))
+        elif field in FLOAT_COLUMNS:
+            columns[field] = np.fromiter((v or 0.0 for v in values), dtype='float64', count=len(values))
+        elif field in CATEGORY_COLUMNS:
+            columns[field] = pd.Categorical([v or '' for v in values])
+        else:
+            columns[field] = [v or '' for v in values]
+    
+    detail_fields = {}
+    for movie in movies:
+        if movie.details:
+            detail_fields.update(dict.fromkeys(movie.details))
+    for field in detail_fields:
+        columns[field] = [movie.details.get(field) if movie.details else None for movie in movies]
+    
+    return pd.DataFrame(columns)
+
+
+def to_typed_frame(movies):
+    """把电影数据转换为带类型的DataFrame
+
+    Args:
+        movies: Movie 列表，或电影数据字典列表/DataFrame（例如旧版导出文件）
+
+    Returns:
+        rating为float64，rating_count为int64，year/rank为int16，
+        country/type为category的DataFrame；无法解析的数值记为0
+    """
+    if isinstance(movies, list) and movies and isinstance(movies[0], Movie):
+        return records_to_frame(movies)
+    
+    df = pd.DataFrame(movies).copy()
+    
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(dtype)
+    
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('float64')
+    
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).astype('category')
+    
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str)
+    
+    return df
+
+
+def is_columnar(filename):
+    """判断文件是否为支持的列式格式"""
+    return filename.endswith(COLUMNAR_EXTENSIONS)
+
+
+def save_table(df, filename):
+    """按扩展名保存为Parquet或Feather"""
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    if filename.endswith('.parquet'):
+        df.to_parquet(filename, index=False)
+    elif filename.endswith('.feather'):
+        df.reset_index(drop=True).to_feather(filename)
+    else:
+        raise ValueError(f"不支持的列式格式: {filename}")
+
+
+def load_table(filename):
+    """读取Parquet或Feather文件"""
+    if filename.endswith('.parquet'):
+        return pd.read_parquet(filename)
+    if filename.endswith('.feather'):
+        return pd.read_feather(filename)
+    raise ValueError(f"不支持的列式格式: {filename}")
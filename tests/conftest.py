@@ -0,0 +1,59 @@
+"""
+测试公用的fixture：本地豆瓣替身服务器，输出文件写到临时目录
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_douban import FakeDoubanServer  # noqa: E402
+
+
+class RecordingServer(FakeDoubanServer):
+    """记录每个列表页请求到达时刻和结果的替身服务器"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.arrivals = []
+        # [(到达时刻, 结果), ...]，结果见 FakeDoubanServer.decide
+        self.outcomes = []
+        self._arrivals_lock = threading.Lock()
+
+    def decide(self):
+        arrived = time.monotonic()
+        outcome, delay = super().decide()
+        with self._arrivals_lock:
+            self.arrivals.append(arrived)
+            self.outcomes.append((arrived, outcome))
+        return outcome, delay
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """在临时目录中运行，缓存、断点和数据文件不影响仓库"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_douban(request, workdir, monkeypatch):
+    """启动替身服务器，并把Top250榜单指向它
+
+    间接参数化时 request.param 是传给 FakeDoubanServer 的参数，例如
+    ``@pytest.mark.parametrize('fake_douban', [{'rate_limit': 10}], indirect=True)``。
+    """
+    import lists
+
+    server = RecordingServer(**dict({'seed': 1}, **getattr(request, 'param', {}))).start()
+    monkeypatch.setitem(
+        lists._REGISTRY, lists.TOP250.name,
+        lists.TOP250._replace(url_template=server.url + '/top250?start={start}&filter='),
+    )
+    yield server
+    server.stop()
@@ -0,0 +1,74 @@
+"""
+只读HTTP接口
+"""
+
+import json
+import os
+import shutil
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api
+import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def serve(workdir):
+    servers = []
+
+    def start(sources):
+        store = api.DatasetStore(sources, image_dir=str(workdir / 'images'), reload_interval=0)
+        server = api.ApiServer(store, host='127.0.0.1', port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_without_data_file(serve, workdir):
+    base = serve([str(workdir / 'missing.parquet')])
+    status, _, body = get(base + '/charts')
+    assert status == 200
+    assert json.loads(body) == []
+    assert get(base + '/api/movies')[0] == 503
+
+
+def test_queries_and_etag(serve, workdir):
+    data = str(workdir / 'movies.csv')
+    shutil.copy(os.path.join(ROOT, 'output', 'movies.csv'), data)
+    base = serve([data])
+
+    status, headers, body = get(base + '/api/movies/1')
+    assert status == 200
+    assert json.loads(body)['title'] == '肖申克的救赎'
+    assert get(base + '/api/movies/1', {'If-None-Match': headers['ETag']})[0] == 304
+
+    status, _, body = get(base + '/api/movies?year=1994&limit=2')
+    result = json.loads(body)
+    assert result['total'] > 2 and len(result['movies']) == 2
+    assert all(movie['year'] == 1994 for movie in result['movies'])
+
+    assert get(base + '/api/movies?limit=-1')[0] == 400
+    assert get(base + '/api/movies?offset=-5')[0] == 400
+    assert get(base + '/api/movies/9999')[0] == 404
+
+    # 只读：加载数据不写实体索引文件
+    assert not os.path.exists(config.ENTITY_INDEX_FILE)
@@ -0,0 +1,70 @@
+"""
+断点文件的生命周期：创建爬虫不清空断点，保存成功后 --resume 从头开始
+"""
+
+import json
+import os
+
+import pytest
+
+import config
+from checkpoint import CrawlCheckpoint, checkpoint_path
+
+
+@pytest.fixture
+def crawl_config(fake_douban, monkeypatch):
+    """并发爬取、不实际等待、不导出Excel，每次都向替身服务器发请求"""
+    monkeypatch.setattr(config, 'CONCURRENCY', 4)
+    monkeypatch.setattr(config, 'ADAPTIVE_PACING', False)
+    monkeypatch.setattr(config, 'CACHE_TTL', 0)
+    monkeypatch.setattr(config, 'JSONL_FILE', None)
+    monkeypatch.setattr(config, 'RECORD_HISTORY', False)
+    return fake_douban
+
+
+def crawl_first_pages(server, pages):
+    """只爬取前几页，模拟爬取中断后留下的断点"""
+    import lists
+    import run
+
+    crawler = run.DoubanMovieCrawler(list_def=lists.get_list('top250')._replace(total_pages=pages))
+    assert len(crawler.crawl_concurrent(max_workers=4, rate=1000)) == pages * 25
+    server.arrivals.clear()
+
+
+def test_creating_crawlers_keeps_checkpoint(crawl_config):
+    import run
+
+    crawl_first_pages(crawl_config, 3)
+    run.DoubanMovieCrawler()
+    run.crawl_lists(['top250'], max_workers=4, rate=1000)
+
+    assert sorted(CrawlCheckpoint(config.CHECKPOINT_FILE, resume=True).completed) == [1, 2, 3]
+
+
+def test_resume_skips_completed_pages(crawl_config):
+    import run
+
+    crawl_first_pages(crawl_config, 3)
+    df = run.crawl_and_save(resume=True, export_excel=False, sleep=lambda seconds: False)
+
+    assert len(df) == 250
+    assert len(crawl_config.arrivals) == 7
+
+
+def test_resume_after_successful_save_crawls_again(crawl_config):
+    import run
+
+    assert run.crawl_and_save(export_excel=False, sleep=lambda seconds: False) is not None
+    assert len(crawl_config.arrivals) == 10
+    with open(config.CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+        assert json.loads(f.readlines()[-1])['status'] == 'finished'
+
+    assert len(run.crawl_and_save(resume=True, export_excel=False, sleep=lambda seconds: False)) == 250
+    assert len(crawl_config.arrivals) == 20
+
+
+def test_other_lists_use_their_own_checkpoint():
+    assert checkpoint_path('top250') == config.CHECKPOINT_FILE
+    assert checkpoint_path('weekly') != config.CHECKPOINT_FILE
+    assert os.path.dirname(checkpoint_path('weekly')) == os.path.dirname(config.CHECKPOINT_FILE)
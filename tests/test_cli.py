@@ -0,0 +1,19 @@
+"""
+命令行参数解析
+"""
+
+import pytest
+
+from run import build_parser
+
+
+@pytest.mark.parametrize('argv,expected', [
+    (['--incremental', 'crawl'], (True, False, False)),
+    (['crawl', '--incremental'], (True, False, False)),
+    (['--resume', 'crawl', '--enrich'], (False, True, True)),
+    (['crawl'], (False, False, False)),
+    (['--enrich'], (False, True, False)),
+])
+def test_crawl_flags_before_or_after_subcommand(argv, expected):
+    args = build_parser().parse_args(argv)
+    assert (args.incremental, args.enrich, args.resume) == expected
@@ -0,0 +1,34 @@
+"""
+crawl_concurrent() 对本地替身服务器的端到端测试
+"""
+
+import config
+
+
+def test_crawl_concurrent_returns_all_movies_in_rank_order(fake_douban, monkeypatch):
+    import run
+
+    monkeypatch.setattr(config, 'ADAPTIVE_PACING', False)
+    crawler = run.DoubanMovieCrawler(use_cache=False)
+    movies = crawler.crawl_concurrent(max_workers=4, rate=50, burst=4)
+
+    assert len(movies) == 250
+    assert [movie.rank for movie in movies] == list(range(1, 251))
+    assert all(movie.title for movie in movies)
+
+
+def test_crawl_concurrent_stays_under_token_bucket_rate(fake_douban, monkeypatch):
+    import run
+
+    monkeypatch.setattr(config, 'ADAPTIVE_PACING', False)
+    rate, burst = 20.0, 2
+    crawler = run.DoubanMovieCrawler(use_cache=False)
+    assert len(crawler.crawl_concurrent(max_workers=4, rate=rate, burst=burst)) == 250
+
+    arrivals = sorted(fake_douban.arrivals)
+    assert len(arrivals) == 10
+    # 令牌桶初始是满的：第 i 个请求最早在 (i - burst + 1) / rate 秒后发出
+    start = arrivals[0]
+    for i, arrived in enumerate(arrivals):
+        earliest = (i - burst + 1) / rate
+        assert arrived - start >= earliest - 0.02, f"第{i + 1}个请求早于令牌桶允许的时刻"
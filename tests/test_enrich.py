@@ -0,0 +1,37 @@
+"""
+详情页补充
+"""
+
+import threading
+import time
+
+from enrich import DetailEnricher
+from models import Movie
+
+
+class NotFoundSession:
+    """所有请求都返回404的会话，只记录请求次数"""
+
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, headers=None):
+        self.requests += 1
+        return type('Response', (), {'status_code': 404, 'text': ''})()
+
+
+def test_enrich_stops_promptly_when_cancelled(workdir):
+    session = NotFoundSession()
+    cancel_event = threading.Event()
+    events = []
+    enricher = DetailEnricher(session, cache_dir=str(workdir / 'subjects'), max_workers=2, rate=0.05,
+                              cancel_event=cancel_event, on_event=events.append)
+    movies = [Movie(rank=i, subject_id=str(1000 + i), title=f"电影{i}") for i in range(1, 51)]
+
+    threading.Timer(0.2, cancel_event.set).start()
+    start = time.monotonic()
+    assert enricher.enrich(movies) == 0
+    assert time.monotonic() - start < 2.0
+    # 只有令牌桶初始容量内的请求发出
+    assert session.requests <= 2
+    assert [event['done'] for event in events] == list(range(1, 51))
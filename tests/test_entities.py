@@ -0,0 +1,53 @@
+"""
+导演、国家/地区名称归并
+"""
+
+from entities import EntityIndex, EntityResolver, normalize
+
+
+def test_dangling_field_is_not_a_truncated_name():
+    assert normalize('宫崎骏 Hayao Miyazaki\xa0\xa0\xa0主...') == ('宫崎骏 Hayao Miyazaki', False)
+    assert normalize('弗兰克·德拉邦特 Frank Dara...') == ('弗兰克·德拉邦特 Frank Dara', True)
+
+
+def test_name_with_dangling_field_registers_cjk_and_latin_keys():
+    index = EntityIndex('director')
+    canonical = index.resolve('宫崎骏 Hayao Miyazaki\xa0\xa0\xa0主...')
+    assert canonical == '宫崎骏 Hayao Miyazaki'
+    assert index.resolve('宫崎骏') == canonical
+    assert index.resolve('Hayao Miyazaki') == canonical
+    assert len(index) == 1
+
+
+def test_ambiguous_truncated_prefix_does_not_merge_later_names():
+    index = EntityIndex('director')
+    index.resolve('詹姆斯·...')
+    cameron = index.resolve('詹姆斯·卡梅隆 James Cameron')
+    mangold = index.resolve('詹姆斯·曼高德 James Mangold')
+    assert cameron == '詹姆斯·卡梅隆 James Cameron'
+    assert mangold == '詹姆斯·曼高德 James Mangold'
+    # 之后出现的同一前缀仍有两个候选，不归入任何一个
+    assert index.resolve('詹姆斯·...') not in (cameron, mangold)
+
+
+def test_truncated_name_merges_into_single_match():
+    index = EntityIndex('director')
+    index.resolve('弗兰克·德拉邦特 Frank Darabont')
+    index.resolve('詹姆斯·卡梅隆 James Cameron')
+    assert index.resolve('弗兰克·德拉邦特 Frank Dara...') == '弗兰克·德拉邦特 Frank Darabont'
+    assert len(index) == 2
+
+
+def test_resolutions_survive_save_and_load(workdir):
+    path = str(workdir / 'entities.json')
+    resolver = EntityResolver(path)
+    resolver.resolve('director', '詹姆斯·...')
+    resolver.resolve('director', '詹姆斯·卡梅隆 James Cameron')
+    resolver.resolve('director', '弗兰克·德拉邦特 Frank Darabont')
+    resolver.resolve('director', '弗兰克·德拉邦特 Frank Dara...')
+    resolver.save()
+
+    loaded = EntityResolver(path)
+    assert loaded.resolve('director', '詹姆斯·曼高德 James Mangold') == '詹姆斯·曼高德 James Mangold'
+    assert loaded.resolve('director', '弗兰克·德拉邦特 Frank Dara...') == '弗兰克·德拉邦特 Frank Darabont'
+    assert loaded.resolve('country', '香港') == '中国香港'
@@ -0,0 +1,32 @@
+"""
+快照历史
+"""
+
+from history import SnapshotHistory
+
+CSV_WITHOUT_IDS = """﻿rank,title,director,year,country,type,rating,rating_count,subject_id
+1,肖申克的救赎,弗兰克·德拉邦特 Frank Darabont,1994,美国,犯罪 剧情,9.7,3185765,
+2,霸王别姬,陈凯歌 Kaige Chen,1993,中国大陆 中国香港,剧情 爱情 同性,9.6,2341032,
+3,阿甘正传,罗伯特·泽米吉斯 Robert Zemeckis,1994,,剧情 爱情,9.5,2385247,
+"""
+
+
+def test_import_csv_with_empty_subject_ids(workdir):
+    path = workdir / 'movies.csv'
+    path.write_text(CSV_WITHOUT_IDS, encoding='utf-8')
+    with SnapshotHistory(str(workdir / 'history.db')) as history:
+        history.import_file(str(path))
+        assert history.snapshots()[0]['movie_count'] == 3
+        subjects = [row['subject_id'] for row in history.conn.execute("SELECT subject_id FROM movies ORDER BY title")]
+        assert sorted(subjects) == ['title:肖申克的救赎', 'title:阿甘正传', 'title:霸王别姬']
+        country = history.conn.execute("SELECT country FROM movies WHERE title = '阿甘正传'").fetchone()[0]
+        assert country == ''
+
+
+def test_import_csv_keeps_subject_ids_as_text(workdir):
+    path = workdir / 'movies.csv'
+    path.write_text(CSV_WITHOUT_IDS.replace('3185765,\n', '3185765,1292052\n'), encoding='utf-8')
+    with SnapshotHistory(str(workdir / 'history.db')) as history:
+        history.import_file(str(path))
+        subjects = {row['subject_id'] for row in history.conn.execute("SELECT subject_id FROM movies")}
+        assert '1292052' in subjects
@@ -0,0 +1,82 @@
+"""
+多榜单调度：run.py lists 与Top250爬取共用同一个调度器，带断点、流式导出和解析质量检查
+"""
+
+import json
+import os
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def weekly(fake_douban, monkeypatch):
+    """指向同一替身服务器的第二个榜单，只有2页"""
+    import lists
+
+    monkeypatch.setattr(config, 'ADAPTIVE_PACING', False)
+    monkeypatch.setattr(config, 'CACHE_TTL', 0)
+    monkeypatch.setattr(config, 'RECORD_HISTORY', False)
+    definition = lists.TOP250._replace(
+        name='weekly', url_template=fake_douban.url + '/top250?start={start}&filter=&list=weekly', total_pages=2,
+    )
+    monkeypatch.setitem(lists._REGISTRY, definition.name, definition)
+    return definition
+
+
+def last_record(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.loads(f.readlines()[-1])
+
+
+def test_crawl_lists_saves_each_list_and_closes_its_checkpoint(fake_douban, weekly, workdir):
+    import run
+    from storage import load_table
+
+    assert run.crawl_lists(['top250', 'weekly'], max_workers=4, rate=1000, output_dir='lists')
+
+    assert len(load_table(os.path.join('lists', 'top250.parquet'))) == 250
+    assert len(load_table(os.path.join('lists', 'weekly.parquet'))) == 50
+    for name in ('top250', 'weekly'):
+        assert last_record(os.path.join('lists', f'{name}.checkpoint.jsonl'))['status'] == 'finished'
+    assert not os.path.exists(config.CHECKPOINT_FILE)
+
+
+def test_crawl_lists_resumes_from_its_checkpoint(fake_douban, weekly, workdir):
+    import lists
+    import run
+    from checkpoint import CrawlCheckpoint
+
+    # 上次只完成了第1页
+    job = lists.ListJob(weekly._replace(total_pages=1), CrawlCheckpoint(os.path.join('lists', 'weekly.checkpoint.jsonl')))
+    assert len(run.DoubanMovieCrawler().crawl_lists([job], max_workers=1, rate=1000)['weekly']) == 25
+    fake_douban.arrivals.clear()
+
+    assert run.crawl_lists(['weekly'], max_workers=4, rate=1000, output_dir='lists', resume=True)
+    assert len(fake_douban.arrivals) == 1
+
+
+def test_crawl_lists_keeps_data_when_fields_are_missing(fake_douban, weekly, workdir, monkeypatch):
+    import lists
+    import run
+    from models import Movie
+
+    def titles_only(html, page, page_size, known=None):
+        return [Movie(rank=(page - 1) * page_size + i + 1, title='电影') for i in range(page_size)]
+
+    monkeypatch.setitem(lists._REGISTRY, 'weekly', weekly._replace(parser=titles_only))
+
+    assert not run.crawl_lists(['weekly'], max_workers=4, rate=1000, output_dir='lists')
+    assert not os.path.exists(os.path.join('lists', 'weekly.parquet'))
+    assert last_record(os.path.join('lists', 'weekly.checkpoint.jsonl'))['status'] == 'ok'
+
+
+def test_lists_use_adaptive_pacing_without_explicit_rate(fake_douban, monkeypatch):
+    import run
+
+    monkeypatch.setattr(config, 'ADAPTIVE_PACING', True)
+    crawler = run.DoubanMovieCrawler()
+
+    assert crawler.make_scheduler().pacer is crawler.pacer
+    assert crawler.make_scheduler(rate=5).pacer is None
@@ -0,0 +1,104 @@
+"""
+列表页解析的字段级回归测试
+
+tests/fixtures/top250 下是完整的10个列表页和逐条的期望结果 expected.csv，
+导演行保留了豆瓣页面上真实出现过的各种截断形式。
+"""
+
+import csv
+import glob
+import os
+
+import pytest
+
+import config
+from movie_parser import DIRECTOR_RE, field_fill_rates, parse_listing_fast, parse_listing_soup
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'top250')
+PARSERS = [parse_listing_fast, parse_listing_soup]
+
+# 排名 -> (导演, 年份, 国家/地区, 类型)
+EDGE_CASES = {
+    # "主演:"被截断为"主..."
+    5: ('宫崎骏 Hayao Miyazaki', 2001, '日本', '剧情 动画 奇幻'),
+    # 没有导演，只有主演
+    22: (None, 2011, '日本', '剧情 喜剧'),
+    # 多个上映年份
+    53: ('万籁鸣 Laiming Wan', 1961, '中国大陆', '剧情 动画 奇幻 古装'),
+    # 截断在"&nbsp;"中间
+    67: ('弗洛里安·亨克尔·冯·多纳斯马尔克 Florian Henckel von Donnersmarck', 2006, '德国', '剧情 悬疑'),
+    123: ('彼特·道格特 Pete Docter / 罗纳尔多·德尔·卡门 Ronaldo Del Carmen', 2015, '中国香港', '喜剧 动画 冒险'),
+    # 截断在空白之后
+    165: ('拉娜·沃卓斯基 Lana Wachowski / 莉莉·沃卓斯基 Lilly Wachowski', 2003, '韩国', '动作 科幻'),
+    178: ('费尔南多·梅里尔斯 Fernando Meirelles / 卡迪亚·兰德 Kátia Lund', 2002, '意大利', '犯罪 剧情'),
+    # 导演名本身被截断
+    219: ('普特鹏·普罗萨卡·那·萨克那卡林 Puttipong Promsaka Na Sakolnakorn / 华森·波克彭...', 2010,
+          '美国 英国 加拿大', '剧情 喜剧 爱情'),
+}
+
+
+def parse_fixtures(parser):
+    movies = []
+    for page, path in enumerate(sorted(glob.glob(os.path.join(FIXTURES, 'page*.html'))), 1):
+        with open(path, 'r', encoding='utf-8') as f:
+            movies.extend(parser(f.read(), page))
+    return movies
+
+
+def load_expected():
+    with open(os.path.join(FIXTURES, 'expected.csv'), 'r', encoding='utf-8') as f:
+        return {int(row['rank']): row for row in csv.DictReader(f)}
+
+
+@pytest.fixture(scope='module', params=PARSERS, ids=lambda parser: parser.__name__)
+def movies(request):
+    return parse_fixtures(request.param)
+
+
+def test_ranks_are_contiguous(movies):
+    assert [movie.rank for movie in movies] == list(range(1, 251))
+
+
+def test_fields_match_expected_table(movies):
+    expected = load_expected()
+    fields = ('subject_id', 'title', 'director', 'year', 'country', 'type', 'rating', 'rating_count')
+    mismatches = [
+        (movie.rank, field, getattr(movie, field), expected[movie.rank][field])
+        for movie in movies for field in fields
+        if ('' if getattr(movie, field) is None else str(getattr(movie, field))) != expected[movie.rank][field]
+    ]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('rank', sorted(EDGE_CASES))
+def test_edge_cases(movies, rank):
+    movie = movies[rank - 1]
+    assert (movie.director, movie.year, movie.country, movie.type) == EDGE_CASES[rank]
+
+
+def test_fill_rates(movies):
+    rates = field_fill_rates(movies)
+    assert {field: rate for field, rate in rates.items() if rate < config.MIN_FIELD_FILL_RATE} == {}
+
+
+def test_fast_and_soup_parsers_agree():
+    fast, soup = (parse_fixtures(parser) for parser in PARSERS)
+    assert [m.to_dict() for m in fast] == [m.to_dict() for m in soup]
+
+
+def test_quote_may_be_missing(movies):
+    assert movies[0].quote == '希望让人自由。'
+    assert movies[33].quote == ''
+
+
+@pytest.mark.parametrize('line,director', [
+    ('导演: 宫崎骏 Hayao Miyazaki\xa0\xa0\xa0主演: 柊瑠美 Rumi Hîragi / 入野自由 Miy...', '宫崎骏 Hayao Miyazaki'),
+    ('导演: 宫崎骏 Hayao Miyazaki\xa0\xa0\xa0主...', '宫崎骏 Hayao Miyazaki'),
+    ('导演: 宫崎骏 Hayao Miyazaki\xa0\xa0\xa0主演…', '宫崎骏 Hayao Miyazaki'),
+    ('导演: 宫崎骏 Hayao Miyazaki\xa0\xa0\xa0主演：柊瑠美', '宫崎骏 Hayao Miyazaki'),
+    ('导演: 宫崎骏 Hayao Miyazaki\xa0\xa0&nb...', '宫崎骏 Hayao Miyazaki'),
+    ('导演: 宫崎骏 Hayao Miyazaki\xa0\xa0\xa0...', '宫崎骏 Hayao Miyazaki'),
+    ('导演: 弗兰克·德拉邦特 Frank Dara...', '弗兰克·德拉邦特 Frank Dara...'),
+])
+def test_director_line(line, director):
+    assert DIRECTOR_RE.search(line).group(1).strip() == director
@@ -0,0 +1,136 @@
+"""
+限速与自适应节流
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+import config
+from benchmarks.fake_douban import render_pages
+from throttle import AimdPacer, HostRateLimiter, TokenBucket
+
+
+def test_token_bucket_returns_when_cancelled():
+    cancel_event = threading.Event()
+    bucket = TokenBucket(rate=0.1, capacity=1, cancel_event=cancel_event)
+    bucket.acquire()
+    threading.Timer(0.1, cancel_event.set).start()
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start < 1.0
+
+
+def test_host_rate_limiter_shares_cancel_event():
+    cancel_event = threading.Event()
+    limiter = HostRateLimiter(rate=0.1, capacity=1, cancel_event=cancel_event)
+    limiter.acquire('https://movie.douban.com/subject/1/')
+    cancel_event.set()
+    start = time.monotonic()
+    limiter.acquire('https://movie.douban.com/subject/2/')
+    assert time.monotonic() - start < 0.5
+
+
+def make_pacer(**kwargs):
+    options = dict(rate=1.0, min_rate=0.05, max_rate=2.0, increase=0.1, decrease=0.5, latency_factor=2.0,
+                   latency_min_delta=0.2)
+    options.update(kwargs)
+    return AimdPacer(**options)
+
+
+def test_pacer_increases_on_normal_responses():
+    pacer = make_pacer()
+    for _ in range(3):
+        pacer.record(200, 0.05)
+    assert pacer.rate == pytest.approx(1.3)
+
+
+def test_pacer_decreases_once_per_interval_on_throttling():
+    pacer = make_pacer()
+    pacer.record(429)
+    assert pacer.rate == pytest.approx(0.5)
+    assert pacer.ceiling == pytest.approx(1.0)
+    # 同一个请求间隔内的其他失败不再降速
+    pacer.record(503)
+    pacer.record_empty()
+    assert pacer.rate == pytest.approx(0.5)
+
+
+def test_pacer_ignores_small_latency_jitter():
+    pacer = make_pacer()
+    for latency in (0.01, 0.03, 0.01, 0.04, 0.02, 0.05):
+        pacer.record(200, latency)
+    assert pacer.ceiling is None
+    assert pacer.rate == pytest.approx(1.6)
+
+
+def test_pacer_decreases_on_latency_increase():
+    pacer = make_pacer()
+    pacer.record(200, 0.05)
+    pacer.record(200, 2.0)
+    assert pacer.rate == pytest.approx(0.55)
+
+
+def test_pacer_state_persists_below_last_ceiling(tmp_path):
+    state_file = str(tmp_path / 'pacing.json')
+    pacer = make_pacer(state_file=state_file)
+    pacer.record(200, 0.05)
+    pacer.record(429)
+    for _ in range(10):
+        pacer.record(200, 0.05)
+    assert pacer.rate == pytest.approx(1.55)
+    pacer.save()
+
+    restored = AimdPacer.load(state_file, min_rate=0.05, max_rate=2.0)
+    # 从不超过上次被限流时速率的90%开始
+    assert restored.rate == pytest.approx(1.1 * 0.9)
+    assert restored.ceiling == pytest.approx(1.1)
+    assert restored.baseline == pytest.approx(0.05)
+
+
+def test_token_bucket_uses_injected_sleep():
+    delays = []
+    bucket = TokenBucket(rate=2.0, capacity=2, sleep=delays.append)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+    # 前两个令牌来自初始容量，之后每个令牌比前一个多等 1/rate 秒
+    assert delays == [pytest.approx(0.5, abs=0.05), pytest.approx(1.0, abs=0.05), pytest.approx(1.5, abs=0.05)]
+
+
+@pytest.mark.parametrize('fake_douban', [{'rate_limit': 10, 'pages': render_pages() * 6}], indirect=True)
+def test_pacer_settles_near_server_rate_limit(fake_douban, monkeypatch):
+    import lists
+    import run
+
+    limit = fake_douban.rate_limit
+    monkeypatch.setattr(config, 'ADAPTIVE_PACING', True)
+    monkeypatch.setattr(config, 'CACHE_TTL', 0)
+    monkeypatch.setattr(config, 'RATE_LIMIT', 4.0)
+    monkeypatch.setattr(config, 'PACING_MAX_RATE', limit * 3)
+    monkeypatch.setattr(config, 'PACING_INCREASE', 0.5)
+    monkeypatch.setattr(config, 'RETRY_THROTTLE_BASE_DELAY', 0.2)
+
+    top250 = lists.get_list('top250')
+    crawler = run.DoubanMovieCrawler(list_def=top250._replace(total_pages=len(fake_douban.pages)))
+    assert len(crawler.crawl_concurrent(max_workers=4)) == 25 * len(fake_douban.pages)
+
+    outcomes = fake_douban.outcomes
+    limited = sum(1 for _, outcome in outcomes if outcome == 'limited')
+    assert limited / len(outcomes) < 0.2
+    # 后半段被接受的请求速率接近服务器的限制
+    start, end = outcomes[0][0], outcomes[-1][0]
+    middle = (start + end) / 2
+    accepted = sum(1 for arrived, outcome in outcomes if arrived >= middle and outcome == 'ok')
+    assert accepted / (end - middle) > limit * 0.5
+
+    # 保存的速率不超过被限流时速率的90%，下次运行从该速率开始
+    with open(config.PACING_STATE_FILE, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    assert crawler.pacer.ceiling is not None
+    assert limit * 0.3 < state['rate'] <= crawler.pacer.ceiling * 0.9 + 1e-3
+    resumed = AimdPacer.load(config.PACING_STATE_FILE)
+    assert (resumed.rate, resumed.ceiling, resumed.baseline) == (state['rate'], state['ceiling'], state['baseline_latency'])
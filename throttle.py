@@ -0,0 +1,234 @@
+"""
+请求节流工具
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import config
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器
+
+    以固定速率补充令牌，每次请求消耗一个令牌；令牌不足时预支令牌并等待到它补充上来的时刻，
+    从而把整体请求频率限制在 rate 次/秒以内，同时允许最多 capacity 次的突发。
+    等待时刻在取令牌时就已确定，替换为不实际等待的 sleep 时后续请求仍按预支的顺序排队。
+    """
+
+    def __init__(self, rate, capacity=1, cancel_event=None, sleep=None):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 令牌桶容量（允许的突发请求数）
+            cancel_event: threading.Event，被设置后 acquire 立即返回
+            sleep: 等待函数 sleep(seconds)，默认为 cancel_event.wait（没有 cancel_event 时为 time.sleep）
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.cancel_event = cancel_event
+        self.sleep = sleep or (cancel_event.wait if cancel_event is not None else time.sleep)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        """获取令牌，必要时阻塞；等待期间被取消时立即返回
+
+        Returns:
+            需要等待的秒数
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            with metrics.timer('sleep', reason='rate_limit'):
+                self.sleep(delay)
+        return delay
+
+
+class HostRateLimiter:
+    """按主机分别限速，每个主机一个令牌桶
+
+    多个任务访问同一主机时共享该主机的请求配额。
+    """
+
+    def __init__(self, rate, capacity=1, cancel_event=None, sleep=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.cancel_event = cancel_event
+        self.sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host):
+        """返回指定主机的令牌桶，不存在时创建"""
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.capacity, self.cancel_event, self.sleep)
+            return self._buckets[host]
+
+    def acquire(self, url):
+        """按URL所属主机获取令牌，返回等待秒数"""
+        return self.bucket(urlsplit(url).netloc).acquire()
+
+
+class AimdPacer:
+    """根据服务器响应自适应调整请求间隔的节流器（加性增、乘性减）
+
+    每次成功且延迟正常的响应把速率加 increase 次/秒；遇到 403/429/5xx、
+    空列表页（反爬页面）或延迟明显高于基线（超过基线的 latency_factor 倍，
+    且至少高出 latency_min_delta 秒）时，把速率乘以 decrease。
+    同一个请求间隔内的多次失败只降速一次，避免并发请求同时失败时速率骤降。
+    学到的速率和延迟基线保存在状态文件中，下次运行从该速率开始；保存的速率
+    不超过最近一次被限流时速率的90%，避免从加速阶段的峰值开始而立即触发限流。
+
+    与 TokenBucket 一样提供 acquire()，可直接替换。
+    """
+
+    THROTTLE_STATUS = (403, 429)
+
+    def __init__(self, rate=None, min_rate=None, max_rate=None, increase=None, decrease=None,
+                 latency_factor=None, latency_min_delta=None, state_file=None, cancel_event=None, sleep=None):
+        """
+        Args:
+            rate: 初始速率（次/秒），默认取 config.RATE_LIMIT
+            min_rate: 速率下限，默认取 config.PACING_MIN_RATE
+            max_rate: 速率上限，默认取 config.PACING_MAX_RATE
+            increase: 每次正常响应增加的速率，默认取 config.PACING_INCREASE
+            decrease: 降速时的乘数，默认取 config.PACING_DECREASE
+            latency_factor: 平滑延迟超过基线的倍数时视为拥塞，默认取 config.PACING_LATENCY_FACTOR
+            latency_min_delta: 同时至少高出基线的秒数，默认取 config.PACING_LATENCY_MIN_DELTA
+            state_file: 状态文件路径，为None时不持久化
+            cancel_event: threading.Event，被设置后 acquire 立即返回
+            sleep: 等待函数 sleep(seconds)，默认可被 cancel_event 打断
+        """
+        self.min_rate = min_rate or config.PACING_MIN_RATE
+        self.max_rate = max_rate or config.PACING_MAX_RATE
+        self.rate = min(self.max_rate, max(self.min_rate, rate or config.RATE_LIMIT))
+        self.increase = increase or config.PACING_INCREASE
+        self.decrease = decrease or config.PACING_DECREASE
+        self.latency_factor = latency_factor or config.PACING_LATENCY_FACTOR
+        self.latency_min_delta = config.PACING_LATENCY_MIN_DELTA if latency_min_delta is None else latency_min_delta
+        self.state_file = state_file
+        self.cancel_event = cancel_event
+        self.sleep = sleep
+        # 成功响应的指数平滑延迟，以及观察到的最低平滑延迟（基线）
+        self.latency = None
+        self.baseline = None
+        # 最近一次降速前的速率，视为服务器能接受的上限
+        self.ceiling = None
+        self._next = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, state_file, **kwargs):
+        """创建节流器，状态文件存在时从上次学到的速率和延迟基线开始"""
+        pacer = cls(state_file=state_file, **kwargs)
+        if state_file and os.path.exists(state_file):
+            try:
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                pacer.rate = min(pacer.max_rate, max(pacer.min_rate, float(state['rate'])))
+                pacer.baseline = state.get('baseline_latency')
+                pacer.ceiling = state.get('ceiling')
+                logger.info(f"从上次运行恢复请求速率: {pacer.rate:.2f}次/秒")
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"节流状态文件无法读取，使用默认速率: {e}")
+        return pacer
+
+    def save(self):
+        """保存当前速率和延迟基线"""
+        if not self.state_file:
+            return
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        with self._lock:
+            rate = self.rate if self.ceiling is None else min(self.rate, self.ceiling * 0.9)
+            state = {
+                'rate': round(max(self.min_rate, rate), 4),
+                'ceiling': self.ceiling,
+                'baseline_latency': self.baseline,
+                'updated': time.time(),
+            }
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+        logger.info(f"请求速率已保存: {state['rate']:.2f}次/秒")
+
+    def acquire(self, tokens=1):
+        """等待到下一个请求时刻，间隔为 1/rate 加±20%的抖动
+
+        Returns:
+            实际等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + tokens / self.rate * random.uniform(0.8, 1.2)
+        delay = slot - now
+        if delay > 0:
+            with metrics.timer('sleep', reason='pacing'):
+                if self.sleep is not None:
+                    self.sleep(delay)
+                elif self.cancel_event is not None:
+                    self.cancel_event.wait(delay)
+                else:
+                    time.sleep(delay)
+        return delay
+
+    def record(self, status, latency=None):
+        """根据一次响应调整速率
+
+        Args:
+            status: HTTP状态码
+            latency: 响应耗时（秒）
+        """
+        with self._lock:
+            if status in self.THROTTLE_STATUS or status >= 500:
+                self._decrease(f"HTTP {status}")
+                return
+            if status != 200 or latency is None:
+                return
+
+            self.latency = latency if self.latency is None else 0.7 * self.latency + 0.3 * latency
+            # 基线缓慢上浮，服务器整体变慢后不会一直被判为拥塞
+            self.baseline = self.latency if self.baseline is None else min(self.latency, self.baseline * 1.02)
+            if (self.latency > self.baseline * self.latency_factor
+                    and self.latency - self.baseline > self.latency_min_delta):
+                self._decrease(f"延迟升高到{self.latency:.2f}秒")
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_empty(self):
+        """页面正常返回但没有解析出数据（通常是反爬页面），按限流处理"""
+        with self._lock:
+            self._decrease("空列表页")
+
+    def _decrease(self, reason):
+        now = time.monotonic()
+        if now - self._last_decrease < 1.0 / self.rate:
+            return
+        self._last_decrease = now
+        self.ceiling = self.rate
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        # 已排定的下一个请求时刻按新速率推后
+        self._next = max(self._next, now + 1.0 / self.rate)
+        logger.warning(f"{reason}，请求速率降至{self.rate:.2f}次/秒")
@@ -0,0 +1,152 @@
+"""
+简评分词缓存与词频索引
+
+每部电影的简评只在文本变化时重新分词，分词结果按 movie_id 缓存在磁盘上，
+同时维护一张持久化的词频表，新增、修改、删除简评时只增量更新对应的词频。
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# 内置停用词：常见虚词、代词和标点，可通过 config.STOPWORDS_FILE 追加
+DEFAULT_STOPWORDS = frozenset("""
+的 了 是 在 我 你 他 她 它 我们 你们 他们 这 那 这个 那个 就 也 都 和 与 及 而 但 却 还 又 被 把
+让 给 对 从 到 为 以 于 之 其 所 着 过 吗 呢 吧 啊 呀 哦 一个 一种 一样 一切 没有 不是 什么 怎么
+如果 因为 所以 只是 只有 已经 可以 不会 不能 自己 那么 这么 有 会 要 能 说 去 来 上 下 中 里
+""".split())
+
+_CACHE_VERSION = 1
+
+
+def _text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def load_stopwords(path=None):
+    """内置停用词加上停用词文件（每行一个词）中的词"""
+    stopwords = set(DEFAULT_STOPWORDS)
+    path = path or config.STOPWORDS_FILE
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            stopwords.update(line.strip() for line in f if line.strip())
+    return stopwords
+
+
+class QuoteTokenizer:
+    """带缓存的简评分词器
+
+    缓存文件结构::
+
+        {
+            "version": 1,
+            "stopwords": "<停用词集合的哈希>",
+            "movies": {"<movie_id>": {"hash": "<简评哈希>", "tokens": [...]}},
+            "frequencies": {"<词>": 次数}
+        }
+
+    停用词变化时整个缓存失效。
+    """
+
+    def __init__(self, cache_file=None, jieba_cache_file=None, stopwords=None):
+        self.cache_file = cache_file or config.TOKEN_CACHE_FILE
+        self.jieba_cache_file = jieba_cache_file or config.JIEBA_CACHE_FILE
+        self.stopwords = load_stopwords() if stopwords is None else set(stopwords)
+        self._stopwords_hash = _text_hash('\n'.join(sorted(self.stopwords)))
+        self._jieba = None
+        self.movies, self.frequencies = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == _CACHE_VERSION and cache.get('stopwords') == self._stopwords_hash:
+                return cache['movies'], Counter(cache['frequencies'])
+            logger.info("停用词或缓存格式已变化，重新分词")
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}, Counter()
+
+    def save(self):
+        """写入缓存文件"""
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        tmp_path = self.cache_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': _CACHE_VERSION,
+                'stopwords': self._stopwords_hash,
+                'movies': self.movies,
+                'frequencies': dict(self.frequencies),
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_file)
+
+    def _cut(self, text):
+        """分词并过滤停用词、单字和纯标点"""
+        if self._jieba is None:
+            # jieba首次加载词典约需1秒，只在确实有新简评时才导入；
+            # 词典缓存放在输出目录下，跨运行复用
+            import jieba
+            
+            os.makedirs(os.path.dirname(self.jieba_cache_file) or '.', exist_ok=True)
+            jieba.dt.cache_file = os.path.abspath(self.jieba_cache_file)
+            self._jieba = jieba
+        tokens = []
+        for token in self._jieba.cut(text):
+            token = token.strip()
+            if len(token) > 1 and token not in self.stopwords and any(ch.isalnum() for ch in token):
+                tokens.append(token)
+        return tokens
+
+    def update(self, movie_ids, quotes):
+        """根据当前数据更新分词缓存和词频表
+
+        Args:
+            movie_ids: 电影唯一标识序列
+            quotes: 与 movie_ids 一一对应的简评文本
+
+        Returns:
+            本次变化（重新分词或移除）的简评数量
+        """
+        current = {}
+        for movie_id, quote in zip(movie_ids, quotes):
+            quote = quote if isinstance(quote, str) else ''
+            if quote.strip():
+                current[str(movie_id)] = quote
+        
+        # 移除已不在数据中的电影
+        removed = 0
+        for movie_id in list(self.movies):
+            if movie_id not in current:
+                self.frequencies.subtract(self.movies.pop(movie_id)['tokens'])
+                removed += 1
+        
+        segmented = 0
+        for movie_id, quote in current.items():
+            digest = _text_hash(quote)
+            entry = self.movies.get(movie_id)
+            if entry is not None and entry['hash'] == digest:
+                continue
+            if entry is not None:
+                self.frequencies.subtract(entry['tokens'])
+            tokens = self._cut(quote)
+            self.movies[movie_id] = {'hash': digest, 'tokens': tokens}
+            self.frequencies.update(tokens)
+            segmented += 1
+        
+        # 去掉减到0的词
+        self.frequencies = +self.frequencies
+        logger.info(f"简评分词: {segmented}条重新分词，{len(current) - segmented}条使用缓存，移除{removed}条")
+        return segmented + removed
+
+    def term_frequencies(self, movie_ids, quotes, save=True):
+        """更新缓存并返回词频字典"""
+        changed = self.update(movie_ids, quotes)
+        if save and (changed or not os.path.exists(self.cache_file)):
+            self.save()
+        return dict(self.frequencies)